@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'drf_yasg',  
@@ -91,12 +92,35 @@ DATABASES = {
     }
 }
 
+# Cache padrão. Com vários processos, CACHE_URL deve apontar para um cache
+# compartilhado: redis://host:porta/db (requer o pacote redis) ou
+# db://nome_da_tabela (criada com `manage.py createcachetable`). Sem ela, o
+# cache é local a cada processo e o cache de respostas fica desligado.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('db://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                          'LOCATION': CACHE_URL.removeprefix('db://')}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 REST_FRAMEWORK = {
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.api.v1.authentication.PrincipalJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.api.v1.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # Filtros declarados por cada listagem (filtros, ?q=, ordering_fields)
+    'DEFAULT_FILTER_BACKENDS': (
+        'core.api.v1.filters.IndexedFilter',
+        'core.api.v1.filters.BuscaFilter',
+        'core.api.v1.filters.IndexedOrderingFilter',
     ),
     'DEFAULT_LANGUAGE': 'pt-br',
     'DEFAULT_REGION': 'BR',
@@ -106,8 +130,33 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.api.v1.serializers.PrincipalTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.api.v1.serializers.PrincipalTokenRefreshSerializer',
 }
 
+# Tokens sem estado: o access token carrega papel e entidade vinculada e as
+# requisições autenticadas não consultam o usuário no banco
+STATELESS_JWT = config('STATELESS_JWT', default=False, cast=bool)
+# Intervalo de recarga do cache de revogação de tokens (em segundos)
+TOKEN_REVOCATION_REFRESH_SECONDS = config('TOKEN_REVOCATION_REFRESH_SECONDS', default=30, cast=int)
+# Intervalo de recarga do catálogo de planos em memória (em segundos). As
+# alterações por save/delete chegam aos demais processos pela versão do
+# catálogo no banco, verificada no máximo a cada PLANOS_CATALOGO_VERIFICACAO_SECONDS;
+# a recarga cobre as feitas com QuerySet.update()
+PLANOS_CATALOGO_REFRESH_SECONDS = config('PLANOS_CATALOGO_REFRESH_SECONDS', default=30, cast=int)
+PLANOS_CATALOGO_VERIFICACAO_SECONDS = config('PLANOS_CATALOGO_VERIFICACAO_SECONDS', default=1, cast=float)
+
+# Tempo de cache (em segundos) do resumo do endpoint dashboard/
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=60, cast=int)
+# Tempo de cache (em segundos) das listagens vistas por clientes; as respostas
+# são invalidadas a cada escrita pela versão do Cliente (core/cache_respostas.py).
+# Só é usado com um cache compartilhado (CACHE_URL): num cache por processo a
+# invalidação não alcançaria os demais processos
+RESPOSTAS_CACHE_TIMEOUT = config('RESPOSTAS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Linhas lidas por vez do cursor do lado do servidor nas exportações em streaming
+EXPORTACAO_CHUNK_SIZE = config('EXPORTACAO_CHUNK_SIZE', default=2000, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -19,7 +19,7 @@ from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
-from core.api.v1.routers import router as api_v1_router
+from core.api.v1.routers import router as api_v1_router, async_urlpatterns as api_v1_async_urlpatterns
 from core.api.v1.views import register_user
 from django.views.generic import RedirectView
 
@@ -34,6 +34,7 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/v1/async/', include(api_v1_async_urlpatterns)),
     path('api/v1/', include(api_v1_router.urls)),
     path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('api/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
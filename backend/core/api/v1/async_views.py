@@ -0,0 +1,114 @@
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from .authentication import AsyncPrincipalJWTAuthentication
+from .pagination import apaginate_queryset
+from .renderers import FastJSONRenderer
+
+
+class AsyncReadView:
+    """
+    Leitura assíncrona (list/retrieve) de um viewset existente, para os
+    caminhos mais acessados servidos pelo ASGI: enquanto aguarda o banco a
+    requisição não ocupa uma thread do worker.
+
+    Escopo (get_queryset/filter_queryset), permissões, serializer e paginação
+    são os do próprio viewset, de modo que as respostas são as mesmas da
+    versão síncrona; apenas a autenticação e as consultas são assíncronas.
+    As permissões usadas por esses viewsets leem apenas o Principal já
+    carregado, sem consultas, e por isso são chamadas diretamente.
+    """
+    authentication_class = AsyncPrincipalJWTAuthentication
+    renderer_class = FastJSONRenderer
+
+    def __init__(self, viewset_class, action):
+        self.viewset_class = viewset_class
+        self.action = action
+
+    @classmethod
+    def as_view(cls, viewset_class, action):
+        handler = cls(viewset_class, action)
+
+        async def view(request, pk=None):
+            return await handler.dispatch(request, pk)
+        return view
+
+    async def dispatch(self, request, pk=None):
+        response = await self.respond(request, pk)
+        if request.method == 'HEAD':
+            # Mesmos status e cabeçalhos do GET, sem o corpo
+            response.content = b''
+        return response
+
+    async def respond(self, request, pk):
+        if request.method not in ('GET', 'HEAD'):
+            return self.render({'detail': f'Método "{request.method}" não permitido.'},
+                               status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        drf_request = Request(request)
+        viewset = self.viewset_class(request=drf_request, action=self.action, format_kwarg=None,
+                                     args=(), kwargs={} if pk is None else {'pk': pk})
+        authenticator = self.authentication_class()
+        try:
+            await self.authenticate(authenticator, drf_request)
+            self.check_permissions(drf_request, viewset)
+            queryset = viewset.filter_queryset(viewset.get_queryset())
+            if self.action == 'retrieve':
+                data = await self.retrieve(drf_request, viewset, queryset, pk)
+            else:
+                data = await self.list(drf_request, viewset, queryset)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc, authenticator, drf_request)
+        return self.render(data, status.HTTP_200_OK)
+
+    async def authenticate(self, authenticator, request):
+        result = await authenticator.aauthenticate(request)
+        if result is None:
+            request.user, request.auth = AnonymousUser(), None
+        else:
+            request.user, request.auth = result
+
+    def check_permissions(self, request, viewset, obj=None):
+        for permission in viewset.get_permissions():
+            allowed = (permission.has_permission(request, viewset) if obj is None
+                       else permission.has_object_permission(request, viewset, obj))
+            if not allowed:
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    async def retrieve(self, request, viewset, queryset, pk):
+        try:
+            instance = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise exceptions.NotFound()
+        self.check_permissions(request, viewset, instance)
+        return viewset.get_serializer(instance).data
+
+    async def list(self, request, viewset, queryset):
+        paginator = viewset.paginator
+        if paginator is None:
+            return viewset.get_serializer([item async for item in queryset], many=True).data
+
+        page = await apaginate_queryset(paginator, queryset, request)
+        if page is None:
+            # Sem tamanho de página, como no síncrono: a listagem inteira, sem envelope
+            return viewset.get_serializer([item async for item in queryset], many=True).data
+        return paginator.get_paginated_response(viewset.get_serializer(page, many=True).data).data
+
+    def handle_exception(self, exc, authenticator, request):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            headers['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            exc.status_code = status.HTTP_401_UNAUTHORIZED
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, exc.status_code)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def render(self, data, status_code):
+        return HttpResponse(self.renderer_class().render(data), status=status_code,
+                            content_type=self.renderer_class.media_type)
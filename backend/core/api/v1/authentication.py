@@ -0,0 +1,170 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .revocation import revocation_cache
+
+# Relações carregadas junto com o usuário autenticado
+PRINCIPAL_RELATED = ('perfil__cliente', 'perfil__personal', 'perfil__nutricionista')
+
+
+def _related_id(obj, attr):
+    related = getattr(obj, attr, None) if obj is not None else None
+    return related.pk if related is not None else None
+
+
+class Principal:
+    """
+    Identidade da requisição: papel e ids das entidades vinculadas ao usuário,
+    resolvidos uma única vez para permissões e get_queryset().
+    """
+    __slots__ = ('user_id', 'is_authenticated', 'is_superuser', 'is_staff', 'role',
+                 'perfil_id', 'cliente_id', 'personal_id', 'nutricionista_id')
+
+    # Claims gravados no token sem estado (além do id do usuário)
+    CLAIMS = ('is_superuser', 'is_staff', 'role', 'perfil_id', 'cliente_id', 'personal_id', 'nutricionista_id')
+
+    def __init__(self, user_id, is_authenticated=True, is_superuser=False, is_staff=False, role=None,
+                 perfil_id=None, cliente_id=None, personal_id=None, nutricionista_id=None):
+        self.user_id = user_id
+        self.is_authenticated = is_authenticated
+        self.is_superuser = is_superuser
+        self.is_staff = is_staff
+        self.role = role
+        self.perfil_id = perfil_id
+        self.cliente_id = cliente_id
+        self.personal_id = personal_id
+        self.nutricionista_id = nutricionista_id
+
+    @classmethod
+    def for_user(cls, user):
+        perfil = getattr(user, 'perfil', None) if user.is_authenticated else None
+        return cls(
+            user_id=user.pk,
+            is_authenticated=user.is_authenticated,
+            is_superuser=user.is_superuser,
+            is_staff=user.is_staff,
+            role=perfil.tipo if perfil is not None else None,
+            perfil_id=perfil.pk if perfil is not None else None,
+            cliente_id=_related_id(perfil, 'cliente'),
+            personal_id=_related_id(perfil, 'personal'),
+            nutricionista_id=_related_id(perfil, 'nutricionista'),
+        )
+
+    @classmethod
+    def from_token(cls, token):
+        return cls(token[api_settings.USER_ID_CLAIM], **{claim: token.get(claim) for claim in cls.CLAIMS})
+
+    def to_claims(self):
+        return {claim: getattr(self, claim) for claim in self.CLAIMS}
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+
+def get_principal(user):
+    """Retorna o Principal do usuário, calculado uma vez por instância."""
+    principal = getattr(user, '_principal', None)
+    if principal is None:
+        principal = Principal.for_user(user)
+        user._principal = principal
+    return principal
+
+
+def is_stateless_token(validated_token):
+    return settings.STATELESS_JWT and 'role' in validated_token
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que carrega o usuário com perfil e entidade vinculada
+    (cliente, personal ou nutricionista) em uma única consulta.
+
+    Com STATELESS_JWT ativo, tokens que carregam os claims do Principal não
+    consultam o banco: o usuário é um TokenUser e a revogação é verificada no
+    cache em memória.
+    """
+
+    def get_user(self, validated_token):
+        if is_stateless_token(validated_token):
+            return self.get_stateless_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = self.user_model.objects.select_related(*PRINCIPAL_RELATED).get(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        self.check_user(user, validated_token)
+        return user
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        get_principal(user)
+
+    def get_stateless_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = api_settings.TOKEN_USER_CLASS(validated_token)
+        if revocation_cache.is_revoked(user.pk, validated_token.get('iat')):
+            raise AuthenticationFailed('Token revogado', code='token_revoked')
+
+        user._principal = Principal.from_token(validated_token)
+        return user
+
+
+class AsyncPrincipalJWTAuthentication(PrincipalJWTAuthentication):
+    """
+    Variante para views assíncronas: a validação do token é a mesma, o usuário
+    é carregado pelo ORM assíncrono e a recarga do cache de revogação roda
+    fora do event loop.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if is_stateless_token(validated_token):
+            if revocation_cache.is_stale():
+                await sync_to_async(revocation_cache.reload)()
+            return self.get_stateless_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.select_related(*PRINCIPAL_RELATED).aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        self.check_user(user, validated_token)
+        return user
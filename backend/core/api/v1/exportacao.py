@@ -0,0 +1,59 @@
+"""
+Exportação em streaming (NDJSON ou CSV) das listagens.
+
+As linhas são lidas com .iterator(chunk_size), que no PostgreSQL usa um
+cursor do lado do servidor: a memória fica limitada a um lote,
+independentemente do tamanho do resultado. Cada lote é serializado e
+enviado antes da leitura do próximo, e o cabeçalho do CSV sai antes da
+primeira consulta.
+"""
+import csv
+import json
+from itertools import islice
+
+from rest_framework.utils.encoders import JSONEncoder
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Prefixos que planilhas interpretam como fórmula
+_PREFIXOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Eco:
+    """Buffer do csv.writer que devolve a linha formatada em vez de guardá-la."""
+
+    def write(self, value):
+        return value
+
+
+def lotes(iterable, tamanho):
+    iterator = iter(iterable)
+    while lote := list(islice(iterator, tamanho)):
+        yield lote
+
+
+def _celula(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (bool, dict, list)):
+        return json.dumps(valor, cls=JSONEncoder, ensure_ascii=False)
+    if isinstance(valor, str) and valor.startswith(_PREFIXOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def linhas_ndjson(lotes_de_itens, renderer):
+    """Um objeto JSON por linha, um bloco por lote."""
+    for itens in lotes_de_itens:
+        yield b''.join(renderer.render(item) + b'\n' for item in itens)
+
+
+def linhas_csv(colunas, lotes_de_itens):
+    """Cabeçalho com `colunas` e uma linha por item; relações aninhadas vão como JSON."""
+    writer = csv.writer(_Eco())
+    yield writer.writerow(colunas)
+    for itens in lotes_de_itens:
+        yield ''.join(writer.writerow([_celula(item.get(coluna)) for coluna in colunas]) for item in itens)
@@ -0,0 +1,133 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+# Serializers de leitura já compilados, por (classe do serializer, model)
+_values_serializer_cache = {}
+
+# Campos cujo to_representation não altera os valores lidos do model
+_NATIVE_FIELDS = (
+    (serializers.IntegerField, (models.IntegerField,)),
+    (serializers.CharField, (models.CharField, models.TextField)),
+    (serializers.BooleanField, (models.BooleanField,)),
+)
+
+# O item é omitido quando uma relação anulável do caminho é nula (como o SkipField do DRF)
+SKIP = object()
+
+
+class ValuesSerializer:
+    """
+    Versão somente leitura de um ModelSerializer que monta o mesmo JSON a
+    partir de linhas de .values(), sem instanciar models nem percorrer a
+    maquinaria de campos do DRF por item.
+
+    `columns` são as colunas a pedir ao .values(); `plan` traz, por campo de
+    saída, a coluna, as relações anuláveis do caminho e o conversor (None
+    quando o valor do banco já é o da representação).
+    """
+
+    def __init__(self, columns, plan):
+        self.columns = columns
+        self.plan = plan
+
+    def to_representation(self, rows):
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, nullable, on_null, convert in self.plan:
+                if nullable and any(row[path] is None for path in nullable):
+                    if on_null is not SKIP:
+                        item[name] = None
+                    continue
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+
+def _display_converter(model_field):
+    choices = dict(model_field.flatchoices)
+    # get_FOO_display() seguido do CharField.to_representation()
+    return lambda value: str(choices.get(value, value))
+
+
+def _compile_field(field, model):
+    """Retorna (caminho, relações anuláveis, conversor) ou None se o campo não for suportado."""
+    if isinstance(field, (serializers.BaseSerializer, ManyRelatedField, serializers.SerializerMethodField,
+                          serializers.HiddenField)) or field.source == '*' or field.default is not empty:
+        return None
+    if isinstance(field, RelatedField) and not (isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None):
+        return None
+
+    attrs = list(field.source_attrs)
+    display = attrs[-1].startswith('get_') and attrs[-1].endswith('_display')
+    if display:
+        attrs[-1] = attrs[-1][len('get_'):-len('_display')]
+
+    current, nullable = model, []
+    for position, attr in enumerate(attrs):
+        try:
+            model_field = current._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        last = position == len(attrs) - 1
+        if model_field.is_relation:
+            # Apenas ForeignKey/OneToOne diretos: .values() segue o join e retorna o pk no fim
+            if not model_field.concrete or not (model_field.many_to_one or model_field.one_to_one):
+                return None
+            if last and not isinstance(field, PrimaryKeyRelatedField):
+                return None
+            if not last:
+                if model_field.null:
+                    nullable.append('__'.join(attrs[:position + 1]))
+                current = model_field.related_model
+        elif not last:
+            return None
+
+    if display:
+        if not model_field.choices:
+            return None
+        convert = _display_converter(model_field)
+    elif isinstance(field, PrimaryKeyRelatedField):
+        convert = None
+    elif any(isinstance(field, drf_class) and isinstance(model_field, model_classes)
+             for drf_class, model_classes in _NATIVE_FIELDS):
+        convert = None
+    else:
+        convert = field.to_representation
+    return '__'.join(attrs), nullable, convert
+
+
+def build_values_serializer(serializer, model):
+    columns, plan = [], []
+
+    def column(path):
+        if path not in columns:
+            columns.append(path)
+        return path
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        compiled = _compile_field(field, model)
+        if compiled is None:
+            return None
+        path, nullable, convert = compiled
+        on_null = None if field.allow_null else SKIP
+        plan.append((name, column(path), [column(relation) for relation in nullable], on_null, convert))
+    return ValuesSerializer(columns, plan)
+
+
+def get_values_serializer(serializer_class, model):
+    """
+    ValuesSerializer equivalente a `serializer_class`, ou None se algum campo
+    não puder ser lido de .values() (serializers aninhados, métodos, relações
+    reversas ou many-to-many): nesse caso vale o serializer normal.
+    """
+    key = (serializer_class, model)
+    if key not in _values_serializer_cache:
+        _values_serializer_cache[key] = build_values_serializer(serializer_class(), model)
+    return _values_serializer_cache[key]
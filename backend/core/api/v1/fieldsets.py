@@ -0,0 +1,80 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import PrimaryKeyRelatedField
+
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def parse_field_selection(query_params):
+    """
+    Lê `?fields=` e `?expand=` da requisição. Retorna None quando nenhum dos
+    dois foi enviado; senão (campos, expandidos): `campos` é a árvore dos
+    caminhos pedidos ({} = todos) e `expandidos` o conjunto de caminhos
+    pontuados dos serializers aninhados a incluir por completo.
+    """
+    if 'fields' not in query_params and 'expand' not in query_params:
+        return None
+    fields = {}
+    for path in _split(query_params.get('fields')):
+        node = fields
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return fields, frozenset(_split(query_params.get('expand')))
+
+
+def _collapse(field):
+    """Troca um serializer aninhado pela chave primária (ou lista de chaves) do relacionado."""
+    kwargs = {'read_only': True, 'many': isinstance(field, serializers.ListSerializer)}
+    if field.source != field.field_name:
+        kwargs['source'] = field.source
+    return PrimaryKeyRelatedField(**kwargs)
+
+
+def _apply(serializer, fields, expand, prefix, unknown, expanded):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    readable = {name for name, field in serializer.fields.items() if not field.write_only}
+    if fields:
+        unknown.update(prefix + name for name in fields if name not in readable)
+        for name in list(serializer.fields):
+            if name not in fields:
+                del serializer.fields[name]
+
+    for name, field in list(serializer.fields.items()):
+        path = prefix + name
+        subfields = fields.get(name) if fields else None
+        if not isinstance(field, serializers.BaseSerializer):
+            if subfields:
+                unknown.update(f'{path}.{subname}' for subname in subfields)
+            continue
+        if subfields or any(item == path or item.startswith(path + '.') for item in expand):
+            expanded.add(path)
+            _apply(field, subfields, expand, path + '.', unknown, expanded)
+        elif field.source != '*':
+            serializer.fields[name] = _collapse(field)
+
+
+def apply_field_selection(serializer, selection):
+    """
+    Restringe os campos do serializer (e dos aninhados) à seleção da
+    requisição, antes de qualquer leitura: campos fora de `fields` são
+    removidos, e serializers aninhados que não foram expandidos (em
+    `expand` ou com subcampos em `fields`) viram a chave primária do
+    relacionado. O plano de joins e a serialização partem do serializer
+    já restrito, de modo que o que ficou de fora não é consultado.
+    """
+    fields, expand = selection
+    unknown, expanded = set(), set()
+    _apply(serializer, fields, expand, '', unknown, expanded)
+
+    errors = {}
+    if unknown:
+        errors['fields'] = [f"Campos desconhecidos: {', '.join(sorted(unknown))}"]
+    if expand - expanded:
+        errors['expand'] = [f"Campos não expansíveis: {', '.join(sorted(expand - expanded))}"]
+    if errors:
+        raise ValidationError(errors)
+    return serializer
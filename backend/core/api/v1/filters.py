@@ -0,0 +1,143 @@
+import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.busca import buscar_aproximado, buscar_texto
+from core.models import ALIVE
+
+
+class Filtro:
+    """
+    Filtro declarado por uma listagem em `filtros`: o parâmetro `nome` da
+    query string filtra `campo` (por padrão, o próprio nome; pode atravessar
+    relações, como `perfil__tipo`). Cada lookup além de `exact` vira o
+    parâmetro `nome__lookup` (ex.: `data_solicitacao__gte`).
+    """
+
+    def __init__(self, nome, campo=None, lookups=('exact',)):
+        self.nome = nome
+        self.campo = campo or nome
+        self.lookups = tuple(lookups)
+
+    def parametros(self):
+        for lookup in self.lookups:
+            yield (self.nome if lookup == 'exact' else f'{self.nome}__{lookup}'), lookup
+
+    def __repr__(self):
+        return f'Filtro({self.nome!r})'
+
+
+def resolver_campo(model, caminho):
+    """(model, field) do último campo de `caminho` e se o caminho atravessa relações."""
+    partes = caminho.split('__')
+    for parte in partes[:-1]:
+        model = model._meta.get_field(parte).related_model
+    return model, model._meta.get_field(partes[-1]), len(partes) > 1
+
+
+def campo_indexado(model, caminho):
+    """
+    Indica se algum índice começa pela coluna de `caminho`. Índices parciais
+    com a condição ALIVE só contam no próprio model da listagem, cujo manager
+    já aplica `deleted_at IS NULL`; numa relação o join não aplica a condição.
+    """
+    model, field, atravessa = resolver_campo(model, caminho)
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    for index in model._meta.indexes:
+        if not index.fields or index.fields[0].lstrip('-') != field.name:
+            continue
+        if index.condition is None or (index.condition == ALIVE and not atravessa):
+            return True
+    return False
+
+
+def campos_sem_indice(view_class):
+    """Filtros e ordenações declarados por `view_class` sem índice que os atenda."""
+    queryset = getattr(view_class, 'queryset', None)
+    if queryset is None:
+        return []
+    caminhos = [filtro.campo for filtro in getattr(view_class, 'filtros', ())]
+    caminhos += list(getattr(view_class, 'ordering_fields', ()))
+    return [caminho for caminho in caminhos if not campo_indexado(queryset.model, caminho)]
+
+
+class IndexedFilter(BaseFilterBackend):
+    """
+    Filtros declarados pela view em `filtros` (ver Filtro). Os valores são
+    convertidos pelo campo do model e valores inválidos retornam 400. A
+    verificação `core.E001` garante que cada filtro tem índice.
+    """
+
+    def converter(self, field, valor):
+        valor = field.to_python(valor)
+        if field.choices and valor not in dict(field.flatchoices):
+            raise DjangoValidationError(f"Escolha um entre: {', '.join(str(c) for c, _ in field.flatchoices)}.")
+        if isinstance(valor, datetime.datetime) and timezone.is_naive(valor):
+            valor = timezone.make_aware(valor)
+        return valor
+
+    def filter_queryset(self, request, queryset, view):
+        condicoes, erros = {}, {}
+        for filtro in getattr(view, 'filtros', ()):
+            _, field, _ = resolver_campo(queryset.model, filtro.campo)
+            for parametro, lookup in filtro.parametros():
+                if parametro not in request.query_params:
+                    continue
+                try:
+                    valor = self.converter(field, request.query_params[parametro])
+                except DjangoValidationError as exc:
+                    erros[parametro] = exc.messages
+                    continue
+                condicoes[f'{filtro.campo}__{lookup}'] = valor
+        if erros:
+            raise ValidationError(erros)
+        return queryset.filter(**condicoes) if condicoes else queryset
+
+
+class IndexedOrderingFilter(BaseFilterBackend):
+    """
+    Ordenação `?ordering=campo` (ou `-campo`) entre os `ordering_fields` da
+    view, um campo por vez, com o id como desempate: cada campo tem índice
+    próprio e a ordenação é lida dele, sem ordenar a listagem inteira.
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        ordenacao = request.query_params.get(self.ordering_param, '').strip()
+        if not ordenacao:
+            return queryset
+        campos = getattr(view, 'ordering_fields', ())
+        campo = ordenacao.lstrip('-')
+        if campo not in campos:
+            raise ValidationError({self.ordering_param: [
+                f"Ordenação inválida: {ordenacao}. Use um entre: {', '.join(campos) or 'nenhum'}."
+            ]})
+        descendente = ordenacao.startswith('-')
+        return queryset.order_by(ordenacao, '-pk' if descendente else 'pk')
+
+
+class BuscaFilter(BaseFilterBackend):
+    """
+    Filtro `?q=` das listagens, ordenado por relevância. A view declara
+    `search_vector` (campo tsvector, busca textual) ou
+    `search_trigram_fields` (busca aproximada por trigramas).
+    """
+    search_param = 'q'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        termo = self.get_search_term(request)
+        if not termo:
+            return queryset
+        if getattr(view, 'search_vector', None):
+            return buscar_texto(queryset, view.search_vector, termo)
+        if getattr(view, 'search_trigram_fields', None):
+            return buscar_aproximado(queryset, view.search_trigram_fields, termo)
+        return queryset
+
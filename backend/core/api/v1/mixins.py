@@ -0,0 +1,348 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import serializers
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+from core.cache_respostas import cache_compartilhado, versao_do_cliente
+from .authentication import get_principal
+from .fast_serializers import build_values_serializer, get_values_serializer
+from .fieldsets import apply_field_selection, parse_field_selection
+
+# Planos já calculados, por (classe do serializer, model)
+_query_plan_cache = {}
+
+# Seleção de campos ainda não lida da requisição
+_UNSET = object()
+
+# Relações cujo updated_at compõe os validadores, por (model, plano de joins)
+_validator_paths_cache = {}
+
+
+def _get_relation(model, attr):
+    try:
+        field = model._meta.get_field(attr)
+    except FieldDoesNotExist:
+        return None
+    if field.is_relation and field.related_model is not None:
+        return field
+    return None
+
+
+def _collect_paths(serializer, model, prefix, many, select, prefetch):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    sources = [(field, field.source_attrs) for field in serializer.fields.values() if not field.write_only]
+    # Caminhos lidos por SerializerMethodFields, que não podem ser inferidos
+    meta = getattr(serializer, 'Meta', None)
+    for name, extra in getattr(meta, 'extra_sources', {}).items():
+        if name in serializer.fields:
+            sources.extend((None, source.split('.')) for source in extra)
+
+    for field, attrs in sources:
+        if field is not None and field.source == '*':
+            if isinstance(field, serializers.BaseSerializer):
+                _collect_paths(field, model, prefix, many, select, prefetch)
+            continue
+
+        # PrimaryKeyRelatedField lê apenas a coluna <campo>_id, sem join
+        if isinstance(field, RelatedField) and field.use_pk_only_optimization():
+            attrs = attrs[:-1]
+
+        path, current, is_many = list(prefix), model, many
+        for attr in attrs:
+            relation = _get_relation(current, attr)
+            if relation is None:
+                break
+            path.append(attr)
+            if relation.one_to_many or relation.many_to_many:
+                is_many = True
+            (prefetch if is_many else select).add('__'.join(path))
+            current = relation.related_model
+        else:
+            if isinstance(field, serializers.BaseSerializer) and path != prefix:
+                _collect_paths(field, current, path, is_many, select, prefetch)
+
+
+def build_query_plan(serializer, model):
+    """
+    Retorna (select_related, prefetch_related) necessários para serializar
+    instâncias de `model` com `serializer` sem consultas adicionais por item.
+    """
+    select, prefetch = set(), set()
+    _collect_paths(serializer, model, [], False, select, prefetch)
+    return sorted(select), sorted(prefetch)
+
+
+def get_query_plan(serializer_class, model):
+    key = (serializer_class, model)
+    if key not in _query_plan_cache:
+        _query_plan_cache[key] = build_query_plan(serializer_class(), model)
+    return _query_plan_cache[key]
+
+
+def apply_query_plan(queryset, select, prefetch):
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def optimize_queryset(queryset, serializer_class):
+    """Aplica ao queryset o plano de joins do serializer."""
+    return apply_query_plan(queryset, *get_query_plan(serializer_class, queryset.model))
+
+
+class QueryOptimizerMixin:
+    """
+    Aplica automaticamente select_related/prefetch_related ao queryset
+    retornado por get_queryset(), a partir dos `source=` e serializers
+    aninhados do serializer da view.
+    """
+
+    def get_query_plan(self, model):
+        return get_query_plan(self.get_serializer_class(), model)
+
+    def optimize_queryset(self, queryset):
+        return apply_query_plan(queryset, *self.get_query_plan(queryset.model))
+
+    def filter_queryset(self, queryset):
+        return self.optimize_queryset(super().filter_queryset(queryset))
+
+
+def _has_updated_at(model):
+    try:
+        model._meta.get_field('updated_at')
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def get_validator_paths(model, select, prefetch):
+    """
+    Relações do plano de joins do serializer cujo updated_at também altera
+    a representação. Retorna None se alguma delas não tiver updated_at:
+    nesse caso não há como validar a resposta.
+    """
+    key = (model, tuple(select), tuple(prefetch))
+    if key not in _validator_paths_cache:
+        paths = []
+        for path in select + prefetch:
+            current = model
+            for attr in path.split('__'):
+                current = current._meta.get_field(attr).related_model
+            if not _has_updated_at(current):
+                paths = None
+                break
+            paths.append(path)
+        _validator_paths_cache[key] = paths if _has_updated_at(model) else None
+    return _validator_paths_cache[key]
+
+
+class ConditionalGetMixin:
+    """
+    Suporte a GET condicional (ETag / Last-Modified) em list e retrieve.
+
+    Os validadores vêm de updated_at: no retrieve, o do objeto; na listagem,
+    o maior updated_at e a contagem do queryset já filtrado e com escopo do
+    usuário, em uma única agregação. Relações serializadas (aninhados,
+    `source=`) entram no maior updated_at, e a exclusão lógica também o
+    atualiza. Uma requisição com If-None-Match/If-Modified-Since que confere
+    recebe 304 antes de qualquer serialização. Escritas que não passam pelo
+    ORM com updated_at (UPDATE manual, exclusão física) não são detectadas.
+    """
+
+    def get_validators(self, queryset, instance=None):
+        """Retorna (etag, last_modified) ou None quando a resposta não pode ser validada."""
+        paths = get_validator_paths(queryset.model, *self.get_query_plan(queryset.model))
+        if paths is None:
+            return None
+
+        if instance is not None and not paths:
+            ultima, total = instance.updated_at, 1
+        else:
+            if instance is not None:
+                queryset = queryset.filter(pk=instance.pk)
+            campos = [Max('updated_at')] + [Max(f'{path}__updated_at') for path in paths]
+            agregado = queryset.order_by().aggregate(
+                ultima=Greatest(*campos) if len(campos) > 1 else campos[0],
+                # Joins com relações to-many repetem linhas
+                total=Count('pk', distinct=bool(paths)),
+            )
+            ultima, total = agregado['ultima'], agregado['total']
+        return self.build_validators(ultima, total)
+
+    def build_validators(self, ultima, total):
+        # A mesma contagem e data valem para qualquer página, filtro ou formato
+        chave = f"{self.request.get_full_path()}|{ultima.isoformat() if ultima else ''}|{total}"
+        etag = f'W/"{hashlib.md5(chave.encode(), usedforsecurity=False).hexdigest()}"'
+        # Last-Modified tem precisão de segundos
+        return etag, int(ultima.timestamp()) if ultima else None
+
+    def conditional_response(self, request, validators):
+        if validators is None:
+            return None
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self.set_validators(response, validators)
+        return response
+
+    def set_validators(self, response, validators):
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # A resposta varia com o usuário e deve ser sempre revalidada
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_validators(self.filter_queryset(self.get_queryset()))
+        not_modified = self.conditional_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().list(request, *args, **kwargs)
+        if validators is not None and response.status_code == 200:
+            self.set_validators(response, validators)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        # get_object() aplica o escopo e as permissões de objeto antes do 304
+        instance = self.get_object()
+        validators = self.get_validators(self.get_queryset(), instance)
+        not_modified = self.conditional_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = Response(self.get_serializer(instance).data)
+        if validators is not None:
+            self.set_validators(response, validators)
+        return response
+
+
+class ClienteResponseCacheMixin:
+    """
+    Cache das listagens vistas por clientes, por (endpoint, usuário,
+    parâmetros, versão do Cliente). Uma resposta em cache é devolvida sem
+    consultas nem serialização, inclusive como 304 quando os validadores
+    conferem. Os signals e os serviços de escrita em massa invalidam a
+    versão do cliente a cada alteração (ver core/cache_respostas.py).
+    Profissionais e administradores, cujo escopo abrange vários clientes,
+    não usam o cache, nem ninguém quando o cache padrão é local ao processo.
+    """
+
+    def get_response_cache_key(self, request):
+        if not cache_compartilhado():
+            return None
+        principal = get_principal(request.user)
+        if not (principal.has_role('cliente') and principal.cliente_id):
+            return None
+        # A URL absoluta inclui os parâmetros e o host dos links de paginação
+        url = hashlib.md5(request.build_absolute_uri().encode(), usedforsecurity=False).hexdigest()
+        return 'respostas:{}:{}:{}:{}'.format(
+            self.basename, request.user.pk, versao_do_cliente(principal.cliente_id), url
+        )
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        cached = cache.get(key)
+        if cached is not None:
+            data, validators = cached
+            not_modified = self.conditional_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+            response = Response(data)
+            if validators is not None:
+                self.set_validators(response, validators)
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            validators = None
+            if response.has_header('ETag'):
+                validators = (response['ETag'], parse_http_date_safe(response.get('Last-Modified', '')))
+            cache.set(key, (response.data, validators), settings.RESPOSTAS_CACHE_TIMEOUT)
+        return response
+
+
+class FastListMixin:
+    """
+    Com `fast_list = True`, a listagem é lida com .values() e serializada
+    pelo ValuesSerializer equivalente ao serializer da view, com o mesmo
+    JSON. Serializers que não podem ser compilados (aninhados, métodos)
+    usam o caminho normal.
+    """
+    fast_list = False
+
+    def get_values_serializer(self, model):
+        return get_values_serializer(self.get_serializer_class(), model)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        values_serializer = self.get_values_serializer(queryset.model) if self.fast_list else None
+        if values_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        # O cursor da paginação é montado a partir do id e do campo de ordenação
+        columns = list(values_serializer.columns)
+        for column in ('id', getattr(self.paginator, 'keyset_field', None)):
+            if column and column not in columns:
+                columns.append(column)
+        queryset = queryset.values(*columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(values_serializer.to_representation(page))
+        return Response(values_serializer.to_representation(queryset))
+
+
+class SparseFieldsetsMixin:
+    """
+    Suporte a `?fields=id,nome,perfil.tipo` e `?expand=perfil` nas leituras
+    (GET/HEAD). Sem os parâmetros a resposta não muda; com eles, apenas os
+    campos pedidos são serializados, e serializers aninhados não expandidos
+    viram a chave primária do relacionado. O plano de joins, os validadores
+    de GET condicional e a listagem rápida são calculados a partir do
+    serializer restrito, de modo que relações não pedidas não são lidas.
+    Escritas ignoram os parâmetros: o serializer valida todos os campos.
+    """
+    _field_selection = _UNSET
+
+    def get_field_selection(self):
+        if self._field_selection is _UNSET:
+            request = getattr(self, 'request', None)
+            self._field_selection = None
+            if request is not None and request.method in ('GET', 'HEAD'):
+                self._field_selection = parse_field_selection(request.query_params)
+        return self._field_selection
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        selection = self.get_field_selection()
+        if selection is not None:
+            apply_field_selection(serializer, selection)
+        return serializer
+
+    def get_query_plan(self, model):
+        if self.get_field_selection() is None:
+            return super().get_query_plan(model)
+        return build_query_plan(self.get_serializer(), model)
+
+    def get_values_serializer(self, model):
+        if self.get_field_selection() is None:
+            return super().get_values_serializer(model)
+        return build_values_serializer(self.get_serializer(), model)
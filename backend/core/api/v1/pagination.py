@@ -0,0 +1,139 @@
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Paginação por número de página (padrão) com modo cursor opcional.
+
+    O modo cursor é ativado com `?paginacao=cursor` (ou quando um `cursor` é
+    enviado). Nele os registros são ordenados por (`keyset_field`, `id`) em
+    ordem decrescente e cada página filtra a partir da última linha da
+    anterior, sem COUNT(*) nem OFFSET: páginas profundas custam o mesmo que
+    a primeira. A navegação é apenas para frente (`next`).
+    """
+    keyset_field = None
+    mode_query_param = 'paginacao'
+    cursor_query_param = 'cursor'
+    cursor_page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Cursor inválido'
+
+    def use_cursor(self, request):
+        return (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.cursor_query_param in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.keyset_field is not None and self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        return self.finish_cursor_page(list(self.get_cursor_queryset(queryset, request)))
+
+    def get_cursor_queryset(self, queryset, request):
+        self.request = request
+        self.cursor_page_size = self.get_cursor_page_size(request)
+        queryset = queryset.order_by(f'-{self.keyset_field}', '-id')
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            value, pk = self.decode_cursor(encoded, queryset.model)
+            queryset = queryset.filter(
+                Q(**{f'{self.keyset_field}__lt': value}) | Q(**{self.keyset_field: value, 'id__lt': pk}),
+                **{f'{self.keyset_field}__lte': value}
+            )
+
+        # Uma linha extra indica se existe próxima página
+        return queryset[:self.cursor_page_size + 1]
+
+    def finish_cursor_page(self, rows):
+        self.has_next = len(rows) > self.cursor_page_size
+        page = rows[:self.cursor_page_size]
+        self.last_item = page[-1] if page else None
+        return page
+
+    def get_cursor_page_size(self, request):
+        try:
+            size = int(request.query_params[self.cursor_page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def encode_cursor(self, item):
+        # item é uma instância ou, na listagem rápida, uma linha de .values()
+        if isinstance(item, dict):
+            value, pk = item[self.keyset_field], item['id']
+        else:
+            value, pk = getattr(item, self.keyset_field), item.pk
+        return base64.urlsafe_b64encode(f'{value.isoformat()}|{pk}'.encode()).decode()
+
+    def decode_cursor(self, encoded, model):
+        try:
+            value, pk = base64.urlsafe_b64decode(encoded.encode()).decode().rsplit('|', 1)
+            return model._meta.get_field(self.keyset_field).to_python(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_item))
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+
+class HistoricoPagination(KeysetPagination):
+    keyset_field = 'data_inicio'
+
+
+class TrocaPagination(KeysetPagination):
+    keyset_field = 'data_solicitacao'
+
+
+async def apaginate_queryset(paginator, queryset, request):
+    """
+    Equivalente assíncrono de paginator.paginate_queryset() para
+    PageNumberPagination e KeysetPagination: as consultas usam o ORM
+    assíncrono e o paginador fica pronto para get_paginated_response().
+    """
+    if isinstance(paginator, KeysetPagination):
+        paginator.cursor_mode = paginator.keyset_field is not None and paginator.use_cursor(request)
+        if paginator.cursor_mode:
+            rows = [item async for item in paginator.get_cursor_queryset(queryset, request)]
+            return paginator.finish_cursor_page(rows)
+
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    # Paginator.count é um cached_property: o COUNT é feito antes, de forma assíncrona
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+    page.object_list = [item async for item in page.object_list]
+    paginator.page = page
+    paginator.request = request
+    return page.object_list
@@ -1,42 +1,47 @@
+from django.contrib.auth.models import User
 from rest_framework import permissions
+from .authentication import get_principal
 
 class IsAdminUser(permissions.BasePermission):
     
     def has_permission(self, request, view):
-
-        if request.user.is_superuser:
-            return True
-        return request.user and request.user.is_authenticated and hasattr(request.user, 'perfil') and request.user.perfil.tipo == 'admin'
+        principal = get_principal(request.user)
+        return principal.is_superuser or (principal.is_authenticated and principal.has_role('admin'))
 
 class IsNutricionistaUser(permissions.BasePermission):
   
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and hasattr(request.user, 'perfil') and request.user.perfil.tipo == 'nutricionista'
+        principal = get_principal(request.user)
+        return principal.is_authenticated and principal.has_role('nutricionista')
 
 class IsPersonalUser(permissions.BasePermission):
    
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and hasattr(request.user, 'perfil') and request.user.perfil.tipo == 'personal'
+        principal = get_principal(request.user)
+        return principal.is_authenticated and principal.has_role('personal')
 
 class IsClienteUser(permissions.BasePermission):
    
     def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated and hasattr(request.user, 'perfil') and request.user.perfil.tipo == 'cliente'
+        principal = get_principal(request.user)
+        return principal.is_authenticated and principal.has_role('cliente')
 
 class IsOwnerOrStaff(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
-        
-        if request.user.is_superuser or (hasattr(request.user, 'perfil') and request.user.perfil.tipo in ['admin', 'nutricionista', 'personal']):
+        principal = get_principal(request.user)
+        if principal.is_superuser or principal.has_role('admin', 'nutricionista', 'personal'):
             return True
             
-        
-        if hasattr(obj, 'cliente') and hasattr(obj.cliente, 'perfil'):
-            return obj.cliente.perfil.usuario == request.user
-        elif hasattr(obj, 'usuario'):
-            return obj.usuario == request.user
-        elif hasattr(obj, 'perfil') and hasattr(obj.perfil, 'usuario'):
-            return obj.perfil.usuario == request.user
+        # Compara ids já carregados, sem buscar as relações do objeto
+        if hasattr(obj, 'cliente_id'):
+            return principal.cliente_id is not None and obj.cliente_id == principal.cliente_id
+        elif hasattr(obj, 'usuario_id'):
+            return obj.usuario_id == principal.user_id
+        elif hasattr(obj, 'perfil_id'):
+            return principal.perfil_id is not None and obj.perfil_id == principal.perfil_id
+        elif isinstance(obj, User):
+            return obj.pk == principal.user_id
         return False
 
 class ReadOnly(permissions.BasePermission):
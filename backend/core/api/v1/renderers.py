@@ -0,0 +1,56 @@
+import math
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+# Onde a saída do orjson pode diferir da do json: números em notação
+# exponencial ou abaixo de 1e-4 (tokens logo após `:`, `,` ou `[`, pois a
+# saída é compacta) e os separadores U+2028/U+2029, que o JSONRenderer
+# escapa. Dentro de strings só casa o raro `,1e`; basta a suspeita para
+# voltar ao json.
+_DIVERGENCIA = re.compile(rb'[:,\[]-?\d+(?:\.\d+)?e|[:,\[]-?0\.0000|\xe2\x80[\xa8\xa9]')
+
+
+def _tem_nao_finito(data):
+    """Indica se há NaN ou infinito entre os floats de `data`, que o orjson escreveria como null."""
+    pilha = [data]
+    while pilha:
+        valor = pilha.pop()
+        if isinstance(valor, float):
+            if not math.isfinite(valor):
+                return True
+        elif isinstance(valor, dict):
+            pilha.extend(valor.values())
+        elif isinstance(valor, (list, tuple)):
+            pilha.extend(valor)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que usa o orjson quando instalado, com a mesma saída byte a
+    byte: datas e demais tipos fora do JSON passam pelo encoder do DRF, e
+    qualquer caso que o orjson não reproduza exatamente (indentação,
+    ensure_ascii, inteiros acima de 64 bits, floats acima) usa o json.
+    Floats não finitos também vão para o json, que os recusa como o
+    JSONRenderer (strict); só são procurados quando a saída tem null.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default,
+                               option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if _DIVERGENCIA.search(ret) or (b'null' in ret and _tem_nao_finito(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret
@@ -0,0 +1,69 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from core.models import RevogacaoToken
+
+
+class RevocationCache:
+    """
+    Conjunto em memória {usuario_id: instante da revogação}, recarregado do
+    banco a cada TOKEN_REVOCATION_REFRESH_SECONDS. Só guarda revogações mais
+    recentes que a validade do refresh token, pois tokens mais antigos já
+    expiraram de qualquer forma.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._expires_at = 0
+
+    def _horizon(self):
+        return timezone.now() - api_settings.REFRESH_TOKEN_LIFETIME
+
+    def is_stale(self):
+        return time.monotonic() >= self._expires_at
+
+    def _reload_if_stale(self):
+        if self.is_stale():
+            self.reload()
+
+    def reload(self):
+        with self._lock:
+            if not self.is_stale():
+                return
+            rows = (RevogacaoToken.objects.filter(created_at__gte=self._horizon())
+                    .values('usuario_id').annotate(revogado_em=Max('created_at'))
+                    .values_list('usuario_id', 'revogado_em'))
+            self._revoked = {usuario_id: revogado_em.timestamp() for usuario_id, revogado_em in rows}
+            self._expires_at = time.monotonic() + settings.TOKEN_REVOCATION_REFRESH_SECONDS
+
+    def is_revoked(self, user_id, issued_at):
+        self._reload_if_stale()
+        revoked_at = self._revoked.get(user_id)
+        # `iat` tem precisão de segundos: na dúvida, considera revogado
+        return revoked_at is not None and issued_at is not None and issued_at <= revoked_at
+
+    def revoke(self, user_id):
+        revogacao = RevogacaoToken.objects.create(usuario_id=user_id)
+        # Aplica imediatamente neste processo; os demais veem no próximo recarregamento
+        with self._lock:
+            self._revoked[user_id] = revogacao.created_at.timestamp()
+        return revogacao
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._expires_at = 0
+
+
+revocation_cache = RevocationCache()
+
+
+def revoke_user_tokens(user_id):
+    """Revoga os tokens sem estado já emitidos para o usuário."""
+    return revocation_cache.revoke(user_id)
@@ -1,9 +1,11 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from .async_views import AsyncReadView
 from .viewsets import (
     TreinoViewSet, DietaViewSet, TipoPlanoViewSet, ClienteViewSet, 
     HistoricoTreinoViewSet, HistoricoDietaViewSet, ExercicioViewSet, 
     RefeicaoViewSet, TrocaExercicioViewSet, TrocaRefeicaoViewSet,
-    UserViewSet, PerfilViewSet
+    UserViewSet, PerfilViewSet, DashboardViewSet, BuscaViewSet
 )
 
 router = DefaultRouter()
@@ -21,3 +23,23 @@ router.register(r'trocas-exercicios', TrocaExercicioViewSet)
 router.register(r'trocas-refeicoes', TrocaRefeicaoViewSet)
 router.register(r'usuarios', UserViewSet)
 router.register(r'perfis', PerfilViewSet)
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'busca', BuscaViewSet, basename='busca')
+
+
+# Leituras assíncronas (ASGI) dos caminhos mais acessados, montadas em api/v1/async/
+ASYNC_READ_VIEWSETS = {
+    'treinos': TreinoViewSet,
+    'dietas': DietaViewSet,
+    'historico-treinos': HistoricoTreinoViewSet,
+    'historico-dietas': HistoricoDietaViewSet,
+    'trocas-exercicios': TrocaExercicioViewSet,
+    'trocas-refeicoes': TrocaRefeicaoViewSet,
+}
+
+async_urlpatterns = []
+for prefix, viewset in ASYNC_READ_VIEWSETS.items():
+    async_urlpatterns += [
+        path(f'{prefix}/', AsyncReadView.as_view(viewset, 'list'), name=f'async-{prefix}-list'),
+        path(f'{prefix}/<int:pk>/', AsyncReadView.as_view(viewset, 'retrieve'), name=f'async-{prefix}-detail'),
+    ]
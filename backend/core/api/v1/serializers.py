@@ -1,7 +1,16 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 from core.models import (Treino, Dieta, TipoPlano, Cliente, HistoricoTreino, 
                         HistoricoDieta, Exercicio, Refeicao, TrocaExercicio, TrocaRefeicao, Perfil)
+from .authentication import get_principal
+from .revocation import revocation_cache
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
@@ -16,6 +25,8 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'password': {'write_only': True}
         }
+        # Relações lidas pelos campos de método, por campo (usado pelo QueryOptimizerMixin)
+        extra_sources = {'perfil': ['perfil']}
     
     def validate(self, attrs):
         # Require password for creation
@@ -76,19 +87,141 @@ class PerfilSerializer(serializers.ModelSerializer):
         model = Perfil
         fields = ['id', 'usuario', 'usuario_details', 'tipo', 'tipo_display', 'telefone', 'data_nascimento']
 
-class TreinoSerializer(serializers.ModelSerializer):
+class ExercicioAninhadoSerializer(serializers.ModelSerializer):
+    # Editável: identifica o exercício existente no update; omitido, cria um novo
+    id = serializers.IntegerField(required=False)
+    
+    class Meta:
+        model = Exercicio
+        fields = ['id', 'nome', 'descricao']
+
+class RefeicaoAninhadaSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    
+    class Meta:
+        model = Refeicao
+        fields = ['id', 'nome', 'descricao', 'calorias']
+
+class FilhosAninhadosMixin:
+    """
+    Grava o pai e a lista aninhada de filhos (`filhos_field`) em uma transação.
+    Na criação os filhos são inseridos com bulk_create; na atualização, se a
+    lista for enviada, apenas a diferença é escrita: itens com `id` alterados
+    vão em um bulk_update, itens sem `id` são inseridos e os ausentes são
+    excluídos (soft delete).
+    """
+    filhos_field = None
+    fk_filho = None
+    
+    def _filho_model(self):
+        return self.fields[self.filhos_field].child.Meta.model
+    
+    def _inserir_filhos(self, instance, filhos):
+        model = self._filho_model()
+        model.objects.bulk_create([
+            model(**{self.fk_filho: instance}, **{campo: valor for campo, valor in dados.items() if campo != 'id'})
+            for dados in filhos
+        ])
+    
+    def _sincronizar_filhos(self, instance, filhos):
+        model = self._filho_model()
+        existentes = {filho.pk: filho for filho in model.objects.filter(**{self.fk_filho: instance})}
+        novos, alterados, campos = [], [], set()
+        for dados in filhos:
+            pk = dados.get('id')
+            if pk is None:
+                novos.append(dados)
+                continue
+            filho = existentes.pop(pk, None)
+            if filho is None:
+                raise serializers.ValidationError({self.filhos_field: [f"Item {pk} não pertence a este registro."]})
+            mudou = [campo for campo, valor in dados.items() if campo != 'id' and getattr(filho, campo) != valor]
+            if mudou:
+                for campo in mudou:
+                    setattr(filho, campo, dados[campo])
+                campos.update(mudou)
+                alterados.append(filho)
+        
+        if existentes:
+            model.objects.filter(pk__in=existentes).soft_delete()
+        if alterados:
+            # bulk_update não aplica auto_now
+            agora = timezone.now()
+            for filho in alterados:
+                filho.updated_at = agora
+            model.objects.bulk_update(alterados, sorted(campos | {'updated_at'}))
+        if novos:
+            self._inserir_filhos(instance, novos)
+    
+    def create(self, validated_data):
+        filhos = validated_data.pop(self.filhos_field, None)
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            if filhos:
+                self._inserir_filhos(instance, filhos)
+        return instance
+    
+    def update(self, instance, validated_data):
+        filhos = validated_data.pop(self.filhos_field, None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if filhos is not None:
+                self._sincronizar_filhos(instance, filhos)
+        return instance
+
+class TreinoSerializer(FilhosAninhadosMixin, serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
+    exercicios = ExercicioAninhadoSerializer(many=True, required=False)
+    
+    filhos_field = 'exercicios'
+    fk_filho = 'treino'
     
     class Meta:
         model = Treino
-        fields = ['id', 'nome', 'descricao', 'duracao', 'cliente', 'cliente_nome', 'created_at', 'updated_at']
+        fields = ['id', 'nome', 'descricao', 'duracao', 'cliente', 'cliente_nome', 'exercicios', 'created_at', 'updated_at']
 
-class DietaSerializer(serializers.ModelSerializer):
+class DietaSerializer(FilhosAninhadosMixin, serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
+    refeicoes = RefeicaoAninhadaSerializer(many=True, required=False)
+    
+    filhos_field = 'refeicoes'
+    fk_filho = 'dieta'
     
     class Meta:
         model = Dieta
-        fields = ['id', 'nome', 'descricao', 'calorias', 'cliente', 'cliente_nome', 'created_at', 'updated_at']
+        fields = ['id', 'nome', 'descricao', 'calorias', 'cliente', 'cliente_nome', 'refeicoes', 'created_at', 'updated_at']
+
+class AtribuicaoEmLoteSerializer(serializers.Serializer):
+    clientes = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000,
+                                     help_text="IDs dos clientes que receberão a cópia")
+    
+    def validate_clientes(self, value):
+        # Remove duplicados mantendo a ordem e valida todos os ids em uma consulta
+        ids = list(dict.fromkeys(value))
+        existentes = set(Cliente.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        faltando = [pk for pk in ids if pk not in existentes]
+        if faltando:
+            raise serializers.ValidationError(f"Clientes não encontrados: {faltando}")
+        return ids
+
+class RespostaTrocasEmLoteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000,
+                                help_text="IDs das solicitações de troca")
+    acao = serializers.ChoiceField(choices=['aprovar', 'rejeitar'])
+    observacoes_resposta = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        if attrs['acao'] == 'rejeitar' and not attrs.get('observacoes_resposta'):
+            raise serializers.ValidationError({
+                'observacoes_resposta': "Observações são obrigatórias para rejeitar uma solicitação"
+            })
+        attrs['ids'] = list(dict.fromkeys(attrs['ids']))
+        return attrs
+
+class ImportacaoUsuariosSerializer(serializers.Serializer):
+    arquivo = serializers.FileField(help_text="CSV ou JSONL com username, email, password, first_name, last_name e tipo")
+    formato = serializers.ChoiceField(choices=['csv', 'jsonl'], required=False,
+                                      help_text="Padrão: deduzido pela extensão do arquivo")
 
 class TipoPlanoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -105,6 +238,26 @@ class ClienteSerializer(serializers.ModelSerializer):
                  'tipo_plano', 'tipo_plano_nome', 'data_inicio_plano', 'data_fim_plano',
                  'data_ultimo_treino', 'data_ultima_dieta',
                  'trocas_exercicios_restantes', 'trocas_refeicoes_restantes', 'perfil']
+        # A unicidade vale no banco também para clientes excluídos, que o
+        # manager padrão (usado pelo validador automático) não enxerga
+        extra_kwargs = {
+            'email': {'validators': [UniqueValidator(queryset=Cliente.all_objects.all())]},
+        }
+
+class ClienteLookupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Cliente
+        fields = ['id', 'nome', 'email']
+
+class ExercicioBuscaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Exercicio
+        fields = ['id', 'nome', 'treino']
+
+class RefeicaoBuscaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Refeicao
+        fields = ['id', 'nome', 'dieta']
 
 class HistoricoTreinoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -119,12 +272,14 @@ class HistoricoDietaSerializer(serializers.ModelSerializer):
 class ExercicioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Exercicio
-        fields = '__all__'
+        # O vetor da busca textual é interno
+        exclude = ['busca']
 
 class RefeicaoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Refeicao
-        fields = '__all__'
+        # O vetor da busca textual é interno
+        exclude = ['busca']
 
 class TrocaExercicioSerializer(serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
@@ -136,6 +291,8 @@ class TrocaExercicioSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrocaExercicio
         fields = '__all__'
+        # O cliente é sempre o autor da solicitação
+        read_only_fields = ['cliente']
 
 class TrocaRefeicaoSerializer(serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
@@ -147,3 +304,28 @@ class TrocaRefeicaoSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrocaRefeicao
         fields = '__all__'
+        # O cliente é sempre o autor da solicitação
+        read_only_fields = ['cliente']
+
+
+class PrincipalTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Com STATELESS_JWT, grava papel e entidade vinculada como claims do token."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        if settings.STATELESS_JWT:
+            for claim, value in get_principal(user).to_claims().items():
+                token[claim] = value
+        return token
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """Recusa refresh tokens emitidos antes de uma revogação do usuário."""
+
+    def validate(self, attrs):
+        if settings.STATELESS_JWT:
+            refresh = self.token_class(attrs['refresh'])
+            if revocation_cache.is_revoked(refresh.get(jwt_settings.USER_ID_CLAIM), refresh.get('iat')):
+                raise AuthenticationFailed('Token revogado', code='token_revoked')
+        return super().validate(attrs)
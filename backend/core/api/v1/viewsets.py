@@ -1,35 +1,99 @@
+import io
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated, IsAdminUser as DRFIsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from django.utils import timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Window
+from django.http import Http404, StreamingHttpResponse
 from django.contrib.auth.models import User
 from core.models import (Treino, Dieta, TipoPlano, Cliente, HistoricoTreino, 
                        HistoricoDieta, Exercicio, Refeicao, TrocaExercicio, TrocaRefeicao, Perfil)
+from core.importacao import importar_usuarios, formato_do_arquivo
+from core.busca import buscar_aproximado
+from core.planos import catalogo_planos
+from core.services import (registrar_treino_atribuido, registrar_dieta_atribuida,
+                           atribuir_treino_em_lote, atribuir_dieta_em_lote, responder_trocas,
+                           TROCA_PROCESSADA, TROCA_NAO_ENCONTRADA, TrocaNaoPermitida,
+                           reservar_troca_exercicio, reservar_troca_refeicao)
 from .serializers import (TreinoSerializer, DietaSerializer, TipoPlanoSerializer,
                         ClienteSerializer, HistoricoTreinoSerializer, HistoricoDietaSerializer,
                         ExercicioSerializer, RefeicaoSerializer, TrocaExercicioSerializer,
-                        TrocaRefeicaoSerializer, UserSerializer, PerfilSerializer)
+                        TrocaRefeicaoSerializer, UserSerializer, PerfilSerializer,
+                        AtribuicaoEmLoteSerializer, RespostaTrocasEmLoteSerializer,
+                        ImportacaoUsuariosSerializer, ClienteLookupSerializer,
+                        ExercicioBuscaSerializer, RefeicaoBuscaSerializer)
 from .permissions import (IsAdminUser, IsNutricionistaUser, IsPersonalUser, 
                         IsClienteUser, IsOwnerOrStaff, ReadOnly)
+from .authentication import get_principal
+from .exportacao import CONTENT_TYPES, linhas_csv, linhas_ndjson, lotes
+from .fast_serializers import get_values_serializer
+from .filters import BuscaFilter, Filtro
+from .mixins import (ClienteResponseCacheMixin, ConditionalGetMixin, FastListMixin, QueryOptimizerMixin,
+                     SparseFieldsetsMixin, optimize_queryset)
+from .pagination import HistoricoPagination, TrocaPagination
+from .renderers import FastJSONRenderer
+from .revocation import revoke_user_tokens
 
-class SoftDeleteModelViewSet(viewsets.ModelViewSet):
+PARAMETRO_BUSCA = openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                                    description="Termo de busca; os resultados vêm ordenados por relevância")
+
+# Filtros das listagens (ver IndexedFilter); cada um tem índice próprio
+FILTROS_TREINO = [Filtro('cliente'), Filtro('created_at', lookups=('gte', 'lt'))]
+FILTROS_DIETA = FILTROS_TREINO
+FILTROS_CLIENTE = [Filtro('tipo_plano')]
+FILTROS_HISTORICO_TREINO = [Filtro('cliente'), Filtro('treino'), Filtro('data_inicio', lookups=('gte', 'lte'))]
+FILTROS_HISTORICO_DIETA = [Filtro('cliente'), Filtro('dieta'), Filtro('data_inicio', lookups=('gte', 'lte'))]
+FILTROS_EXERCICIO = [Filtro('treino')]
+FILTROS_REFEICAO = [Filtro('dieta')]
+FILTROS_TROCA = [Filtro('status'), Filtro('cliente'), Filtro('data_solicitacao', lookups=('gte', 'lt'))]
+FILTROS_USUARIO = [Filtro('tipo', 'perfil__tipo')]
+FILTROS_PERFIL = [Filtro('tipo')]
+
+
+def parametros_de_listagem(filtros, ordering_fields=(), busca=False):
+    """Parâmetros da documentação para os filtros, a ordenação e a busca de uma listagem."""
+    parametros = [
+        openapi.Parameter(parametro, openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description=f"Filtra por {filtro.campo} ({lookup})")
+        for filtro in filtros for parametro, lookup in filtro.parametros()
+    ]
+    if ordering_fields:
+        parametros.append(openapi.Parameter(
+            'ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            description=f"Ordena por um campo (prefixo - para decrescente): {', '.join(ordering_fields)}"))
+    if busca:
+        parametros.append(PARAMETRO_BUSCA)
+    return parametros
+
+
+class SoftDeleteModelViewSet(ConditionalGetMixin, SparseFieldsetsMixin, FastListMixin, QueryOptimizerMixin,
+                             viewsets.ModelViewSet):
     @swagger_auto_schema(tags=['Default'])
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.deleted_at = timezone.now()
-        instance.save()
+        self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    def perform_destroy(self, instance):
+        instance.soft_delete()
 
-class TreinoViewSet(SoftDeleteModelViewSet):
-    queryset = Treino.objects.filter(deleted_at__isnull=True)
+class TreinoViewSet(ClienteResponseCacheMixin, SoftDeleteModelViewSet):
+    queryset = Treino.objects.all()
     serializer_class = TreinoSerializer
+    filtros = FILTROS_TREINO
+    ordering_fields = ['created_at']
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             permission_classes = [IsAuthenticated]
-        elif self.action in ['create', 'update', 'partial_update']:
+        elif self.action in ['create', 'update', 'partial_update', 'atribuir']:
             permission_classes = [IsAuthenticated, (IsAdminUser | IsPersonalUser)]
         elif self.action == 'destroy':
             permission_classes = [IsAuthenticated, IsAdminUser]
@@ -38,25 +102,18 @@ class TreinoViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente':
-                # Clientes só podem ver seus próprios treinos
-                try:
-                    if hasattr(user.perfil, 'cliente') and user.perfil.cliente:
-                        return Treino.objects.filter(deleted_at__isnull=True, cliente=user.perfil.cliente)
-                    else:
-                        # Se o cliente não tem objeto Cliente associado, não mostra nenhum treino
-                        return Treino.objects.none()
-                except:
-                    return Treino.objects.none()
-            elif user.perfil.tipo in ['admin', 'personal']:
-                return Treino.objects.filter(deleted_at__isnull=True)
-        if user.is_superuser:
-            return Treino.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente'):
+            # Clientes só podem ver seus próprios treinos
+            if principal.cliente_id:
+                return Treino.objects.filter(cliente_id=principal.cliente_id)
+            # Se o cliente não tem objeto Cliente associado, não mostra nenhum treino
+            return Treino.objects.none()
+        if principal.has_role('admin', 'personal') or principal.is_superuser:
+            return Treino.objects.all()
         return Treino.objects.none()
     
-    @swagger_auto_schema(tags=['Treinos'])
+    @swagger_auto_schema(tags=['Treinos'], manual_parameters=parametros_de_listagem(FILTROS_TREINO, ['created_at']))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -66,29 +123,13 @@ class TreinoViewSet(SoftDeleteModelViewSet):
     
     @swagger_auto_schema(tags=['Treinos'])
     def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        
-        # Se a criação do treino foi bem-sucedida, criar um registro no histórico
-        if response.status_code == 201:
-            treino_id = response.data.get('id')
-            cliente_id = response.data.get('cliente')
-            
-            if treino_id and cliente_id:
-                treino = Treino.objects.get(id=treino_id)
-                cliente = Cliente.objects.get(id=cliente_id)
-                
-                # Criar registro no histórico
-                HistoricoTreino.objects.create(
-                    cliente=cliente,
-                    treino=treino,
-                    data_inicio=timezone.now().date()
-                )
-                
-                # Atualizar a data do último treino do cliente
-                cliente.data_ultimo_treino = timezone.now().date()
-                cliente.save(update_fields=['data_ultimo_treino'])
-        
-        return response
+        return super().create(request, *args, **kwargs)
+    
+    def perform_create(self, serializer):
+        # Treino, histórico e data do último treino são gravados juntos
+        with transaction.atomic():
+            treino = serializer.save()
+            registrar_treino_atribuido(treino)
     
     @swagger_auto_schema(tags=['Treinos'])
     def update(self, request, *args, **kwargs):
@@ -101,16 +142,33 @@ class TreinoViewSet(SoftDeleteModelViewSet):
     @swagger_auto_schema(tags=['Treinos'])
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
+    
+    @action(detail=True, methods=['post'])
+    @swagger_auto_schema(tags=['Treinos'], request_body=AtribuicaoEmLoteSerializer)
+    def atribuir(self, request, pk=None):
+        """Copia este treino, com seus exercícios, para vários clientes."""
+        treino = self.get_object()
+        serializer = AtribuicaoEmLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        treinos, exercicios_copiados = atribuir_treino_em_lote(treino, serializer.validated_data['clientes'])
+        
+        return Response({
+            'treinos': [{'id': novo.id, 'cliente': novo.cliente_id} for novo in treinos],
+            'exercicios_copiados': exercicios_copiados,
+        }, status=status.HTTP_201_CREATED)
 
 
-class DietaViewSet(SoftDeleteModelViewSet):
-    queryset = Dieta.objects.filter(deleted_at__isnull=True)
+class DietaViewSet(ClienteResponseCacheMixin, SoftDeleteModelViewSet):
+    queryset = Dieta.objects.all()
     serializer_class = DietaSerializer
+    filtros = FILTROS_DIETA
+    ordering_fields = ['created_at']
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
             permission_classes = [IsAuthenticated]
-        elif self.action in ['create', 'update', 'partial_update']:
+        elif self.action in ['create', 'update', 'partial_update', 'atribuir']:
             permission_classes = [IsAuthenticated, (IsAdminUser | IsNutricionistaUser)]
         elif self.action == 'destroy':
             permission_classes = [IsAuthenticated, IsAdminUser]
@@ -119,25 +177,18 @@ class DietaViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente':
-                # Clientes só podem ver suas próprias dietas
-                try:
-                    if hasattr(user.perfil, 'cliente') and user.perfil.cliente:
-                        return Dieta.objects.filter(deleted_at__isnull=True, cliente=user.perfil.cliente)
-                    else:
-                        # Se o cliente não tem objeto Cliente associado, não mostra nenhuma dieta
-                        return Dieta.objects.none()
-                except:
-                    return Dieta.objects.none()
-            elif user.perfil.tipo in ['admin', 'nutricionista']:
-                return Dieta.objects.filter(deleted_at__isnull=True)
-        if user.is_superuser:
-            return Dieta.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente'):
+            # Clientes só podem ver suas próprias dietas
+            if principal.cliente_id:
+                return Dieta.objects.filter(cliente_id=principal.cliente_id)
+            # Se o cliente não tem objeto Cliente associado, não mostra nenhuma dieta
+            return Dieta.objects.none()
+        if principal.has_role('admin', 'nutricionista') or principal.is_superuser:
+            return Dieta.objects.all()
         return Dieta.objects.none()
     
-    @swagger_auto_schema(tags=['Dietas'])
+    @swagger_auto_schema(tags=['Dietas'], manual_parameters=parametros_de_listagem(FILTROS_DIETA, ['created_at']))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -147,27 +198,13 @@ class DietaViewSet(SoftDeleteModelViewSet):
     
     @swagger_auto_schema(tags=['Dietas'])
     def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        
-        if response.status_code == 201:
-            dieta_id = response.data.get('id')
-            cliente_id = response.data.get('cliente')
-            
-            if dieta_id and cliente_id:
-                dieta = Dieta.objects.get(id=dieta_id)
-                cliente = Cliente.objects.get(id=cliente_id)
-                
-                HistoricoDieta.objects.create(
-                    cliente=cliente,
-                    dieta=dieta,
-                    data_inicio=timezone.now().date()
-                )
-                
-                
-                cliente.data_ultima_dieta = timezone.now().date()
-                cliente.save(update_fields=['data_ultima_dieta'])
-        
-        return response
+        return super().create(request, *args, **kwargs)
+    
+    def perform_create(self, serializer):
+        # Dieta, histórico e data da última dieta são gravados juntos
+        with transaction.atomic():
+            dieta = serializer.save()
+            registrar_dieta_atribuida(dieta)
     
     @swagger_auto_schema(tags=['Dietas'])
     def update(self, request, *args, **kwargs):
@@ -180,10 +217,25 @@ class DietaViewSet(SoftDeleteModelViewSet):
     @swagger_auto_schema(tags=['Dietas'])
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
+    
+    @action(detail=True, methods=['post'])
+    @swagger_auto_schema(tags=['Dietas'], request_body=AtribuicaoEmLoteSerializer)
+    def atribuir(self, request, pk=None):
+        """Copia esta dieta, com suas refeições, para vários clientes."""
+        dieta = self.get_object()
+        serializer = AtribuicaoEmLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        dietas, refeicoes_copiadas = atribuir_dieta_em_lote(dieta, serializer.validated_data['clientes'])
+        
+        return Response({
+            'dietas': [{'id': nova.id, 'cliente': nova.cliente_id} for nova in dietas],
+            'refeicoes_copiadas': refeicoes_copiadas,
+        }, status=status.HTTP_201_CREATED)
 
 
 class TipoPlanoViewSet(SoftDeleteModelViewSet):
-    queryset = TipoPlano.objects.filter(deleted_at__isnull=True)
+    queryset = TipoPlano.objects.all()
     serializer_class = TipoPlanoSerializer
     
     def get_permissions(self):
@@ -193,13 +245,40 @@ class TipoPlanoViewSet(SoftDeleteModelViewSet):
             permission_classes = [IsAuthenticated, IsAdminUser]
         return [permission() for permission in permission_classes]
     
+    # list e retrieve são servidos do catálogo de planos em memória, sem consultas
     @swagger_auto_schema(tags=['Planos'])
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        planos = catalogo_planos.all()
+        validators = self.build_validators(max((plano.updated_at for plano in planos), default=None), len(planos))
+        not_modified = self.conditional_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+        
+        page = self.paginate_queryset(planos)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(planos, many=True).data)
+        self.set_validators(response, validators)
+        return response
     
     @swagger_auto_schema(tags=['Planos'])
     def retrieve(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        try:
+            plano = catalogo_planos.get(int(kwargs['pk']))
+        except ValueError:
+            plano = None
+        if plano is None:
+            raise Http404
+        self.check_object_permissions(request, plano)
+        
+        validators = self.build_validators(plano.updated_at, 1)
+        not_modified = self.conditional_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(plano).data)
+        self.set_validators(response, validators)
+        return response
     
     @swagger_auto_schema(tags=['Planos'])
     def create(self, request, *args, **kwargs):
@@ -219,11 +298,16 @@ class TipoPlanoViewSet(SoftDeleteModelViewSet):
 
 
 class ClienteViewSet(SoftDeleteModelViewSet):
-    queryset = Cliente.objects.filter(deleted_at__isnull=True)
+    queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    filtros = FILTROS_CLIENTE
+    ordering_fields = ['nome']
+    search_trigram_fields = ['nome', 'email']
+    lookup_limit = 20
+    lookup_max_limit = 100
     
     def get_permissions(self):
-        if self.action in ['list']:
+        if self.action in ['list', 'lookup']:
             # Permite que usuários staff ou com perfil adequado listem clientes
             permission_classes = [IsAuthenticated]
         elif self.action in ['retrieve', 'update', 'partial_update']:
@@ -235,22 +319,21 @@ class ClienteViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
+        principal = get_principal(self.request.user)
         
         # Se é superuser ou staff, pode ver todos os clientes
-        if user.is_superuser or user.is_staff:
-            return Cliente.objects.filter(deleted_at__isnull=True)
+        if principal.is_superuser or principal.is_staff:
+            return Cliente.objects.all()
             
         # Se tem perfil, aplica as regras baseadas no tipo
-        if hasattr(user, 'perfil') and user.perfil:
-            if user.perfil.tipo == 'cliente' and hasattr(user.perfil, 'cliente'):
-                return Cliente.objects.filter(deleted_at__isnull=True, perfil__usuario=user)
-            elif user.perfil.tipo in ['admin', 'nutricionista', 'personal']:
-                return Cliente.objects.filter(deleted_at__isnull=True)
+        if principal.has_role('cliente') and principal.cliente_id:
+            return Cliente.objects.filter(pk=principal.cliente_id)
+        elif principal.has_role('admin', 'nutricionista', 'personal'):
+            return Cliente.objects.all()
                 
         return Cliente.objects.none()
     
-    @swagger_auto_schema(tags=['Clientes'])
+    @swagger_auto_schema(tags=['Clientes'], manual_parameters=parametros_de_listagem(FILTROS_CLIENTE, ['nome'], busca=True))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -273,11 +356,93 @@ class ClienteViewSet(SoftDeleteModelViewSet):
     @swagger_auto_schema(tags=['Clientes'])
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
+    
+    @swagger_auto_schema(
+        tags=['Clientes'],
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Nome ou email buscado (por semelhança com pg_trgm, senão por prefixo)"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Quantidade máxima de resultados (padrão 20, máximo 100)"),
+        ],
+        responses={200: ClienteLookupSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """
+        Autocomplete de clientes: id, nome e email dos primeiros clientes cujo
+        nome ou email se parece com `q` (trigramas, os mais parecidos
+        primeiro) ou, sem pg_trgm, começa com `q` (por nome). Uma única
+        consulta, atendida pelos índices de trigramas ou de prefixo.
+        """
+        try:
+            limite = int(request.query_params.get('limit', self.lookup_limit))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= self.lookup_max_limit:
+            raise ValidationError({'limit': [f"Informe um inteiro entre 1 e {self.lookup_max_limit}."]})
+        
+        queryset = self.get_queryset().order_by('nome', 'id')
+        termo = request.query_params.get('q', '').strip()
+        if termo:
+            queryset = buscar_aproximado(queryset, self.search_trigram_fields, termo)
+        
+        values_serializer = get_values_serializer(ClienteLookupSerializer, Cliente)
+        rows = queryset.values(*values_serializer.columns)[:limite]
+        return Response(values_serializer.to_representation(rows))
+
+
+class ExportacaoMixin:
+    """
+    Ação `exportar`: a listagem inteira (escopo, filtros e ?fields= da
+    listagem, sem paginação) em NDJSON ou CSV, enviada em streaming a
+    partir de um cursor do lado do servidor (ver core/api/v1/exportacao.py).
+    """
+    
+    def linhas_exportacao(self, queryset):
+        """Retorna (colunas, lotes de itens já representados)."""
+        chunk_size = settings.EXPORTACAO_CHUNK_SIZE
+        values_serializer = self.get_values_serializer(queryset.model)
+        if values_serializer is not None:
+            rows = queryset.values(*values_serializer.columns).iterator(chunk_size=chunk_size)
+            colunas = [name for name, *_ in values_serializer.plan]
+            return colunas, (values_serializer.to_representation(lote) for lote in lotes(rows, chunk_size))
+        
+        serializer = self.get_serializer()
+        colunas = [name for name, field in serializer.fields.items() if not field.write_only]
+        instancias = queryset.iterator(chunk_size=chunk_size)
+        return colunas, (self.get_serializer(lote, many=True).data for lote in lotes(instancias, chunk_size))
+    
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('formato', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(CONTENT_TYPES),
+                              description="Formato do arquivo (padrão ndjson)"),
+        ],
+        responses={200: 'Arquivo NDJSON ou CSV'},
+    )
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        formato = request.query_params.get('formato', 'ndjson')
+        if formato not in CONTENT_TYPES:
+            raise ValidationError({'formato': [f"Use um de: {', '.join(CONTENT_TYPES)}."]})
+        
+        colunas, itens = self.linhas_exportacao(self.filter_queryset(self.get_queryset()))
+        if formato == 'csv':
+            conteudo = linhas_csv(colunas, itens)
+        else:
+            conteudo = linhas_ndjson(itens, FastJSONRenderer())
+        
+        response = StreamingHttpResponse(conteudo, content_type=CONTENT_TYPES[formato])
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{formato}"'
+        return response
 
 
-class HistoricoTreinoViewSet(SoftDeleteModelViewSet):
-    queryset = HistoricoTreino.objects.filter(deleted_at__isnull=True)
+class HistoricoTreinoViewSet(ExportacaoMixin, SoftDeleteModelViewSet):
+    queryset = HistoricoTreino.objects.all()
     serializer_class = HistoricoTreinoSerializer
+    fast_list = True
+    pagination_class = HistoricoPagination
+    filtros = FILTROS_HISTORICO_TREINO
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -291,21 +456,12 @@ class HistoricoTreinoViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente':
-                try:
-                    if hasattr(user.perfil, 'cliente') and user.perfil.cliente:
-                        return HistoricoTreino.objects.filter(deleted_at__isnull=True, cliente=user.perfil.cliente)
-                    else:
-                        return HistoricoTreino.objects.filter(deleted_at__isnull=True)
-                except:
-                    return HistoricoTreino.objects.filter(deleted_at__isnull=True)
-            elif user.perfil.tipo in ['admin', 'personal']:
-                return HistoricoTreino.objects.filter(deleted_at__isnull=True)
-        return HistoricoTreino.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente') and principal.cliente_id:
+            return HistoricoTreino.objects.filter(cliente_id=principal.cliente_id)
+        return HistoricoTreino.objects.all()
     
-    @swagger_auto_schema(tags=['Histórico'])
+    @swagger_auto_schema(tags=['Histórico'], manual_parameters=parametros_de_listagem(FILTROS_HISTORICO_TREINO))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -330,9 +486,12 @@ class HistoricoTreinoViewSet(SoftDeleteModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class HistoricoDietaViewSet(SoftDeleteModelViewSet):
-    queryset = HistoricoDieta.objects.filter(deleted_at__isnull=True)
+class HistoricoDietaViewSet(ExportacaoMixin, SoftDeleteModelViewSet):
+    queryset = HistoricoDieta.objects.all()
     serializer_class = HistoricoDietaSerializer
+    fast_list = True
+    pagination_class = HistoricoPagination
+    filtros = FILTROS_HISTORICO_DIETA
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -346,21 +505,12 @@ class HistoricoDietaViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente':
-                try:
-                    if hasattr(user.perfil, 'cliente') and user.perfil.cliente:
-                        return HistoricoDieta.objects.filter(deleted_at__isnull=True, cliente=user.perfil.cliente)
-                    else:
-                        return HistoricoDieta.objects.filter(deleted_at__isnull=True)
-                except:
-                    return HistoricoDieta.objects.filter(deleted_at__isnull=True)
-            elif user.perfil.tipo in ['admin', 'nutricionista']:
-                return HistoricoDieta.objects.filter(deleted_at__isnull=True)
-        return HistoricoDieta.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente') and principal.cliente_id:
+            return HistoricoDieta.objects.filter(cliente_id=principal.cliente_id)
+        return HistoricoDieta.objects.all()
     
-    @swagger_auto_schema(tags=['Histórico'])
+    @swagger_auto_schema(tags=['Histórico'], manual_parameters=parametros_de_listagem(FILTROS_HISTORICO_DIETA))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -385,9 +535,12 @@ class HistoricoDietaViewSet(SoftDeleteModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class ExercicioViewSet(SoftDeleteModelViewSet):
-    queryset = Exercicio.objects.filter(deleted_at__isnull=True)
+class ExercicioViewSet(ClienteResponseCacheMixin, SoftDeleteModelViewSet):
+    queryset = Exercicio.objects.all()
     serializer_class = ExercicioSerializer
+    fast_list = True
+    filtros = FILTROS_EXERCICIO
+    search_vector = 'busca'
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -401,19 +554,16 @@ class ExercicioViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente' and hasattr(user.perfil, 'cliente'):
-                # Cliente vê apenas exercícios de seus treinos
-                return Exercicio.objects.filter(deleted_at__isnull=True, treino__cliente__perfil__usuario=user)
-            elif user.perfil.tipo in ['admin', 'personal']:
-                # Admin e personal veem todos os exercícios
-                return Exercicio.objects.filter(deleted_at__isnull=True)
-        if user.is_superuser:
-            return Exercicio.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente') and principal.cliente_id:
+            # Cliente vê apenas exercícios de seus treinos
+            return Exercicio.objects.filter(treino__cliente_id=principal.cliente_id)
+        if principal.has_role('admin', 'personal') or principal.is_superuser:
+            # Admin e personal veem todos os exercícios
+            return Exercicio.objects.all()
         return Exercicio.objects.none()
     
-    @swagger_auto_schema(tags=['Treinos'])
+    @swagger_auto_schema(tags=['Treinos'], manual_parameters=parametros_de_listagem(FILTROS_EXERCICIO, busca=True))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -438,9 +588,12 @@ class ExercicioViewSet(SoftDeleteModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class RefeicaoViewSet(SoftDeleteModelViewSet):
-    queryset = Refeicao.objects.filter(deleted_at__isnull=True)
+class RefeicaoViewSet(ClienteResponseCacheMixin, SoftDeleteModelViewSet):
+    queryset = Refeicao.objects.all()
     serializer_class = RefeicaoSerializer
+    fast_list = True
+    filtros = FILTROS_REFEICAO
+    search_vector = 'busca'
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -454,19 +607,16 @@ class RefeicaoViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente' and hasattr(user.perfil, 'cliente'):
-                # Cliente vê apenas refeições de suas dietas
-                return Refeicao.objects.filter(deleted_at__isnull=True, dieta__cliente__perfil__usuario=user)
-            elif user.perfil.tipo in ['admin', 'nutricionista']:
-                # Admin e nutricionista veem todas as refeições
-                return Refeicao.objects.filter(deleted_at__isnull=True)
-        if user.is_superuser:
-            return Refeicao.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente') and principal.cliente_id:
+            # Cliente vê apenas refeições de suas dietas
+            return Refeicao.objects.filter(dieta__cliente_id=principal.cliente_id)
+        if principal.has_role('admin', 'nutricionista') or principal.is_superuser:
+            # Admin e nutricionista veem todas as refeições
+            return Refeicao.objects.all()
         return Refeicao.objects.none()
     
-    @swagger_auto_schema(tags=['Dietas'])
+    @swagger_auto_schema(tags=['Dietas'], manual_parameters=parametros_de_listagem(FILTROS_REFEICAO, busca=True))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -491,9 +641,55 @@ class RefeicaoViewSet(SoftDeleteModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class TrocaExercicioViewSet(SoftDeleteModelViewSet):
-    queryset = TrocaExercicio.objects.filter(deleted_at__isnull=True)
+class RespostaTrocaMixin:
+    """
+    Aprovação/rejeição de trocas por compare-and-set (ver responder_trocas),
+    tanto para uma solicitação quanto em lote.
+    """
+    status_por_acao = {'aprovar': 'APROVADO', 'rejeitar': 'REJEITADO'}
+    
+    def responder(self, request, acao):
+        observacoes = request.data.get('observacoes_resposta')
+        # Observações são obrigatórias para rejeição
+        if acao == 'rejeitar' and not observacoes:
+            return Response({'error': 'Observações são obrigatórias para rejeitar uma solicitação'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            pk = int(self.kwargs[self.lookup_field])
+        except (TypeError, ValueError):
+            raise Http404
+        
+        resultado = responder_trocas(self.get_queryset(), [pk], self.status_por_acao[acao],
+                                     request.user.pk, observacoes)[pk]
+        if resultado == TROCA_NAO_ENCONTRADA:
+            raise Http404
+        if resultado != TROCA_PROCESSADA:
+            return Response({'error': 'Solicitação já foi processada'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if acao == 'aprovar':
+            return Response({'message': 'Solicitação aprovada com sucesso'}, status=status.HTTP_200_OK)
+        return Response({'message': 'Solicitação rejeitada'}, status=status.HTTP_200_OK)
+    
+    def responder_lote(self, request):
+        serializer = RespostaTrocasEmLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+        
+        resultados = responder_trocas(self.get_queryset(), dados['ids'], self.status_por_acao[dados['acao']],
+                                      request.user.pk, dados.get('observacoes_resposta'))
+        
+        return Response({
+            'processadas': sum(1 for resultado in resultados.values() if resultado == TROCA_PROCESSADA),
+            'resultados': [{'id': pk, 'resultado': resultado} for pk, resultado in resultados.items()],
+        }, status=status.HTTP_200_OK)
+
+
+class TrocaExercicioViewSet(ExportacaoMixin, RespostaTrocaMixin, SoftDeleteModelViewSet):
+    queryset = TrocaExercicio.objects.all()
     serializer_class = TrocaExercicioSerializer
+    fast_list = True
+    pagination_class = TrocaPagination
+    filtros = FILTROS_TROCA
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -502,26 +698,19 @@ class TrocaExercicioViewSet(SoftDeleteModelViewSet):
             permission_classes = [IsAuthenticated, IsClienteUser]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [IsAuthenticated, IsAdminUser]
+        elif self.action in ['aprovar', 'rejeitar', 'responder_em_lote']:
+            permission_classes = [IsAuthenticated, (IsAdminUser | IsPersonalUser)]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente':
-                try:
-                    if hasattr(user.perfil, 'cliente') and user.perfil.cliente:
-                        return TrocaExercicio.objects.filter(deleted_at__isnull=True, cliente=user.perfil.cliente)
-                    else:
-                        return TrocaExercicio.objects.filter(deleted_at__isnull=True)
-                except:
-                    return TrocaExercicio.objects.filter(deleted_at__isnull=True)
-            elif user.perfil.tipo in ['admin', 'personal']:
-                return TrocaExercicio.objects.filter(deleted_at__isnull=True)
-        return TrocaExercicio.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente') and principal.cliente_id:
+            return TrocaExercicio.objects.filter(cliente_id=principal.cliente_id)
+        return TrocaExercicio.objects.all()
     
-    @swagger_auto_schema(tags=['Trocas'])
+    @swagger_auto_schema(tags=['Trocas'], manual_parameters=parametros_de_listagem(FILTROS_TROCA))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -533,6 +722,15 @@ class TrocaExercicioViewSet(SoftDeleteModelViewSet):
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
     
+    def perform_create(self, serializer):
+        cliente_id = get_principal(self.request.user).cliente_id
+        with transaction.atomic():
+            try:
+                reservar_troca_exercicio(cliente_id, serializer.validated_data['exercicio_antigo'].pk)
+            except TrocaNaoPermitida as exc:
+                raise ValidationError({'error': str(exc)})
+            serializer.save(cliente_id=cliente_id)
+    
     @swagger_auto_schema(tags=['Trocas'])
     def update(self, request, *args, **kwargs):
         return super().update(request, *args, **kwargs)
@@ -548,46 +746,27 @@ class TrocaExercicioViewSet(SoftDeleteModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, (IsAdminUser | IsPersonalUser)])
     @swagger_auto_schema(tags=['Trocas'])
     def aprovar(self, request, pk=None):
-        troca = self.get_object()
-        if troca.status != 'PENDENTE':
-            return Response({'error': 'Solicitação já foi processada'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        troca.status = 'APROVADO'
-        troca.aprovado_por = request.user
-        troca.data_resposta = timezone.now()
-        
-        # Se há observações na request, salvar
-        if 'observacoes_resposta' in request.data:
-            troca.observacoes_resposta = request.data['observacoes_resposta']
-        
-        troca.save()
-        
-        return Response({'message': 'Solicitação aprovada com sucesso'}, status=status.HTTP_200_OK)
+        return self.responder(request, 'aprovar')
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, (IsAdminUser | IsPersonalUser)])
     @swagger_auto_schema(tags=['Trocas'])
     def rejeitar(self, request, pk=None):
-        troca = self.get_object()
-        if troca.status != 'PENDENTE':
-            return Response({'error': 'Solicitação já foi processada'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        troca.status = 'REJEITADO'
-        troca.aprovado_por = request.user
-        troca.data_resposta = timezone.now()
-        
-        # Observações são obrigatórias para rejeição
-        if 'observacoes_resposta' not in request.data or not request.data['observacoes_resposta']:
-            return Response({'error': 'Observações são obrigatórias para rejeitar uma solicitação'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        troca.observacoes_resposta = request.data['observacoes_resposta']
-        troca.save()
-        
-        return Response({'message': 'Solicitação rejeitada'}, status=status.HTTP_200_OK)
+        return self.responder(request, 'rejeitar')
+    
+    @action(detail=False, methods=['post'], url_path='responder-em-lote',
+            permission_classes=[IsAuthenticated, (IsAdminUser | IsPersonalUser)])
+    @swagger_auto_schema(tags=['Trocas'], request_body=RespostaTrocasEmLoteSerializer)
+    def responder_em_lote(self, request):
+        """Aprova ou rejeita várias solicitações pendentes, com o resultado de cada id."""
+        return self.responder_lote(request)
 
 
-class TrocaRefeicaoViewSet(SoftDeleteModelViewSet):
-    queryset = TrocaRefeicao.objects.filter(deleted_at__isnull=True)
+class TrocaRefeicaoViewSet(ExportacaoMixin, RespostaTrocaMixin, SoftDeleteModelViewSet):
+    queryset = TrocaRefeicao.objects.all()
     serializer_class = TrocaRefeicaoSerializer
+    fast_list = True
+    pagination_class = TrocaPagination
+    filtros = FILTROS_TROCA
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -596,26 +775,19 @@ class TrocaRefeicaoViewSet(SoftDeleteModelViewSet):
             permission_classes = [IsAuthenticated, IsClienteUser]
         elif self.action in ['update', 'partial_update', 'destroy']:
             permission_classes = [IsAuthenticated, IsAdminUser]
+        elif self.action in ['aprovar', 'rejeitar', 'responder_em_lote']:
+            permission_classes = [IsAuthenticated, (IsAdminUser | IsNutricionistaUser)]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'perfil'):
-            if user.perfil.tipo == 'cliente':
-                try:
-                    if hasattr(user.perfil, 'cliente') and user.perfil.cliente:
-                        return TrocaRefeicao.objects.filter(deleted_at__isnull=True, cliente=user.perfil.cliente)
-                    else:
-                        return TrocaRefeicao.objects.filter(deleted_at__isnull=True)
-                except:
-                    return TrocaRefeicao.objects.filter(deleted_at__isnull=True)
-            elif user.perfil.tipo in ['admin', 'nutricionista']:
-                return TrocaRefeicao.objects.filter(deleted_at__isnull=True)
-        return TrocaRefeicao.objects.filter(deleted_at__isnull=True)
+        principal = get_principal(self.request.user)
+        if principal.has_role('cliente') and principal.cliente_id:
+            return TrocaRefeicao.objects.filter(cliente_id=principal.cliente_id)
+        return TrocaRefeicao.objects.all()
     
-    @swagger_auto_schema(tags=['Trocas'])
+    @swagger_auto_schema(tags=['Trocas'], manual_parameters=parametros_de_listagem(FILTROS_TROCA))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -627,6 +799,15 @@ class TrocaRefeicaoViewSet(SoftDeleteModelViewSet):
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
     
+    def perform_create(self, serializer):
+        cliente_id = get_principal(self.request.user).cliente_id
+        with transaction.atomic():
+            try:
+                reservar_troca_refeicao(cliente_id, serializer.validated_data['refeicao_antiga'].pk)
+            except TrocaNaoPermitida as exc:
+                raise ValidationError({'error': str(exc)})
+            serializer.save(cliente_id=cliente_id)
+    
     @swagger_auto_schema(tags=['Trocas'])
     def update(self, request, *args, **kwargs):
         return super().update(request, *args, **kwargs)
@@ -642,65 +823,45 @@ class TrocaRefeicaoViewSet(SoftDeleteModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, (IsAdminUser | IsNutricionistaUser)])
     @swagger_auto_schema(tags=['Trocas'])
     def aprovar(self, request, pk=None):
-        troca = self.get_object()
-        if troca.status != 'PENDENTE':
-            return Response({'error': 'Solicitação já foi processada'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        troca.status = 'APROVADO'
-        troca.aprovado_por = request.user
-        troca.data_resposta = timezone.now()
-        
-        # Se há observações na request, salvar
-        if 'observacoes_resposta' in request.data:
-            troca.observacoes_resposta = request.data['observacoes_resposta']
-        
-        troca.save()
-        
-        return Response({'message': 'Solicitação aprovada com sucesso'}, status=status.HTTP_200_OK)
+        return self.responder(request, 'aprovar')
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, (IsAdminUser | IsNutricionistaUser)])
     @swagger_auto_schema(tags=['Trocas'])
     def rejeitar(self, request, pk=None):
-        troca = self.get_object()
-        if troca.status != 'PENDENTE':
-            return Response({'error': 'Solicitação já foi processada'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        troca.status = 'REJEITADO'
-        troca.aprovado_por = request.user
-        troca.data_resposta = timezone.now()
-        
-        # Observações são obrigatórias para rejeição
-        if 'observacoes_resposta' not in request.data or not request.data['observacoes_resposta']:
-            return Response({'error': 'Observações são obrigatórias para rejeitar uma solicitação'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        troca.observacoes_resposta = request.data['observacoes_resposta']
-        troca.save()
-        
-        return Response({'message': 'Solicitação rejeitada'}, status=status.HTTP_200_OK)
+        return self.responder(request, 'rejeitar')
+    
+    @action(detail=False, methods=['post'], url_path='responder-em-lote',
+            permission_classes=[IsAuthenticated, (IsAdminUser | IsNutricionistaUser)])
+    @swagger_auto_schema(tags=['Trocas'], request_body=RespostaTrocasEmLoteSerializer)
+    def responder_em_lote(self, request):
+        """Aprova ou rejeita várias solicitações pendentes, com o resultado de cada id."""
+        return self.responder_lote(request)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetsMixin, QueryOptimizerMixin, viewsets.ModelViewSet):
     queryset = User.objects.filter(is_active=True).order_by('-date_joined')
     serializer_class = UserSerializer
+    filtros = FILTROS_USUARIO
+    ordering_fields = ['username']
     
     def get_permissions(self):
         if self.action in ['list', 'me']:
             permission_classes = [IsAuthenticated]
         elif self.action in ['retrieve']:
             permission_classes = [IsAuthenticated, IsOwnerOrStaff]
-        elif self.action in ['create', 'update', 'partial_update', 'destroy']:
+        elif self.action in ['create', 'update', 'partial_update', 'destroy', 'importar']:
             permission_classes = [IsAuthenticated, IsAdminUser]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or (hasattr(user, 'perfil') and user.perfil.tipo == 'admin'):
+        principal = get_principal(self.request.user)
+        if principal.is_staff or principal.has_role('admin'):
             return User.objects.filter(is_active=True).order_by('-date_joined')
-        return User.objects.filter(id=user.id, is_active=True).order_by('-date_joined')
+        return User.objects.filter(id=principal.user_id, is_active=True).order_by('-date_joined')
     
-    @swagger_auto_schema(tags=['Usuários'])
+    @swagger_auto_schema(tags=['Usuários'], manual_parameters=parametros_de_listagem(FILTROS_USUARIO, ['username']))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -729,23 +890,54 @@ class UserViewSet(viewsets.ModelViewSet):
     def partial_update(self, request, *args, **kwargs):
         return super().partial_update(request, *args, **kwargs)
     
+    def perform_update(self, serializer):
+        anterior = (serializer.instance.is_active, serializer.instance.is_staff, serializer.instance.is_superuser)
+        user = serializer.save()
+        if (user.is_active, user.is_staff, user.is_superuser) != anterior:
+            revoke_user_tokens(user.pk)
+    
     @swagger_auto_schema(tags=['Usuários'])
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         instance.is_active = False
         instance.save()
+        revoke_user_tokens(instance.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
     @action(detail=False, methods=['get'])
     @swagger_auto_schema(tags=['Usuários'])
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        user = request.user
+        if not isinstance(user, User):
+            # Token sem estado: o usuário só é buscado quando a resposta precisa dele
+            user = User.objects.select_related('perfil').get(pk=user.pk)
+        serializer = self.get_serializer(user)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    @swagger_auto_schema(tags=['Usuários'], request_body=ImportacaoUsuariosSerializer)
+    def importar(self, request):
+        """
+        Importa usuários em massa de um CSV/JSONL, relatando as linhas
+        rejeitadas. As senhas são hasheadas no próprio processo: um pool de
+        processos por requisição disputaria as CPUs com os demais workers.
+        Arquivos grandes devem ser importados com o comando importar_usuarios.
+        """
+        serializer = ImportacaoUsuariosSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        arquivo = serializer.validated_data['arquivo']
+        formato = serializer.validated_data.get('formato') or formato_do_arquivo(arquivo.name)
+        
+        texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+        resultado = importar_usuarios(texto, formato, workers=1)
+        
+        return Response(resultado, status=status.HTTP_200_OK)
 
 
 class PerfilViewSet(SoftDeleteModelViewSet):
-    queryset = Perfil.objects.filter(deleted_at__isnull=True)
+    queryset = Perfil.objects.all()
     serializer_class = PerfilSerializer
+    filtros = FILTROS_PERFIL
     
     def get_permissions(self):
         if self.action in ['list']:
@@ -759,12 +951,22 @@ class PerfilViewSet(SoftDeleteModelViewSet):
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or (hasattr(user, 'perfil') and user.perfil.tipo == 'admin'):
-            return Perfil.objects.filter(deleted_at__isnull=True)
-        return Perfil.objects.filter(usuario=user, deleted_at__isnull=True)
-    
-    @swagger_auto_schema(tags=['Usuários'])
+        principal = get_principal(self.request.user)
+        if principal.is_staff or principal.has_role('admin'):
+            return Perfil.objects.all()
+        return Perfil.objects.filter(usuario_id=principal.user_id)
+    
+    def perform_update(self, serializer):
+        tipo_anterior = serializer.instance.tipo
+        perfil = serializer.save()
+        if perfil.tipo != tipo_anterior:
+            revoke_user_tokens(perfil.usuario_id)
+    
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        revoke_user_tokens(instance.usuario_id)
+    
+    @swagger_auto_schema(tags=['Usuários'], manual_parameters=parametros_de_listagem(FILTROS_PERFIL))
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
@@ -790,3 +992,87 @@ class PerfilViewSet(SoftDeleteModelViewSet):
     @swagger_auto_schema(tags=['Usuários'])
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    """
+    Resumo do dashboard: contagens, trocas pendentes e itens recentes, com o
+    mesmo escopo por papel das listagens correspondentes.
+    """
+    permission_classes = [IsAuthenticated]
+    recent_items = 5
+    
+    def get_cache_key(self, principal):
+        # O escopo das listagens depende apenas destes atributos do principal
+        return 'dashboard:{}:{}:{}:{}'.format(
+            principal.role, int(principal.is_superuser), int(principal.is_staff), principal.cliente_id
+        )
+    
+    def scoped_queryset(self, viewset_class):
+        view = viewset_class(request=self.request, format_kwarg=None, action='list')
+        return view.get_queryset()
+    
+    def recentes_com_total(self, viewset_class, serializer_class):
+        # O total vem da window function na mesma consulta dos itens recentes
+        queryset = optimize_queryset(self.scoped_queryset(viewset_class), serializer_class)
+        itens = list(queryset.annotate(_total=Window(Count('id')))[:self.recent_items])
+        total = itens[0]._total if itens else 0
+        return {
+            'total': total,
+            'recentes': serializer_class(itens, many=True, context={'request': self.request}).data,
+        }
+    
+    def contagem_trocas(self, viewset_class):
+        return self.scoped_queryset(viewset_class).aggregate(
+            total=Count('id'),
+            pendentes=Count('id', filter=Q(status='PENDENTE')),
+        )
+    
+    def build_dashboard(self):
+        trocas_exercicios = self.contagem_trocas(TrocaExercicioViewSet)
+        trocas_refeicoes = self.contagem_trocas(TrocaRefeicaoViewSet)
+        return {
+            'treinos': self.recentes_com_total(TreinoViewSet, TreinoSerializer),
+            'dietas': self.recentes_com_total(DietaViewSet, DietaSerializer),
+            'historico_treinos': self.recentes_com_total(HistoricoTreinoViewSet, HistoricoTreinoSerializer),
+            'trocas': {
+                'exercicios': trocas_exercicios,
+                'refeicoes': trocas_refeicoes,
+                'pendentes': trocas_exercicios['pendentes'] + trocas_refeicoes['pendentes'],
+            },
+        }
+    
+    @swagger_auto_schema(tags=['Dashboard'])
+    def list(self, request):
+        key = self.get_cache_key(get_principal(request.user))
+        data = cache.get(key)
+        if data is None:
+            data = self.build_dashboard()
+            cache.set(key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+        return Response(data)
+
+
+class BuscaViewSet(viewsets.ViewSet):
+    """
+    Busca em exercícios, refeições e clientes de uma vez (?q=), com o mesmo
+    escopo por papel e a mesma ordenação por relevância do ?q= de cada
+    listagem, limitada aos primeiros resultados de cada tipo.
+    """
+    permission_classes = [IsAuthenticated]
+    limite = 10
+    
+    def resultados(self, viewset_class, serializer_class):
+        view = viewset_class(request=self.request, format_kwarg=None, action='list')
+        queryset = BuscaFilter().filter_queryset(self.request, view.get_queryset(), view)
+        values_serializer = get_values_serializer(serializer_class, queryset.model)
+        return values_serializer.to_representation(queryset.values(*values_serializer.columns)[:self.limite])
+    
+    @swagger_auto_schema(tags=['Busca'], manual_parameters=[PARAMETRO_BUSCA])
+    def list(self, request):
+        if not BuscaFilter().get_search_term(request):
+            raise ValidationError({'q': ["Informe o termo de busca."]})
+        return Response({
+            'exercicios': self.resultados(ExercicioViewSet, ExercicioBuscaSerializer),
+            'refeicoes': self.resultados(RefeicaoViewSet, RefeicaoBuscaSerializer),
+            'clientes': self.resultados(ClienteViewSet, ClienteLookupSerializer),
+        })
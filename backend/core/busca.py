@@ -0,0 +1,65 @@
+"""
+Busca textual e aproximada.
+
+Exercícios e refeições têm o vetor `busca` (nome com peso A, descrição com
+peso B, stemming em português), gerado pelo banco e indexado com GIN; cada
+palavra do termo casa também como prefixo, para a busca enquanto se digita.
+Clientes são buscados por similaridade de trigramas em nome/email quando o
+pg_trgm está instalado (ver a migração 0016) e, sem ele, por prefixo, com
+os índices de prefixo de Cliente.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+# Palavras do termo; o resto (operadores do tsquery, pontuação) é descartado
+_PALAVRAS = re.compile(r'\w+')
+
+# Presença do pg_trgm, por alias de banco (verificada uma vez por processo)
+_trigrama_disponivel = {}
+
+
+def trigrama_disponivel(using):
+    if using not in _trigrama_disponivel:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+            _trigrama_disponivel[using] = cursor.fetchone()[0]
+    return _trigrama_disponivel[using]
+
+
+def consulta_textual(termo):
+    """tsquery em português com todas as palavras do termo, cada uma também como prefixo."""
+    palavras = _PALAVRAS.findall(termo)
+    if not palavras:
+        return None
+    return SearchQuery(' & '.join(f'{palavra}:*' for palavra in palavras), config='portuguese', search_type='raw')
+
+
+def buscar_texto(queryset, campo, termo):
+    """Filtra pelo vetor `campo` e ordena por relevância."""
+    consulta = consulta_textual(termo)
+    if consulta is None:
+        return queryset.none()
+    return (queryset.filter(**{campo: consulta})
+            .annotate(relevancia=SearchRank(F(campo), consulta))
+            .order_by('-relevancia', 'pk'))
+
+
+def buscar_aproximado(queryset, campos, termo):
+    """Filtra por similaridade de trigramas (ou prefixo, sem pg_trgm) em `campos`, os mais parecidos primeiro."""
+    if not trigrama_disponivel(queryset.db):
+        filtro = Q()
+        for campo in campos:
+            filtro |= Q(**{f'{campo}__istartswith': termo})
+        return queryset.filter(filtro).order_by(*campos, 'pk')
+
+    filtro = Q()
+    for campo in campos:
+        filtro |= Q(**{f'{campo}__trigram_word_similar': termo})
+    similaridades = [TrigramWordSimilarity(termo, campo) for campo in campos]
+    return (queryset.filter(filtro)
+            .annotate(relevancia=Greatest(*similaridades) if len(similaridades) > 1 else similaridades[0])
+            .order_by('-relevancia', 'pk'))
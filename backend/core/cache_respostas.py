@@ -0,0 +1,49 @@
+"""
+Versão por Cliente do cache de respostas das listagens.
+
+As respostas guardadas levam na chave a versão do Cliente a que pertencem;
+invalidar o cliente descarta a versão, e a próxima leitura cria outra, de
+modo que todas as respostas anteriores deixam de ser encontradas de uma vez
+e expiram pelo timeout. As versões são sementes de time.time_ns(): se o
+cache descartar uma delas, a nova nunca repete um valor já usado.
+
+A invalidação só vale para todos os processos se o cache for compartilhado;
+com um cache local a cada processo (LocMemCache) as respostas não são
+guardadas (ver cache_compartilhado).
+"""
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+CHAVE_VERSAO = 'respostas:versao:cliente:{}'
+
+
+def cache_compartilhado():
+    """Indica se o cache padrão é visto por todos os processos."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def versao_do_cliente(cliente_id):
+    chave = CHAVE_VERSAO.format(cliente_id)
+    versao = cache.get(chave)
+    if versao is None:
+        # add: entre leituras concorrentes prevalece a primeira versão gravada
+        cache.add(chave, time.time_ns(), None)
+        versao = cache.get(chave)
+    return versao
+
+
+def invalidar_respostas(cliente_ids):
+    """
+    Descarta as respostas em cache dos clientes. Chamado após a escrita e
+    de novo no commit: uma leitura concorrente à transação pode ter guardado
+    os dados anteriores a ela sob a versão criada entre as duas chamadas.
+    """
+    chaves = [CHAVE_VERSAO.format(cliente_id) for cliente_id in set(cliente_ids) if cliente_id is not None]
+    if not chaves:
+        return
+    cache.delete_many(chaves)
+    transaction.on_commit(lambda: cache.delete_many(chaves))
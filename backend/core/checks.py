@@ -0,0 +1,19 @@
+from django.core import checks
+
+
+@checks.register()
+def filtros_indexados(app_configs, **kwargs):
+    """Cada filtro e ordenação declarados nas listagens da API precisa de um índice."""
+    from core.api.v1.filters import campos_sem_indice
+    from core.api.v1.routers import router
+
+    erros = []
+    for _, viewset, _ in router.registry:
+        for caminho in campos_sem_indice(viewset):
+            erros.append(checks.Error(
+                f"{viewset.__name__} filtra ou ordena por '{caminho}', que não tem índice.",
+                hint="Declare um índice começando pelo campo em Meta.indexes ou remova o filtro.",
+                obj=viewset,
+                id='core.E001',
+            ))
+    return erros
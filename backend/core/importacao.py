@@ -0,0 +1,179 @@
+"""
+Importação em massa de usuários a partir de CSV ou JSONL.
+
+Cada linha traz username, email e, opcionalmente, password, first_name,
+last_name e tipo (cliente, personal, nutricionista ou admin; padrão cliente).
+As linhas são lidas em streaming e gravadas em lotes: User, Perfil e a
+entidade do tipo (Cliente, Personal ou Nutricionista) são inseridos com
+bulk_create, que não dispara os signals de post_save, e as senhas são
+processadas em um pool de processos. Linhas inválidas são relatadas sem
+interromper a importação.
+"""
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from core.models import Perfil
+from core.services import ENTIDADES_POR_TIPO, nova_entidade_do_perfil
+
+IMPORTACAO_BATCH_SIZE = 500
+FORMATOS = ('csv', 'jsonl')
+TIPOS = tuple(tipo for tipo, _ in Perfil.TIPO_CHOICES)
+
+_validar_username = UnicodeUsernameValidator()
+
+
+def formato_do_arquivo(nome):
+    """Deduz o formato pela extensão do arquivo (CSV por padrão)."""
+    return 'jsonl' if nome.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def ler_linhas(arquivo, formato):
+    """Gera (número da linha, dados) a partir de um arquivo texto; dados é None se a linha for ilegível."""
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for dados in leitor:
+            yield leitor.line_num, dados
+        return
+
+    for numero, texto in enumerate(arquivo, start=1):
+        if not texto.strip():
+            continue
+        try:
+            dados = json.loads(texto)
+        except ValueError:
+            dados = None
+        yield numero, dados if isinstance(dados, dict) else None
+
+
+def _limpar(dados):
+    """Valida uma linha e retorna os campos normalizados; levanta ValidationError."""
+    if dados is None:
+        raise ValidationError('Linha ilegível')
+
+    username = (dados.get('username') or '').strip()
+    email = User.objects.normalize_email((dados.get('email') or '').strip())
+    tipo = (dados.get('tipo') or Perfil.CLIENTE).strip()
+    if not username or len(username) > 150:
+        raise ValidationError('username ausente ou maior que 150 caracteres')
+    _validar_username(username)
+    if not email:
+        raise ValidationError('email ausente')
+    validate_email(email)
+    if tipo not in TIPOS:
+        raise ValidationError(f'tipo inválido: {tipo}')
+
+    return {
+        'username': username,
+        'email': email,
+        'tipo': tipo,
+        'password': dados.get('password') or None,
+        'first_name': (dados.get('first_name') or '').strip()[:150],
+        'last_name': (dados.get('last_name') or '').strip()[:150],
+    }
+
+
+def _hashear(senhas, executor):
+    # Sem senha, make_password(None) gera uma senha inutilizável
+    if executor is None:
+        return [make_password(senha) for senha in senhas]
+    return list(executor.map(make_password, senhas, chunksize=max(1, len(senhas) // 32)))
+
+
+def _gravar_lote(lote, executor, resultado):
+    existentes = set(User.objects.filter(username__in=[dados['username'] for _, dados in lote])
+                     .values_list('username', flat=True))
+    emails_em_uso = {}
+    for tipo, (model, _) in ENTIDADES_POR_TIPO.items():
+        emails = [dados['email'] for _, dados in lote if dados['tipo'] == tipo]
+        if emails:
+            emails_em_uso[tipo] = set(model.all_objects.filter(email__in=emails).values_list('email', flat=True))
+
+    validos = []
+    for linha, dados in lote:
+        if dados['username'] in existentes:
+            resultado['rejeitados'].append({'linha': linha, 'erro': 'username já cadastrado'})
+        elif dados['email'] in emails_em_uso.get(dados['tipo'], ()):
+            resultado['rejeitados'].append({'linha': linha, 'erro': 'email já cadastrado'})
+        else:
+            validos.append((linha, dados))
+    if not validos:
+        return
+
+    # Hash fora da transação: é a etapa mais lenta do lote
+    senhas = _hashear([dados['password'] for _, dados in validos], executor)
+    try:
+        with transaction.atomic():
+            usuarios = User.objects.bulk_create([
+                User(username=dados['username'], email=dados['email'], password=senha,
+                     first_name=dados['first_name'], last_name=dados['last_name'],
+                     is_staff=dados['tipo'] == Perfil.ADMIN)
+                for (_, dados), senha in zip(validos, senhas)
+            ])
+            perfis = Perfil.objects.bulk_create([
+                Perfil(usuario=usuario, tipo=dados['tipo']) for usuario, (_, dados) in zip(usuarios, validos)
+            ])
+            entidades = {}
+            for perfil, usuario in zip(perfis, usuarios):
+                if perfil.tipo in ENTIDADES_POR_TIPO:
+                    entidade = nova_entidade_do_perfil(perfil, usuario)
+                    entidades.setdefault(type(entidade), []).append(entidade)
+            for model, objetos in entidades.items():
+                model.objects.bulk_create(objetos)
+    except IntegrityError:
+        # Conflito com uma gravação concorrente: o lote inteiro é desfeito
+        for linha, _ in validos:
+            resultado['rejeitados'].append({'linha': linha, 'erro': 'conflito ao gravar o lote'})
+        return
+    resultado['criados'] += len(validos)
+
+
+def importar_usuarios(arquivo, formato, batch_size=IMPORTACAO_BATCH_SIZE, workers=None):
+    """
+    Importa os usuários de `arquivo` (texto CSV ou JSONL) em lotes de
+    `batch_size`. `workers` é o tamanho do pool de hash de senhas (padrão:
+    número de CPUs; 1 processa no próprio processo).
+    Retorna {'criados': n, 'rejeitados': [{'linha': n, 'erro': str}, ...]}.
+    """
+    resultado = {'criados': 0, 'rejeitados': []}
+    vistos = {'username': set(), 'email': set()}
+
+    def validas():
+        for linha, dados in ler_linhas(arquivo, formato):
+            try:
+                dados = _limpar(dados)
+            except ValidationError as exc:
+                resultado['rejeitados'].append({'linha': linha, 'erro': '; '.join(exc.messages)})
+                continue
+            if dados['username'] in vistos['username'] or dados['email'] in vistos['email']:
+                resultado['rejeitados'].append({'linha': linha, 'erro': 'username ou email repetido no arquivo'})
+                continue
+            vistos['username'].add(dados['username'])
+            vistos['email'].add(dados['email'])
+            yield linha, dados
+
+    workers = workers or os.cpu_count() or 1
+    # spawn: os processos filhos não herdam as conexões abertas com o banco
+    executor = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                if workers > 1 else None)
+    try:
+        linhas = validas()
+        while True:
+            lote = list(islice(linhas, batch_size))
+            if not lote:
+                break
+            _gravar_lote(lote, executor, resultado)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return resultado
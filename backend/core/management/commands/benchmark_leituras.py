@@ -0,0 +1,90 @@
+import asyncio
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.api.v1.routers import ASYNC_READ_VIEWSETS
+
+
+class Command(BaseCommand):
+    help = ('Compara, pela aplicação ASGI, a vazão e a latência das leituras síncronas '
+            '(/api/v1/<endpoint>/) e assíncronas (/api/v1/async/<endpoint>/).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='Usuário autenticado nas requisições')
+        parser.add_argument('--endpoint', default='treinos', choices=sorted(ASYNC_READ_VIEWSETS),
+                            help='Endpoint de leitura a comparar')
+        parser.add_argument('--requests', type=int, default=200, help='Total de requisições por variante')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requisições simultâneas')
+        parser.add_argument('--host', default='localhost', help='Cabeçalho Host (deve constar em ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['username']} não encontrado")
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests e --concurrency devem ser positivos')
+
+        token = str(RefreshToken.for_user(user).access_token)
+        endpoint = options['endpoint']
+        for nome, url in (('sync', f'/api/v1/{endpoint}/'), ('async', f'/api/v1/async/{endpoint}/')):
+            resultado = asyncio.run(self.medir(url, token, options['host'], options['requests'], options['concurrency']))
+            self.stdout.write(
+                f"{nome:5} {url}: {resultado['req_s']:.1f} req/s, "
+                f"p50 {resultado['p50']:.1f} ms, p95 {resultado['p95']:.1f} ms, "
+                f"erros {resultado['erros']}"
+            )
+
+    async def medir(self, url, token, host, total, concorrencia):
+        application = get_asgi_application()
+        headers = [(b'host', host.encode()), (b'authorization', f'Bearer {token}'.encode())]
+
+        async def get():
+            scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                     'scheme': 'http', 'path': url, 'raw_path': url.encode(), 'query_string': b'',
+                     'headers': headers, 'server': (host, 80), 'client': ('127.0.0.1', 0)}
+            mensagens, corpo_enviado = [], asyncio.Event()
+
+            async def receive():
+                # Após o corpo, apenas aguarda: o handler cancela a espera ao responder
+                if corpo_enviado.is_set():
+                    await asyncio.Future()
+                corpo_enviado.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(mensagem):
+                mensagens.append(mensagem)
+
+            await application(scope, receive, send)
+            return mensagens[0]['status']
+
+        semaforo = asyncio.Semaphore(concorrencia)
+        latencias, erros = [], 0
+
+        async def requisicao():
+            nonlocal erros
+            async with semaforo:
+                inicio = time.perf_counter()
+                status_code = await get()
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                if status_code != 200:
+                    erros += 1
+
+        # Aquecimento: carrega caches e abre a conexão com o banco
+        await get()
+        inicio = time.perf_counter()
+        await asyncio.gather(*(requisicao() for _ in range(total)))
+        duracao = time.perf_counter() - inicio
+
+        latencias.sort()
+        return {
+            'req_s': total / duracao,
+            'p50': statistics.median(latencias),
+            'p95': latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))],
+            'erros': erros,
+        }
@@ -1,38 +1,64 @@
+import time
+
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from core.models import Perfil, Cliente
+from core.models import Perfil
+from core.services import ENTIDADES_POR_TIPO, nova_entidade_do_perfil
 
 
 class Command(BaseCommand):
-    help = 'Create Cliente objects for perfils with tipo=cliente that don\'t have one'
+    help = ('Create the Cliente, Personal or Nutricionista object for perfils that don\'t have one, '
+            'in batches. An interrupted run can be resumed with --start-after-id')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', nargs='+', choices=list(ENTIDADES_POR_TIPO), default=[Perfil.CLIENTE],
+                            help='Perfil types to backfill (default: cliente)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Perfils read and objects inserted per batch')
+        parser.add_argument('--start-after-id', type=int, default=0,
+                            help='Only process perfils with a greater id (last id reported by a previous run)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be created without writing anything')
 
     def handle(self, *args, **options):
-        # Find all perfils with tipo='cliente' that don't have a Cliente
-        perfis_sem_cliente = Perfil.objects.filter(
-            tipo='cliente',
-            cliente__isnull=True
-        )
-        
-        created_count = 0
-        for perfil in perfis_sem_cliente:
-            # Create a Cliente for this perfil
-            cliente = Cliente.objects.create(
-                nome=f"{perfil.usuario.first_name} {perfil.usuario.last_name}".strip() or perfil.usuario.username,
-                email=perfil.usuario.email,
-                perfil=perfil
-            )
-            created_count += 1
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Created Cliente for user {perfil.usuario.username}'
-                )
-            )
-        
-        if created_count == 0:
-            self.stdout.write(
-                self.style.SUCCESS('All cliente perfils already have Cliente objects')
-            )
+        for tipo in options['tipo']:
+            self.backfill(tipo, options['batch_size'], options['start_after_id'], options['dry_run'])
+
+    def backfill(self, tipo, batch_size, last_id, dry_run):
+        model, _ = ENTIDADES_POR_TIPO[tipo]
+        # Perfils of this tipo without the related object (soft deleted ones count as existing)
+        pending = Perfil.objects.filter(tipo=tipo, **{f'{tipo}__isnull': True}).select_related('usuario').order_by('id')
+
+        started = time.monotonic()
+        created = skipped = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            objs = [nova_entidade_do_perfil(perfil, perfil.usuario) for perfil in batch]
+            # email is unique on the target model: skip perfils whose email is already taken
+            taken = set(model.all_objects.filter(email__in={obj.email for obj in objs}).values_list('email', flat=True))
+            new_objs = []
+            for obj in objs:
+                if obj.email in taken:
+                    skipped += 1
+                    self.stderr.write(f'Skipped perfil {obj.perfil.id}: email "{obj.email}" already in use')
+                    continue
+                taken.add(obj.email)
+                new_objs.append(obj)
+
+            if not dry_run:
+                model.objects.bulk_create(new_objs)
+            created += len(new_objs)
+
+            rate = (created + skipped) / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'{tipo}: {created} created, {skipped} skipped, last id {last_id} ({rate:.0f} perfils/s)')
+
+        name = model._meta.object_name
+        if created == 0 and skipped == 0:
+            self.stdout.write(self.style.SUCCESS(f'All {tipo} perfils already have {name} objects'))
+        elif dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Would create {created} {name} objects'))
         else:
-            self.stdout.write(
-                self.style.SUCCESS(f'Created {created_count} Cliente objects')
-            )
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS(f'Created {created} {name} objects'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from core.importacao import importar_usuarios, formato_do_arquivo, FORMATOS, IMPORTACAO_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Importa usuários em massa de um arquivo CSV ou JSONL (username, email, password, '
+            'first_name, last_name, tipo), criando User, Perfil e Cliente/Personal/Nutricionista em lotes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo CSV ou JSONL')
+        parser.add_argument('--formato', choices=FORMATOS,
+                            help='Formato do arquivo (padrão: deduzido pela extensão)')
+        parser.add_argument('--batch-size', type=int, default=IMPORTACAO_BATCH_SIZE,
+                            help='Linhas gravadas por lote')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Processos para o hash de senhas (padrão: número de CPUs)')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or formato_do_arquivo(options['arquivo'])
+        with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+            resultado = importar_usuarios(arquivo, formato, batch_size=options['batch_size'],
+                                          workers=options['workers'])
+
+        for rejeitado in resultado['rejeitados']:
+            self.stderr.write(f"Linha {rejeitado['linha']}: {rejeitado['erro']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['criados']} usuários importados, {len(resultado['rejeitados'])} linhas rejeitadas"
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.services import recalcular_saldos_trocas, SALDO_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Recalcula o saldo de trocas de exercícios e refeições de todos os clientes a partir do plano. '
+            'Pode ser agendado (ex.: cron diário) e executado novamente sem efeitos adicionais.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SALDO_BATCH_SIZE,
+                            help='Quantidade de ids de clientes por UPDATE')
+
+    def handle(self, *args, **options):
+        resultado = recalcular_saldos_trocas(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['lotes']} lotes processados: "
+                f"{resultado['trocas_exercicios_restantes']} saldos de exercícios e "
+                f"{resultado['trocas_refeicoes_restantes']} saldos de refeições atualizados"
+            )
+        )
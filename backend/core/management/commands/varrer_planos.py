@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.services import varrer_planos
+
+
+class Command(BaseCommand):
+    help = ('Remove o plano dos clientes com plano vencido e relata os que vencem nos próximos dias. '
+            'Pensado para execução diária.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=7,
+                            help='Janela, em dias, dos planos a vencer incluídos no relatório')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Apenas relata, sem remover o plano dos vencidos')
+
+    def handle(self, *args, **options):
+        relatorio = varrer_planos(dias=options['dias'], rebaixar=not options['dry_run'])
+
+        self.stdout.write(f"Planos vencidos: {relatorio['vencidos']} (rebaixados: {relatorio['rebaixados']})")
+        total_a_vencer = sum(relatorio['a_vencer'].values())
+        self.stdout.write(f"Planos a vencer em {options['dias']} dias: {total_a_vencer}")
+        for data, total in relatorio['a_vencer'].items():
+            self.stdout.write(f"  {data.isoformat()}: {total}")
+        self.stdout.write(self.style.SUCCESS('Varredura concluída'))
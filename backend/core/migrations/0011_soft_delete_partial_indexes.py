@@ -0,0 +1,75 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_alter_cliente_options_alter_dieta_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['nome'], name='cliente_nome_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dieta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-created_at'], name='dieta_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dieta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-created_at'], name='dieta_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercicio',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['treino'], name='exercicio_treino_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicodieta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_inicio'], name='hist_dieta_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicodieta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-data_inicio'], name='hist_dieta_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicotreino',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_inicio'], name='hist_treino_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicotreino',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-data_inicio'], name='hist_treino_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refeicao',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['dieta'], name='refeicao_dieta_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treino',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-created_at'], name='treino_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='treino',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-created_at'], name='treino_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocaexercicio',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_solicitacao'], name='troca_exerc_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocaexercicio',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', '-data_solicitacao'], name='troca_exerc_status_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocarefeicao',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_solicitacao'], name='troca_ref_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocarefeicao',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', '-data_solicitacao'], name='troca_ref_status_alive_idx'),
+        ),
+    ]
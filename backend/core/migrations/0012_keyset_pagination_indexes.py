@@ -0,0 +1,95 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_soft_delete_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='historicodieta',
+            options={'ordering': ['-data_inicio', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='historicotreino',
+            options={'ordering': ['-data_inicio', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='trocaexercicio',
+            options={'ordering': ['-data_solicitacao', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='trocarefeicao',
+            options={'ordering': ['-data_solicitacao', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='historicodieta',
+            name='hist_dieta_cliente_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='historicodieta',
+            name='hist_dieta_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='historicotreino',
+            name='hist_treino_cliente_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='historicotreino',
+            name='hist_treino_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trocaexercicio',
+            name='troca_exerc_cliente_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trocaexercicio',
+            name='troca_exerc_status_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trocarefeicao',
+            name='troca_ref_cliente_alive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='trocarefeicao',
+            name='troca_ref_status_alive_idx',
+        ),
+        migrations.AddIndex(
+            model_name='historicodieta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_inicio', '-id'], name='hist_dieta_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicodieta',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-data_inicio', '-id'], name='hist_dieta_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicotreino',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_inicio', '-id'], name='hist_treino_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicotreino',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-data_inicio', '-id'], name='hist_treino_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocaexercicio',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_solicitacao', '-id'], name='troca_exerc_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocaexercicio',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', '-data_solicitacao', '-id'], name='troca_exerc_status_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocarefeicao',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['cliente', '-data_solicitacao', '-id'], name='troca_ref_cliente_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocarefeicao',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', '-data_solicitacao', '-id'], name='troca_ref_status_alive_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_revogacao_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('tipo_plano__isnull', False)), fields=['data_fim_plano'], name='cliente_fim_plano_alive_idx'),
+        ),
+    ]
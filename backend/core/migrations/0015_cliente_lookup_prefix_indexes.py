@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:16
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_cliente_fim_plano_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('nome'), name='text_pattern_ops'), condition=models.Q(('deleted_at__isnull', True)), name='cliente_nome_prefixo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='text_pattern_ops'), condition=models.Q(('deleted_at__isnull', True)), name='cliente_email_prefixo_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# Índices de trigramas de Cliente (busca aproximada em nome/email). O pg_trgm
+# é criado apenas se estiver disponível no servidor e o usuário puder
+# instalá-lo; sem ele a busca de clientes usa os índices de prefixo.
+TRIGRAMAS_SQL = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS cliente_nome_trgm_idx ON core_cliente
+            USING gin (nome gin_trgm_ops) WHERE deleted_at IS NULL;
+        CREATE INDEX IF NOT EXISTS cliente_email_trgm_idx ON core_cliente
+            USING gin (email gin_trgm_ops) WHERE deleted_at IS NULL;
+    END IF;
+EXCEPTION WHEN insufficient_privilege THEN
+    RAISE NOTICE 'pg_trgm não instalado: sem permissão para CREATE EXTENSION';
+END
+$$;
+"""
+
+TRIGRAMAS_REVERSE_SQL = """
+DROP INDEX IF EXISTS cliente_nome_trgm_idx;
+DROP INDEX IF EXISTS cliente_email_trgm_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_cliente_lookup_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercicio',
+            name='busca',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('nome', config='portuguese', weight='A'), '||', django.contrib.postgres.search.SearchVector('descricao', config='portuguese', weight='B'), django.contrib.postgres.search.SearchConfig('portuguese')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='refeicao',
+            name='busca',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('nome', config='portuguese', weight='A'), '||', django.contrib.postgres.search.SearchVector('descricao', config='portuguese', weight='B'), django.contrib.postgres.search.SearchConfig('portuguese')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='exercicio',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['busca'], name='exercicio_busca_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refeicao',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['busca'], name='refeicao_busca_alive_idx'),
+        ),
+        migrations.RunSQL(TRIGRAMAS_SQL, TRIGRAMAS_REVERSE_SQL),
+    ]
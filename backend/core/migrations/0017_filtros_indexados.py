@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_busca_textual'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(fields=['tipo'], name='perfil_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocaexercicio',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-data_solicitacao', '-id'], name='troca_exerc_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trocarefeicao',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['-data_solicitacao', '-id'], name='troca_ref_alive_idx'),
+        ),
+    ]
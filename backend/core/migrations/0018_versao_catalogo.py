@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 03:11
+
+from django.db import migrations, models
+
+
+def criar_versao_dos_planos(apps, schema_editor):
+    # Com a linha já criada, cada alteração de plano é um UPDATE atômico
+    apps.get_model('core', 'VersaoCatalogo').objects.get_or_create(nome='planos')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_filtros_indexados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoCatalogo',
+            fields=[
+                ('nome', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('versao', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(criar_versao_dos_planos, migrations.RunPython.noop),
+    ]
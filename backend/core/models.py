@@ -1,15 +1,62 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.utils import timezone
+
+# Condição usada nos índices parciais: só indexa registros não excluídos
+ALIVE = Q(deleted_at__isnull=True)
+
+
+def vetor_de_busca():
+    """Documento da busca textual (nome com peso maior que a descrição), com stemming em português."""
+    return models.GeneratedField(
+        expression=SearchVector('nome', weight='A', config='portuguese')
+        + SearchVector('descricao', weight='B', config='portuguese'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def dead(self):
+        return self.filter(deleted_at__isnull=False)
+
+    def soft_delete(self):
+        now = timezone.now()
+        return self.update(deleted_at=now, updated_at=now)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Manager padrão: retorna apenas registros não excluídos (deleted_at nulo)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
+    # `objects` ignora registros excluídos; `all_objects` inclui todos
+    objects = SoftDeleteManager()
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
+
     class Meta:
         abstract = True
 
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at', 'updated_at'])
+
+
 class Perfil(BaseModel):
     ADMIN = 'admin'
     NUTRICIONISTA = 'nutricionista'
@@ -28,6 +75,12 @@ class Perfil(BaseModel):
     telefone = models.CharField(max_length=15, blank=True, null=True)
     data_nascimento = models.DateField(blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            # Sem condição: o filtro de usuários por papel chega ao perfil por join
+            models.Index(fields=['tipo'], name='perfil_tipo_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.usuario.username} - {self.get_tipo_display()}"
 
@@ -55,6 +108,10 @@ class Treino(BaseModel):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['cliente', '-created_at'], name='treino_cliente_alive_idx', condition=ALIVE),
+            models.Index(fields=['-created_at'], name='treino_alive_idx', condition=ALIVE),
+        ]
     
     def __str__(self):
         return self.nome
@@ -67,6 +124,10 @@ class Dieta(BaseModel):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['cliente', '-created_at'], name='dieta_cliente_alive_idx', condition=ALIVE),
+            models.Index(fields=['-created_at'], name='dieta_alive_idx', condition=ALIVE),
+        ]
 
     def __str__(self):
         return self.nome
@@ -90,6 +151,17 @@ class Cliente(BaseModel):
     
     class Meta:
         ordering = ['nome']
+        indexes = [
+            models.Index(fields=['nome'], name='cliente_nome_alive_idx', condition=ALIVE),
+            # Autocomplete por prefixo sem diferenciar maiúsculas (istartswith), em clientes/lookup/
+            models.Index(OpClass(Upper('nome'), name='text_pattern_ops'), name='cliente_nome_prefixo_idx',
+                         condition=ALIVE),
+            models.Index(OpClass(Upper('email'), name='text_pattern_ops'), name='cliente_email_prefixo_idx',
+                         condition=ALIVE),
+            # Varredura de vencimento de planos (range scan por data)
+            models.Index(fields=['data_fim_plano'], name='cliente_fim_plano_alive_idx',
+                         condition=ALIVE & Q(tipo_plano__isnull=False)),
+        ]
     
     def __str__(self):
         return self.nome
@@ -133,7 +205,11 @@ class HistoricoTreino(BaseModel):
     observacoes = models.TextField(blank=True, null=True)
 
     class Meta:
-        ordering = ['-data_inicio']
+        ordering = ['-data_inicio', '-id']
+        indexes = [
+            models.Index(fields=['cliente', '-data_inicio', '-id'], name='hist_treino_cliente_alive_idx', condition=ALIVE),
+            models.Index(fields=['-data_inicio', '-id'], name='hist_treino_alive_idx', condition=ALIVE),
+        ]
 
     def __str__(self):
         return f"{self.cliente.nome} - {self.treino.nome}"
@@ -146,7 +222,11 @@ class HistoricoDieta(BaseModel):
     observacoes = models.TextField(blank=True, null=True)
 
     class Meta:
-        ordering = ['-data_inicio']
+        ordering = ['-data_inicio', '-id']
+        indexes = [
+            models.Index(fields=['cliente', '-data_inicio', '-id'], name='hist_dieta_cliente_alive_idx', condition=ALIVE),
+            models.Index(fields=['-data_inicio', '-id'], name='hist_dieta_alive_idx', condition=ALIVE),
+        ]
 
     def __str__(self):
         return f"{self.cliente.nome} - {self.dieta.nome} ({self.data_inicio})"
@@ -157,7 +237,14 @@ class Exercicio(BaseModel):
     nome = models.CharField(max_length=100)
     descricao = models.TextField()
     treino = models.ForeignKey(Treino, on_delete=models.CASCADE, related_name='exercicios')
+    busca = vetor_de_busca()
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['treino'], name='exercicio_treino_alive_idx', condition=ALIVE),
+            GinIndex(fields=['busca'], name='exercicio_busca_alive_idx', condition=ALIVE),
+        ]
+
     def __str__(self):
         return f"{self.nome} ({self.treino.nome})"
 
@@ -167,7 +254,14 @@ class Refeicao(BaseModel):
     descricao = models.TextField()
     calorias = models.IntegerField()
     dieta = models.ForeignKey(Dieta, on_delete=models.CASCADE, related_name='refeicoes')
+    busca = vetor_de_busca()
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['dieta'], name='refeicao_dieta_alive_idx', condition=ALIVE),
+            GinIndex(fields=['busca'], name='refeicao_busca_alive_idx', condition=ALIVE),
+        ]
+
     def __str__(self):
         return f"{self.nome} ({self.dieta.nome})"
 
@@ -191,7 +285,12 @@ class TrocaExercicio(BaseModel):
     aprovado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='exercicios_aprovados')
     
     class Meta:
-        ordering = ['-data_solicitacao']
+        ordering = ['-data_solicitacao', '-id']
+        indexes = [
+            models.Index(fields=['cliente', '-data_solicitacao', '-id'], name='troca_exerc_cliente_alive_idx', condition=ALIVE),
+            models.Index(fields=['status', '-data_solicitacao', '-id'], name='troca_exerc_status_alive_idx', condition=ALIVE),
+            models.Index(fields=['-data_solicitacao', '-id'], name='troca_exerc_alive_idx', condition=ALIVE),
+        ]
     
     def __str__(self):
         return f"{self.cliente.nome} - {self.exercicio_antigo.nome} ({self.status})"
@@ -216,7 +315,42 @@ class TrocaRefeicao(BaseModel):
     aprovado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='refeicoes_aprovadas')
     
     class Meta:
-        ordering = ['-data_solicitacao']
+        ordering = ['-data_solicitacao', '-id']
+        indexes = [
+            models.Index(fields=['cliente', '-data_solicitacao', '-id'], name='troca_ref_cliente_alive_idx', condition=ALIVE),
+            models.Index(fields=['status', '-data_solicitacao', '-id'], name='troca_ref_status_alive_idx', condition=ALIVE),
+            models.Index(fields=['-data_solicitacao', '-id'], name='troca_ref_alive_idx', condition=ALIVE),
+        ]
     
     def __str__(self):
         return f"{self.cliente.nome} - {self.refeicao_antiga.nome} ({self.status})"
+
+
+class RevogacaoToken(BaseModel):
+    """
+    Marca os tokens JWT emitidos até `created_at` para o usuário como revogados
+    (desativação ou mudança de papel). Usado pelo modo de token sem estado.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revogacoes_token')
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='revogacao_token_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} - {self.created_at}"
+
+
+class VersaoCatalogo(models.Model):
+    """
+    Versão de um catálogo em memória, incrementada na mesma transação de cada
+    alteração. Os processos comparam a versão a cada leitura do catálogo e
+    recarregam quando ela muda (ver core/planos.py).
+    """
+    nome = models.CharField(max_length=50, primary_key=True)
+    versao = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.nome} - {self.versao}"
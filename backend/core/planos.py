@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from core.models import TipoPlano, VersaoCatalogo
+
+CATALOGO = 'planos'
+
+
+def versao_publicada():
+    """Versão atual do catálogo no banco (a linha é criada pela migração 0018)."""
+    return VersaoCatalogo.objects.filter(nome=CATALOGO).values_list('versao', flat=True).first() or 0
+
+
+def publicar_alteracao():
+    """Incrementa a versão do catálogo na transação corrente, junto com a alteração do plano."""
+    versoes = VersaoCatalogo.objects.filter(nome=CATALOGO)
+    if not versoes.update(versao=F('versao') + 1):
+        # Sem a linha da migração: cria sem conflito e incrementa, como os demais
+        VersaoCatalogo.objects.bulk_create([VersaoCatalogo(nome=CATALOGO)], ignore_conflicts=True)
+        versoes.update(versao=F('versao') + 1)
+
+
+class CatalogoPlanos:
+    """
+    Catálogo em memória dos planos (TipoPlano não excluídos), por id, usado
+    pelo endpoint de planos e pelas regras de negócio sem consultas.
+
+    Salvar ou excluir um plano incrementa a versão do catálogo no banco, na
+    mesma transação (via signals), e invalida o catálogo deste processo na
+    hora. Os demais processos comparam a versão publicada com a carregada
+    no máximo a cada PLANOS_CATALOGO_VERIFICACAO_SECONDS, numa consulta por
+    chave primária, e recarregam quando ela muda; entre as verificações as
+    leituras não fazem consultas. Alterações feitas com QuerySet.update()
+    não disparam signals e só aparecem na recarga a cada
+    PLANOS_CATALOGO_REFRESH_SECONDS.
+    As instâncias são compartilhadas entre threads: apenas leitura.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._planos = {}
+        self._expires_at = 0
+        self._generation = 0
+        self._versao = None
+        self._verificar_em = 0
+
+    def is_stale(self):
+        return time.monotonic() >= self._expires_at
+
+    def _reload_if_stale(self):
+        if self.is_stale():
+            self.reload()
+        elif time.monotonic() >= self._verificar_em:
+            self._verificar_em = time.monotonic() + settings.PLANOS_CATALOGO_VERIFICACAO_SECONDS
+            if versao_publicada() != self._versao:
+                self.invalidate()
+                self.reload()
+
+    def reload(self):
+        with self._lock:
+            if not self.is_stale():
+                return
+            generation = self._generation
+            # A versão é lida antes dos planos: um commit entre as duas leituras
+            # deixa a versão carregada desatualizada e força outra recarga
+            self._versao = versao_publicada()
+            self._planos = {plano.pk: plano for plano in TipoPlano.objects.order_by('pk')}
+            self._verificar_em = time.monotonic() + settings.PLANOS_CATALOGO_VERIFICACAO_SECONDS
+            # Invalidado durante a carga: a próxima leitura recarrega de novo
+            if generation == self._generation:
+                self._expires_at = time.monotonic() + settings.PLANOS_CATALOGO_REFRESH_SECONDS
+
+    def all(self):
+        self._reload_if_stale()
+        return list(self._planos.values())
+
+    def get(self, plano_id):
+        self._reload_if_stale()
+        return self._planos.get(plano_id)
+
+    def invalidate(self):
+        self._generation += 1
+        self._expires_at = 0
+
+    def clear(self):
+        with self._lock:
+            self._planos = {}
+            self.invalidate()
+
+
+catalogo_planos = CatalogoPlanos()
+
+
+def invalidar_catalogo_planos():
+    """Publica a alteração para todos os processos e invalida o catálogo deste agora e no commit."""
+    publicar_alteracao()
+    catalogo_planos.invalidate()
+    transaction.on_commit(catalogo_planos.invalidate)
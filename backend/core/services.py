@@ -0,0 +1,297 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count, DateField, Exists, ExpressionWrapper, F, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from core.cache_respostas import invalidar_respostas
+from core.planos import catalogo_planos
+from core.models import (Perfil, Cliente, Personal, Nutricionista, TipoPlano, HistoricoTreino, HistoricoDieta,
+                         Exercicio, Refeicao, TrocaExercicio, TrocaRefeicao)
+
+# Tamanho dos lotes de INSERT nas atribuições em massa
+BULK_BATCH_SIZE = 500
+
+# Faixa de ids de clientes por UPDATE no recálculo de saldos de trocas
+SALDO_BATCH_SIZE = 5000
+
+
+# Entidade vinculada a cada tipo de perfil e os valores padrão na criação
+ENTIDADES_POR_TIPO = {
+    Perfil.CLIENTE: (Cliente, {}),
+    Perfil.PERSONAL: (Personal, {'especialidade': 'Personal Trainer'}),
+    Perfil.NUTRICIONISTA: (Nutricionista, {'especialidade': 'Nutrição Esportiva'}),
+}
+
+
+def nova_entidade_do_perfil(perfil, usuario):
+    """
+    Instância (não salva) do Cliente, Personal ou Nutricionista do perfil,
+    preenchida a partir do usuário como nos signals de criação.
+    """
+    model, padrao = ENTIDADES_POR_TIPO[perfil.tipo]
+    nome = f"{usuario.first_name} {usuario.last_name}".strip() or usuario.username
+    return model(perfil=perfil, nome=nome, email=usuario.email, **padrao)
+
+
+def _limite_do_plano(campo_limite):
+    # Limite do plano do cliente, para uso dentro de UPDATEs em Cliente
+    return Coalesce(Subquery(TipoPlano.objects.filter(pk=OuterRef('tipo_plano_id')).values(campo_limite)), 0)
+
+
+def registrar_treino_atribuido(treino):
+    """
+    Registra o treino no histórico do cliente, atualiza a data do último
+    treino e renova o saldo de trocas de exercícios com o limite do plano.
+    Deve ser chamado dentro da mesma transação que criou o treino.
+    """
+    if not treino.cliente_id:
+        return None
+    hoje = timezone.now().date()
+    historico = HistoricoTreino.objects.create(cliente_id=treino.cliente_id, treino=treino, data_inicio=hoje)
+    Cliente.objects.filter(pk=treino.cliente_id).update(
+        data_ultimo_treino=hoje, trocas_exercicios_restantes=_limite_do_plano('limite_trocas_exercicios'),
+        updated_at=timezone.now())
+    return historico
+
+
+def registrar_dieta_atribuida(dieta):
+    """
+    Registra a dieta no histórico do cliente, atualiza a data da última
+    dieta e renova o saldo de trocas de refeições com o limite do plano.
+    Deve ser chamado dentro da mesma transação que criou a dieta.
+    """
+    if not dieta.cliente_id:
+        return None
+    hoje = timezone.now().date()
+    historico = HistoricoDieta.objects.create(cliente_id=dieta.cliente_id, dieta=dieta, data_inicio=hoje)
+    Cliente.objects.filter(pk=dieta.cliente_id).update(
+        data_ultima_dieta=hoje, trocas_refeicoes_restantes=_limite_do_plano('limite_trocas_refeicoes'),
+        updated_at=timezone.now())
+    return historico
+
+
+def _atribuir_em_lote(origem, cliente_ids, campos, filhos, campos_filho, fk_filho,
+                      historico_model, fk_historico, campo_data_cliente, campo_saldo, campo_limite):
+    hoje = timezone.now().date()
+    model = type(origem)
+    filhos = list(filhos)
+    with transaction.atomic():
+        copias = model.objects.bulk_create(
+            [model(cliente_id=cliente_id, **{campo: getattr(origem, campo) for campo in campos})
+             for cliente_id in cliente_ids],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        if filhos:
+            filho_model = type(filhos[0])
+            filho_model.objects.bulk_create(
+                [filho_model(**{fk_filho: copia}, **{campo: getattr(filho, campo) for campo in campos_filho})
+                 for copia in copias for filho in filhos],
+                batch_size=BULK_BATCH_SIZE,
+            )
+        historico_model.objects.bulk_create(
+            [historico_model(cliente_id=copia.cliente_id, data_inicio=hoje, **{fk_historico: copia}) for copia in copias],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        Cliente.objects.filter(pk__in=cliente_ids).update(**{
+            campo_data_cliente: hoje, campo_saldo: _limite_do_plano(campo_limite), 'updated_at': timezone.now(),
+        })
+        # bulk_create não dispara os signals que invalidam o cache de respostas
+        invalidar_respostas(cliente_ids)
+    return copias, len(filhos) * len(copias)
+
+
+def atribuir_treino_em_lote(treino, cliente_ids):
+    """
+    Copia o treino (com seus exercícios) para cada cliente, registrando o
+    histórico e a data do último treino com inserts em lote e um único UPDATE.
+    Retorna (treinos criados, número de exercícios copiados).
+    """
+    return _atribuir_em_lote(
+        treino, cliente_ids, ('nome', 'descricao', 'duracao'),
+        treino.exercicios.all(), ('nome', 'descricao'), 'treino',
+        HistoricoTreino, 'treino', 'data_ultimo_treino',
+        'trocas_exercicios_restantes', 'limite_trocas_exercicios',
+    )
+
+
+def atribuir_dieta_em_lote(dieta, cliente_ids):
+    """
+    Copia a dieta (com suas refeições) para cada cliente, registrando o
+    histórico e a data da última dieta com inserts em lote e um único UPDATE.
+    Retorna (dietas criadas, número de refeições copiadas).
+    """
+    return _atribuir_em_lote(
+        dieta, cliente_ids, ('nome', 'descricao', 'calorias'),
+        dieta.refeicoes.all(), ('nome', 'descricao', 'calorias'), 'dieta',
+        HistoricoDieta, 'dieta', 'data_ultima_dieta',
+        'trocas_refeicoes_restantes', 'limite_trocas_refeicoes',
+    )
+
+
+# Resultados por id de responder_trocas
+TROCA_PROCESSADA = 'processada'
+TROCA_JA_PROCESSADA = 'ja_processada'
+TROCA_NAO_ENCONTRADA = 'nao_encontrada'
+
+
+def responder_trocas(queryset, ids, novo_status, usuario_id, observacoes=None):
+    """
+    Aprova ou rejeita as trocas `ids` de `queryset` que estão pendentes: as
+    linhas PENDENTE são bloqueadas (SELECT ... FOR UPDATE) e atualizadas
+    pelas chaves lidas. Se dois profissionais respondem à mesma troca, o
+    segundo espera o primeiro e já não a encontra pendente.
+    Retorna {id: resultado} com TROCA_PROCESSADA, TROCA_JA_PROCESSADA ou
+    TROCA_NAO_ENCONTRADA.
+    """
+    agora = timezone.now()
+    campos = {'status': novo_status, 'aprovado_por_id': usuario_id, 'data_resposta': agora, 'updated_at': agora}
+    if observacoes is not None:
+        campos['observacoes_resposta'] = observacoes
+
+    with transaction.atomic():
+        # Ordem por pk: lotes concorrentes bloqueiam as linhas na mesma ordem
+        pendentes = dict(queryset.filter(pk__in=ids, status='PENDENTE').select_for_update(of=('self',))
+                         .order_by('pk').values_list('pk', 'cliente_id'))
+        if pendentes:
+            queryset.model._base_manager.filter(pk__in=pendentes).update(**campos)
+
+    restantes = [pk for pk in ids if pk not in pendentes]
+    existentes = set(queryset.filter(pk__in=restantes).values_list('pk', flat=True)) if restantes else set()
+    resultados = {}
+    for pk in ids:
+        if pk in pendentes:
+            resultados[pk] = TROCA_PROCESSADA
+        elif pk in existentes:
+            resultados[pk] = TROCA_JA_PROCESSADA
+        else:
+            resultados[pk] = TROCA_NAO_ENCONTRADA
+    # O UPDATE não dispara os signals que invalidam o cache de respostas
+    invalidar_respostas(pendentes.values())
+    return resultados
+
+
+class TrocaNaoPermitida(Exception):
+    """Solicitação de troca recusada pelas regras do plano do cliente."""
+
+
+def _reservar_troca(cliente_id, item_model, item_id, fk_item, campo_data, campo_saldo, nome_item):
+    hoje = timezone.now().date()
+    item_do_cliente = item_model.objects.filter(**{
+        'pk': item_id, f'{fk_item}__cliente_id': OuterRef('pk'), f'{fk_item}__deleted_at__isnull': True,
+    })
+    # Posse do item e período em uma única consulta; as regras vêm do catálogo de planos
+    dados = (Cliente.objects.filter(pk=cliente_id)
+             .annotate(item_do_cliente=Exists(item_do_cliente))
+             .values(campo_data, 'tipo_plano_id', 'item_do_cliente')
+             .first())
+    if dados is None:
+        raise TrocaNaoPermitida('Cliente não encontrado')
+    if not dados['item_do_cliente']:
+        raise TrocaNaoPermitida(f'{nome_item} não pertence ao cliente')
+    plano = catalogo_planos.get(dados['tipo_plano_id'])
+    if plano is None:
+        raise TrocaNaoPermitida('Cliente sem plano ativo')
+    recebido_em = dados[campo_data]
+    if recebido_em is None or hoje > recebido_em + timedelta(days=plano.periodo_trocas_dias):
+        raise TrocaNaoPermitida('Período para solicitar trocas encerrado')
+    if plano.trocas_ilimitadas:
+        return
+
+    # Decremento condicional: requisições concorrentes não consomem além do saldo
+    consumidas = (Cliente.objects.filter(pk=cliente_id, **{f'{campo_saldo}__gt': 0})
+                  .update(**{campo_saldo: F(campo_saldo) - 1, 'updated_at': timezone.now()}))
+    if not consumidas:
+        raise TrocaNaoPermitida('Limite de trocas do período atingido')
+
+
+def reservar_troca_exercicio(cliente_id, exercicio_id):
+    """
+    Valida a solicitação de troca do exercício (do próprio cliente, dentro de
+    periodo_trocas_dias após o último treino) e consome uma troca do saldo.
+    Deve ser chamado na mesma transação que cria a solicitação.
+    Levanta TrocaNaoPermitida quando a troca não é permitida.
+    """
+    _reservar_troca(cliente_id, Exercicio, exercicio_id, 'treino',
+                    'data_ultimo_treino', 'trocas_exercicios_restantes', 'Exercício')
+
+
+def reservar_troca_refeicao(cliente_id, refeicao_id):
+    """
+    Valida a solicitação de troca da refeição (da própria dieta do cliente,
+    dentro de periodo_trocas_dias após a última dieta) e consome uma troca do
+    saldo. Deve ser chamado na mesma transação que cria a solicitação.
+    Levanta TrocaNaoPermitida quando a troca não é permitida.
+    """
+    _reservar_troca(cliente_id, Refeicao, refeicao_id, 'dieta',
+                    'data_ultima_dieta', 'trocas_refeicoes_restantes', 'Refeição')
+
+
+def _recalcular_saldo(clientes, hoje, campo_data, campo_saldo, campo_limite, troca_model):
+    usadas = Subquery(
+        troca_model.objects.filter(cliente_id=OuterRef('pk'), data_solicitacao__date__gte=OuterRef(campo_data))
+        .order_by().values('cliente_id').annotate(total=Count('id')).values('total')
+    )
+    inicio_periodo = ExpressionWrapper(Value(hoje) - F('tipo_plano__periodo_trocas_dias'), output_field=DateField())
+    aberto = Q(tipo_plano__isnull=False, tipo_plano__deleted_at__isnull=True, **{f'{campo_data}__gte': inicio_periodo})
+
+    # Período aberto: limite do plano menos as trocas já solicitadas nele
+    abertos = (clientes.filter(aberto)
+               .annotate(saldo=Greatest(_limite_do_plano(campo_limite) - Coalesce(usadas, 0), 0))
+               .exclude(**{campo_saldo: F('saldo')})
+               .update(**{campo_saldo: F('saldo'), 'updated_at': timezone.now()}))
+    # Período encerrado, sem treino/dieta ou sem plano: nenhuma troca disponível
+    encerrados = (clientes.exclude(aberto).exclude(**{campo_saldo: 0})
+                  .update(**{campo_saldo: 0, 'updated_at': timezone.now()}))
+    return abertos + encerrados
+
+
+def recalcular_saldos_trocas(batch_size=SALDO_BATCH_SIZE, hoje=None):
+    """
+    Recalcula trocas_exercicios_restantes e trocas_refeicoes_restantes de todos
+    os clientes a partir do plano: dentro de periodo_trocas_dias após o último
+    treino/dieta o saldo é o limite do plano menos as trocas já solicitadas no
+    período; fora dele, zero. Cada faixa de `batch_size` ids é atualizada com
+    UPDATEs em conjunto, escrevendo apenas as linhas cujo saldo mudou, de modo
+    que a execução pode ser repetida sem efeitos adicionais.
+    Retorna {'lotes': n, 'trocas_exercicios_restantes': n, 'trocas_refeicoes_restantes': n}.
+    """
+    hoje = hoje or timezone.now().date()
+    resultado = {'lotes': 0, 'trocas_exercicios_restantes': 0, 'trocas_refeicoes_restantes': 0}
+    faixa = Cliente.objects.aggregate(primeiro=Min('id'), ultimo=Max('id'))
+    if faixa['primeiro'] is None:
+        return resultado
+
+    for inicio in range(faixa['primeiro'], faixa['ultimo'] + 1, batch_size):
+        clientes = Cliente.objects.filter(pk__gte=inicio, pk__lt=inicio + batch_size)
+        with transaction.atomic():
+            resultado['trocas_exercicios_restantes'] += _recalcular_saldo(
+                clientes, hoje, 'data_ultimo_treino', 'trocas_exercicios_restantes',
+                'limite_trocas_exercicios', TrocaExercicio)
+            resultado['trocas_refeicoes_restantes'] += _recalcular_saldo(
+                clientes, hoje, 'data_ultima_dieta', 'trocas_refeicoes_restantes',
+                'limite_trocas_refeicoes', TrocaRefeicao)
+        resultado['lotes'] += 1
+    return resultado
+
+
+def varrer_planos(dias=7, hoje=None, rebaixar=True):
+    """
+    Localiza, pelo índice em data_fim_plano, os clientes com plano vencido e
+    os que vencem nos próximos `dias` dias. Com `rebaixar`, remove o plano dos
+    vencidos (e zera os saldos de trocas) em um único UPDATE.
+    Retorna {'vencidos': n, 'rebaixados': n, 'a_vencer': {data: quantidade}}.
+    """
+    hoje = hoje or timezone.now().date()
+    com_plano = Cliente.objects.filter(tipo_plano__isnull=False)
+    vencidos = com_plano.filter(data_fim_plano__lt=hoje)
+    a_vencer = (com_plano.filter(data_fim_plano__range=(hoje, hoje + timedelta(days=dias)))
+                .order_by('data_fim_plano').values('data_fim_plano').annotate(total=Count('id'))
+                .values_list('data_fim_plano', 'total'))
+
+    relatorio = {'vencidos': vencidos.count(), 'rebaixados': 0, 'a_vencer': dict(a_vencer)}
+    if rebaixar and relatorio['vencidos']:
+        relatorio['rebaixados'] = vencidos.update(
+            tipo_plano=None, trocas_exercicios_restantes=0, trocas_refeicoes_restantes=0,
+            updated_at=timezone.now(),
+        )
+    return relatorio
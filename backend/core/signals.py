@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Perfil, Cliente, Personal, Nutricionista
+from .models import (Perfil, Cliente, Personal, Nutricionista, TipoPlano, Treino, Dieta, Exercicio, Refeicao,
+                     TrocaExercicio, TrocaRefeicao)
+from .cache_respostas import invalidar_respostas
+from .planos import invalidar_catalogo_planos
 
 
 @receiver(post_save, sender=Perfil)
@@ -14,7 +17,7 @@ def create_related_profile(sender, instance, created, **kwargs):
         try:
             if instance.tipo == 'cliente':
                 # Verifica se já não existe um Cliente para este perfil
-                if not Cliente.objects.filter(perfil=instance).exists():
+                if not Cliente.all_objects.filter(perfil=instance).exists():
                     Cliente.objects.create(
                         perfil=instance,
                         nome=f"{instance.usuario.first_name} {instance.usuario.last_name}".strip() or instance.usuario.username,
@@ -24,7 +27,7 @@ def create_related_profile(sender, instance, created, **kwargs):
                     
             elif instance.tipo == 'personal':
                 # Verifica se já não existe um Personal para este perfil
-                if not Personal.objects.filter(perfil=instance).exists():
+                if not Personal.all_objects.filter(perfil=instance).exists():
                     Personal.objects.create(
                         perfil=instance,
                         nome=f"{instance.usuario.first_name} {instance.usuario.last_name}".strip() or instance.usuario.username,
@@ -35,7 +38,7 @@ def create_related_profile(sender, instance, created, **kwargs):
                     
             elif instance.tipo == 'nutricionista':
                 # Verifica se já não existe um Nutricionista para este perfil
-                if not Nutricionista.objects.filter(perfil=instance).exists():
+                if not Nutricionista.all_objects.filter(perfil=instance).exists():
                     Nutricionista.objects.create(
                         perfil=instance,
                         nome=f"{instance.usuario.first_name} {instance.usuario.last_name}".strip() or instance.usuario.username,
@@ -55,7 +58,7 @@ def create_perfil_for_user(sender, instance, created, **kwargs):
     """
     if created:
         # Verifica se já existe um perfil para este usuário
-        if not Perfil.objects.filter(usuario=instance).exists():
+        if not Perfil.all_objects.filter(usuario=instance).exists():
             tipo = 'admin' if instance.is_staff else 'cliente'
             Perfil.objects.create(
                 usuario=instance,
@@ -63,4 +66,59 @@ def create_perfil_for_user(sender, instance, created, **kwargs):
             )
             print(f"Perfil criado para usuário: {instance.username} com tipo: {tipo}")
         else:
-            print(f"Perfil já existe para usuário: {instance.username}")
\ No newline at end of file
+            print(f"Perfil já existe para usuário: {instance.username}")
+
+
+# Caminho até o Cliente dono de cada registro exibido nas listagens em cache
+CLIENTE_DO_REGISTRO = {
+    Cliente: 'pk',
+    Treino: 'cliente_id',
+    Dieta: 'cliente_id',
+    Exercicio: 'treino__cliente_id',
+    Refeicao: 'dieta__cliente_id',
+    TrocaExercicio: 'cliente_id',
+    TrocaRefeicao: 'cliente_id',
+}
+
+
+def clientes_do_registro(sender, instance):
+    caminho = CLIENTE_DO_REGISTRO[sender]
+    if '__' not in caminho:
+        return {getattr(instance, caminho)}
+    return set(sender.all_objects.filter(pk=instance.pk).values_list(caminho, flat=True))
+
+
+def registrar_cliente_anterior(sender, instance, **kwargs):
+    """
+    Guarda o Cliente dono do registro antes de uma atualização: se o registro
+    mudar de cliente, as respostas dos dois são invalidadas.
+    """
+    if instance._state.adding or CLIENTE_DO_REGISTRO[sender] == 'pk':
+        instance._clientes_anteriores = set()
+        return
+    instance._clientes_anteriores = set(
+        sender.all_objects.filter(pk=instance.pk).values_list(CLIENTE_DO_REGISTRO[sender], flat=True)
+    )
+
+
+def invalidar_respostas_ao_salvar(sender, instance, **kwargs):
+    anteriores = getattr(instance, '_clientes_anteriores', set())
+    invalidar_respostas(anteriores | clientes_do_registro(sender, instance))
+
+
+def invalidar_respostas_ao_excluir(sender, instance, **kwargs):
+    # pre_delete: os registros pais ainda existem para resolver o cliente
+    invalidar_respostas(clientes_do_registro(sender, instance))
+
+
+for model in CLIENTE_DO_REGISTRO:
+    pre_save.connect(registrar_cliente_anterior, sender=model, dispatch_uid=f'respostas_pre_save_{model.__name__}')
+    post_save.connect(invalidar_respostas_ao_salvar, sender=model, dispatch_uid=f'respostas_post_save_{model.__name__}')
+    pre_delete.connect(invalidar_respostas_ao_excluir, sender=model, dispatch_uid=f'respostas_pre_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=TipoPlano)
+@receiver(post_delete, sender=TipoPlano)
+def invalidar_catalogo_ao_alterar_plano(sender, instance, **kwargs):
+    """Recarrega o catálogo de planos após criação, alteração ou exclusão (lógica ou física)."""
+    invalidar_catalogo_planos()
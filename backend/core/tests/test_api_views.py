@@ -1,8 +1,28 @@
+import csv
+import io
+import json
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from unittest import mock
+from django.db import connection
+from django.db.models import Q
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from core.tests.test_base import BaseTestCase
-from core.models import Perfil
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import (Perfil, RevogacaoToken, TipoPlano, Cliente, Treino, Dieta, Exercicio, Refeicao,
+                         TrocaExercicio, HistoricoTreino, HistoricoDieta)
+from core.api.v1.revocation import revocation_cache
+from core.services import responder_trocas, TROCA_PROCESSADA, TROCA_JA_PROCESSADA
+from core.api.v1.serializers import TreinoSerializer
+from core.planos import CatalogoPlanos, catalogo_planos, publicar_alteracao, versao_publicada
 
 
 class AuthenticationAPITest(BaseTestCase):
@@ -208,3 +228,1028 @@ class SecurityAPITest(BaseTestCase):
         # Admin deve ter acesso (200) ou pelo menos não ser negado (403)
         self.assertNotEqual(response.status_code, status.HTTP_403_FORBIDDEN,
                           "Admin foi negado acesso à listagem de usuários")
+
+
+@override_settings(STATELESS_JWT=True)
+class StatelessTokenAPITest(BaseTestCase):
+    """Testes para o modo de token sem estado com revogação"""
+    
+    def setUp(self):
+        super().setUp()
+        revocation_cache.clear()
+    
+    def obter_token(self, username):
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'username': username,
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_token_carrega_papel_e_cliente(self):
+        """Testa se o access token carrega papel e cliente vinculado"""
+        access = AccessToken(self.obter_token('cliente_test')['access'])
+        
+        self.assertEqual(access['role'], 'cliente')
+        self.assertEqual(access['cliente_id'], self.cliente_user.perfil.cliente.id)
+    
+    def test_requisicao_sem_consulta_ao_usuario(self):
+        """Testa se a autenticação não consulta o banco"""
+        Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente_user.perfil.cliente)
+        token = self.obter_token('cliente_test')['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # Primeira requisição carrega o cache de revogação
+        self.client.get('/api/v1/treinos/')
+        # Mede a listagem fora do cache de respostas
+        cache.clear()
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/v1/treinos/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        # apenas validadores do GET condicional + COUNT da paginação + página de resultados + exercícios
+        self.assertEqual(len(context.captured_queries), 4)
+    
+    def test_desativacao_revoga_token(self):
+        """Testa se desativar o usuário invalida o token já emitido"""
+        tokens = self.obter_token('cliente_test')
+        
+        self.authenticate_user(self.admin_user)
+        response = self.client.delete(f'/api/v1/usuarios/{self.cliente_user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/v1/treinos/').status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        self.client.credentials()
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_mudanca_de_papel_revoga_token(self):
+        """Testa se alterar o tipo do perfil invalida o token já emitido"""
+        tokens = self.obter_token('cliente_test')
+        
+        self.authenticate_user(self.admin_user)
+        response = self.client.patch(f'/api/v1/perfis/{self.cliente_user.perfil.id}/', {'tipo': 'personal'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/v1/treinos/').status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_revogacao_recarregada_do_banco(self):
+        """Testa se revogações feitas por outro processo são lidas do banco"""
+        token = self.obter_token('cliente_test')['access']
+        RevogacaoToken.objects.create(usuario=self.cliente_user)
+        revocation_cache.clear()
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/v1/treinos/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class DashboardAPITest(BaseTestCase):
+    """Testes para o endpoint agregado do dashboard"""
+    
+    url = '/api/v1/dashboard/'
+    
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        cliente = self.cliente_user.perfil.cliente
+        outro_cliente = self.nutricionista_user.perfil.cliente
+        for i in range(3):
+            Treino.objects.create(nome=f'Treino {i}', descricao='Desc', duracao=60, cliente=cliente)
+        treino_outro = Treino.objects.create(nome='Outro', descricao='Desc', duracao=60, cliente=outro_cliente)
+        exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino_outro)
+        TrocaExercicio.objects.create(cliente=outro_cliente, exercicio_antigo=exercicio, motivo='Motivo')
+        TrocaExercicio.objects.create(cliente=outro_cliente, exercicio_antigo=exercicio, motivo='Motivo', status='APROVADO')
+    
+    def test_dashboard_cliente_escopo_proprio(self):
+        """Testa se o cliente vê apenas os próprios totais"""
+        self.authenticate_user(self.cliente_user)
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['treinos']['total'], 3)
+        self.assertEqual(len(response.data['treinos']['recentes']), 3)
+        self.assertEqual(response.data['trocas']['pendentes'], 0)
+    
+    def test_dashboard_admin_contagens_agregadas(self):
+        """Testa as contagens do admin e o número de consultas"""
+        self.authenticate_user(self.admin_user)
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['treinos']['total'], 4)
+        self.assertEqual(response.data['trocas']['exercicios'], {'total': 2, 'pendentes': 1})
+        self.assertEqual(response.data['trocas']['pendentes'], 1)
+        # autenticação + 3 listas recentes com total + exercícios dos treinos
+        # recentes + 2 agregações de trocas (sem dietas, não há prefetch de refeições)
+        self.assertEqual(len(context.captured_queries), 7)
+    
+    def test_dashboard_usa_cache(self):
+        """Testa se a segunda chamada é servida do cache"""
+        self.authenticate_user(self.admin_user)
+        self.client.get(self.url)
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # apenas a autenticação
+        self.assertEqual(len(context.captured_queries), 1)
+
+
+class AtribuicaoTreinoDietaAPITest(BaseTestCase):
+    """Testes para a criação de treinos/dietas com registro no histórico"""
+    
+    def setUp(self):
+        super().setUp()
+        self.cliente = self.cliente_user.perfil.cliente
+        self.authenticate_user(self.admin_user)
+    
+    def test_criar_treino_registra_historico(self):
+        """Testa se criar um treino gera histórico e atualiza o cliente"""
+        response = self.client.post('/api/v1/treinos/', {
+            'nome': 'Treino A', 'descricao': 'Desc', 'duracao': 60, 'cliente': self.cliente.id
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(HistoricoTreino.objects.filter(treino_id=response.data['id'], cliente=self.cliente).exists())
+        self.cliente.refresh_from_db()
+        self.assertIsNotNone(self.cliente.data_ultimo_treino)
+    
+    def test_criar_dieta_registra_historico(self):
+        """Testa se criar uma dieta gera histórico e atualiza o cliente"""
+        response = self.client.post('/api/v1/dietas/', {
+            'nome': 'Dieta A', 'descricao': 'Desc', 'calorias': 2000, 'cliente': self.cliente.id
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(HistoricoDieta.objects.filter(dieta_id=response.data['id'], cliente=self.cliente).exists())
+        self.cliente.refresh_from_db()
+        self.assertIsNotNone(self.cliente.data_ultima_dieta)
+    
+    def test_falha_no_historico_desfaz_treino(self):
+        """Testa se uma falha ao gravar o histórico não deixa o treino órfão"""
+        with mock.patch.object(HistoricoTreino.objects, 'create', side_effect=RuntimeError('falha')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/v1/treinos/', {
+                    'nome': 'Treino B', 'descricao': 'Desc', 'duracao': 60, 'cliente': self.cliente.id
+                }, format='json')
+        
+        self.assertFalse(Treino.all_objects.filter(nome='Treino B').exists())
+
+
+class AtribuicaoEmLoteAPITest(BaseTestCase):
+    """Testes para a atribuição de um treino/dieta a vários clientes"""
+    
+    def setUp(self):
+        super().setUp()
+        self.clientes = [
+            Cliente.objects.create(nome=f'Cliente {i}', email=f'lote{i}@test.com') for i in range(4)
+        ]
+        self.treino = Treino.objects.create(nome='Programa', descricao='Desc', duracao=45)
+        for i in range(3):
+            Exercicio.objects.create(nome=f'Exercício {i}', descricao='Desc', treino=self.treino)
+        self.dieta = Dieta.objects.create(nome='Plano', descricao='Desc', calorias=1800)
+        Refeicao.objects.create(nome='Almoço', descricao='Desc', calorias=600, dieta=self.dieta)
+    
+    def atribuir_treino(self, clientes):
+        return self.client.post(f'/api/v1/treinos/{self.treino.id}/atribuir/', {
+            'clientes': [cliente.id for cliente in clientes]
+        }, format='json')
+    
+    def test_atribuir_treino_copia_exercicios_e_historico(self):
+        """Testa se cada cliente recebe a cópia, os exercícios e o histórico"""
+        self.authenticate_user(self.personal_user)
+        
+        response = self.atribuir_treino(self.clientes)
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['treinos']), 4)
+        self.assertEqual(response.data['exercicios_copiados'], 12)
+        for cliente in self.clientes:
+            treino = Treino.objects.get(cliente=cliente)
+            self.assertEqual(treino.exercicios.count(), 3)
+            self.assertTrue(HistoricoTreino.objects.filter(cliente=cliente, treino=treino).exists())
+            cliente.refresh_from_db()
+            self.assertIsNotNone(cliente.data_ultimo_treino)
+    
+    def test_atribuir_treino_numero_fixo_de_consultas(self):
+        """Testa se o número de consultas não cresce com o número de clientes"""
+        self.authenticate_user(self.personal_user)
+        
+        with CaptureQueriesContext(connection) as poucos:
+            self.atribuir_treino(self.clientes[:1])
+        with CaptureQueriesContext(connection) as muitos:
+            self.atribuir_treino(self.clientes)
+        
+        self.assertEqual(len(poucos.captured_queries), len(muitos.captured_queries))
+    
+    def test_atribuir_dieta(self):
+        """Testa a atribuição em lote de dietas"""
+        self.authenticate_user(self.nutricionista_user)
+        
+        response = self.client.post(f'/api/v1/dietas/{self.dieta.id}/atribuir/', {
+            'clientes': [cliente.id for cliente in self.clientes[:2]]
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['refeicoes_copiadas'], 2)
+        self.assertEqual(HistoricoDieta.objects.filter(cliente__in=self.clientes[:2]).count(), 2)
+    
+    def test_atribuir_cliente_inexistente(self):
+        """Testa se ids inexistentes são rejeitados sem criar nada"""
+        self.authenticate_user(self.personal_user)
+        
+        response = self.client.post(f'/api/v1/treinos/{self.treino.id}/atribuir/', {
+            'clientes': [self.clientes[0].id, 999999]
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Treino.objects.count(), 1)
+    
+    def test_cliente_nao_pode_atribuir(self):
+        """Testa se cliente não tem permissão para atribuir treinos"""
+        self.authenticate_user(self.cliente_user)
+        
+        response = self.atribuir_treino(self.clientes)
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TreinoDietaAninhadosAPITest(BaseTestCase):
+    """Testes para a gravação de treinos/dietas com os filhos aninhados"""
+    
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user(self.personal_user)
+    
+    def criar_treino(self, quantidade=12):
+        return self.client.post('/api/v1/treinos/', {
+            'nome': 'Programa', 'descricao': 'Desc', 'duracao': 60,
+            'exercicios': [{'nome': f'Exercício {i}', 'descricao': 'Desc'} for i in range(quantidade)],
+        }, format='json')
+    
+    def test_criar_treino_com_exercicios_em_uma_requisicao(self):
+        """Testa se os exercícios são criados em um único INSERT"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.criar_treino()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['exercicios']), 12)
+        inserts = [q for q in context.captured_queries if q['sql'].startswith('INSERT INTO "core_exercicio"')]
+        self.assertEqual(len(inserts), 1)
+    
+    def test_atualizar_treino_escreve_apenas_a_diferenca(self):
+        """Testa se o update altera, cria e remove somente os exercícios afetados"""
+        response = self.criar_treino(3)
+        treino_id = response.data['id']
+        primeiro, segundo, terceiro = response.data['exercicios']
+        atualizado_em = Exercicio.objects.get(pk=primeiro['id']).updated_at
+        
+        response = self.client.patch(f'/api/v1/treinos/{treino_id}/', {
+            'exercicios': [
+                primeiro,
+                dict(segundo, nome='Alterado'),
+                {'nome': 'Novo', 'descricao': 'Desc'},
+            ],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        nomes = sorted(exercicio['nome'] for exercicio in response.data['exercicios'])
+        self.assertEqual(nomes, ['Alterado', 'Exercício 0', 'Novo'])
+        self.assertTrue(Exercicio.all_objects.get(pk=terceiro['id']).deleted_at)
+        # o exercício sem alterações não é regravado
+        self.assertEqual(Exercicio.objects.get(pk=primeiro['id']).updated_at, atualizado_em)
+    
+    def test_patch_sem_exercicios_mantem_filhos(self):
+        """Testa se um PATCH sem a lista aninhada não altera os exercícios"""
+        treino_id = self.criar_treino(2).data['id']
+        
+        response = self.client.patch(f'/api/v1/treinos/{treino_id}/', {'nome': 'Renomeado'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['exercicios']), 2)
+    
+    def test_exercicio_de_outro_treino_rejeitado(self):
+        """Testa se ids de exercícios de outro treino são recusados sem gravar nada"""
+        treino_id = self.criar_treino(1).data['id']
+        outro = self.criar_treino(1).data['exercicios'][0]
+        
+        response = self.client.patch(f'/api/v1/treinos/{treino_id}/', {
+            'nome': 'Não salvar', 'exercicios': [outro],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Treino.objects.filter(nome='Não salvar').exists())
+    
+    def test_criar_dieta_com_refeicoes(self):
+        """Testa a criação de uma dieta com refeições aninhadas"""
+        self.authenticate_user(self.nutricionista_user)
+        
+        response = self.client.post('/api/v1/dietas/', {
+            'nome': 'Plano', 'descricao': 'Desc', 'calorias': 2000,
+            'refeicoes': [{'nome': 'Café', 'descricao': 'Desc', 'calorias': 400},
+                          {'nome': 'Almoço', 'descricao': 'Desc', 'calorias': 800}],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Refeicao.objects.filter(dieta_id=response.data['id']).count(), 2)
+
+
+class RespostaTrocasAPITest(BaseTestCase):
+    """Testes para aprovação/rejeição de trocas por compare-and-set"""
+    
+    def setUp(self):
+        super().setUp()
+        cliente = self.cliente_user.perfil.cliente
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=cliente)
+        exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino)
+        self.trocas = [
+            TrocaExercicio.objects.create(cliente=cliente, exercicio_antigo=exercicio, motivo='Motivo') for _ in range(3)
+        ]
+        self.authenticate_user(self.personal_user)
+    
+    def test_aprovar_troca_pendente(self):
+        """Testa a aprovação individual de uma troca pendente"""
+        troca = self.trocas[0]
+        
+        response = self.client.post(f'/api/v1/trocas-exercicios/{troca.id}/aprovar/', {}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        troca.refresh_from_db()
+        self.assertEqual(troca.status, 'APROVADO')
+        self.assertEqual(troca.aprovado_por, self.personal_user)
+        self.assertIsNotNone(troca.data_resposta)
+    
+    def test_aprovar_troca_ja_processada(self):
+        """Testa se uma troca já respondida não é sobrescrita"""
+        troca = self.trocas[0]
+        self.client.post(f'/api/v1/trocas-exercicios/{troca.id}/rejeitar/', {'observacoes_resposta': 'Não'}, format='json')
+        
+        response = self.client.post(f'/api/v1/trocas-exercicios/{troca.id}/aprovar/', {}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        troca.refresh_from_db()
+        self.assertEqual(troca.status, 'REJEITADO')
+    
+    def test_rejeitar_sem_observacoes(self):
+        """Testa se a rejeição exige observações"""
+        response = self.client.post(f'/api/v1/trocas-exercicios/{self.trocas[0].id}/rejeitar/', {}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_aprovar_troca_inexistente(self):
+        """Testa 404 para troca inexistente"""
+        response = self.client.post('/api/v1/trocas-exercicios/999999/aprovar/', {}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_responder_em_lote_resultado_por_id(self):
+        """Testa se o lote processa as pendentes e informa o resultado de cada id"""
+        processada = self.trocas[2]
+        processada.status = 'APROVADO'
+        processada.save()
+        ids = [self.trocas[0].id, self.trocas[1].id, processada.id, 999999]
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/v1/trocas-exercicios/responder-em-lote/', {
+                'ids': ids, 'acao': 'rejeitar', 'observacoes_resposta': 'Sem substituto',
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['processadas'], 2)
+        self.assertEqual([item['resultado'] for item in response.data['resultados']],
+                         ['processada', 'processada', 'ja_processada', 'nao_encontrada'])
+        self.assertEqual(TrocaExercicio.objects.filter(status='REJEITADO').count(), 2)
+        # autenticação + bloqueio das pendentes + UPDATE por pk + existência das demais
+        sqls = [query['sql'] for query in context.captured_queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(sqls), 4)
+        self.assertIn('FOR UPDATE', sqls[1])
+    
+    def test_responder_em_lote_rejeitar_exige_observacoes(self):
+        """Testa a validação das observações na rejeição em lote"""
+        response = self.client.post('/api/v1/trocas-exercicios/responder-em-lote/', {
+            'ids': [self.trocas[0].id], 'acao': 'rejeitar',
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_responder_em_lote_exige_profissional(self):
+        """Testa se clientes não podem responder trocas"""
+        self.authenticate_user(self.cliente_user)
+        
+        response = self.client.post('/api/v1/trocas-exercicios/responder-em-lote/', {
+            'ids': [self.trocas[0].id], 'acao': 'aprovar',
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_respostas_concorrentes_apenas_uma_vence(self):
+        """Testa se a segunda resposta à mesma troca não sobrescreve a primeira"""
+        troca = self.trocas[0]
+        
+        primeira = responder_trocas(TrocaExercicio.objects.all(), [troca.id], 'APROVADO', self.personal_user.pk)
+        segunda = responder_trocas(TrocaExercicio.objects.all(), [troca.id], 'REJEITADO', self.admin_user.pk, 'Não')
+        
+        self.assertEqual(primeira[troca.id], TROCA_PROCESSADA)
+        self.assertEqual(segunda[troca.id], TROCA_JA_PROCESSADA)
+        troca.refresh_from_db()
+        self.assertEqual((troca.status, troca.aprovado_por_id), ('APROVADO', self.personal_user.pk))
+
+
+class CotaTrocasAPITest(BaseTestCase):
+    """Testes para o controle do saldo de trocas na criação da solicitação"""
+    
+    url = '/api/v1/trocas-exercicios/'
+    
+    def setUp(self):
+        super().setUp()
+        self.plano = TipoPlano.objects.create(nome='Mensal', descricao='Desc', preco=100, duracao_dias=30,
+                                              periodo_trocas_dias=7)
+        self.cliente = self.cliente_user.perfil.cliente
+        self.cliente.tipo_plano = self.plano
+        self.cliente.data_ultimo_treino = date.today()
+        self.cliente.trocas_exercicios_restantes = 1
+        self.cliente.save()
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        self.exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino)
+        self.authenticate_user(self.cliente_user)
+    
+    def solicitar(self, exercicio=None):
+        return self.client.post(self.url, {
+            'exercicio_antigo': (exercicio or self.exercicio).id, 'motivo': 'Dor no ombro',
+        }, format='json')
+    
+    def test_solicitacao_consome_saldo(self):
+        """Testa se a solicitação é criada para o próprio cliente e decrementa o saldo"""
+        response = self.solicitar()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['cliente'], self.cliente.id)
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.trocas_exercicios_restantes, 0)
+    
+    def test_saldo_esgotado(self):
+        """Testa se sem saldo a solicitação é recusada sem ser criada"""
+        self.solicitar()
+        
+        response = self.solicitar()
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TrocaExercicio.objects.count(), 1)
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.trocas_exercicios_restantes, 0)
+    
+    def test_fora_do_periodo(self):
+        """Testa se a troca é recusada após periodo_trocas_dias"""
+        Cliente.objects.filter(pk=self.cliente.pk).update(data_ultimo_treino=date.today() - timedelta(days=8))
+        
+        response = self.solicitar()
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.cliente.refresh_from_db()
+        self.assertEqual(self.cliente.trocas_exercicios_restantes, 1)
+    
+    def test_exercicio_de_outro_cliente(self):
+        """Testa se não é possível solicitar troca de exercício de outro cliente"""
+        outro = Cliente.objects.create(nome='Outro', email='outro@test.com')
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=outro)
+        exercicio = Exercicio.objects.create(nome='Agachamento', descricao='Desc', treino=treino)
+        
+        response = self.solicitar(exercicio)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TrocaExercicio.objects.exists())
+    
+    def test_trocas_ilimitadas_nao_consomem_saldo(self):
+        """Testa se planos com trocas ilimitadas não dependem do saldo"""
+        self.plano.trocas_ilimitadas = True
+        self.plano.save()
+        Cliente.objects.filter(pk=self.cliente.pk).update(trocas_exercicios_restantes=0)
+        
+        response = self.solicitar()
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+    
+    def test_validacao_em_consulta_unica(self):
+        """Testa se posse, período e saldo custam uma consulta e um UPDATE, com o plano vindo do catálogo"""
+        catalogo_planos.all()
+        
+        with CaptureQueriesContext(connection) as context:
+            self.solicitar()
+        
+        sqls = [q['sql'] for q in context.captured_queries]
+        self.assertEqual(len([sql for sql in sqls if 'EXISTS' in sql]), 1)
+        self.assertEqual(len([sql for sql in sqls if sql.startswith('UPDATE "core_cliente"')]), 1)
+        self.assertFalse([sql for sql in sqls if 'core_tipoplano' in sql])
+
+
+class ImportacaoUsuariosAPITest(BaseTestCase):
+    """Testes para o endpoint de importação em massa de usuários"""
+    
+    url = '/api/v1/usuarios/importar/'
+    
+    def arquivo(self, nome='usuarios.csv'):
+        return SimpleUploadedFile(nome, b'username,email,tipo\nnovo,novo@test.com,personal\n,sem@test.com,cliente\n')
+    
+    def test_admin_importa_e_recebe_relatorio(self):
+        """Testa a importação pelo admin com relato das linhas rejeitadas"""
+        self.authenticate_user(self.admin_user)
+        
+        response = self.client.post(self.url, {'arquivo': self.arquivo()}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['criados'], 1)
+        self.assertEqual([r['linha'] for r in response.data['rejeitados']], [3])
+        self.assertEqual(Perfil.objects.get(usuario__username='novo').tipo, 'personal')
+    
+    def test_hash_no_proprio_processo(self):
+        """Testa se o endpoint não cria um pool de processos dentro do worker web"""
+        self.authenticate_user(self.admin_user)
+        
+        with mock.patch('core.importacao.ProcessPoolExecutor') as pool:
+            response = self.client.post(self.url, {'arquivo': self.arquivo()}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pool.assert_not_called()
+    
+    def test_apenas_admin(self):
+        """Testa se usuários não administradores não podem importar"""
+        self.authenticate_user(self.personal_user)
+        
+        response = self.client.post(self.url, {'arquivo': self.arquivo()}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(User.objects.filter(username='novo').exists())
+
+
+class GetCondicionalAPITest(BaseTestCase):
+    """Testes para ETag / Last-Modified nas listagens e detalhes"""
+    
+    def setUp(self):
+        super().setUp()
+        self.cliente = self.cliente_user.perfil.cliente
+        self.treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        self.exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=self.treino)
+        self.authenticate_user(self.admin_user)
+    
+    def test_listagem_retorna_validadores(self):
+        """Testa se a listagem retorna ETag, Last-Modified e Cache-Control"""
+        response = self.client.get('/api/v1/treinos/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+    
+    def test_304_sem_serializacao(self):
+        """Testa se If-None-Match igual retorna 304 sem serializar"""
+        etag = self.client.get('/api/v1/treinos/')['ETag']
+        
+        with mock.patch.object(TreinoSerializer, 'to_representation') as to_representation:
+            response = self.client.get('/api/v1/treinos/', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        to_representation.assert_not_called()
+    
+    def test_if_modified_since(self):
+        """Testa 304 com If-Modified-Since igual ao Last-Modified"""
+        last_modified = self.client.get('/api/v1/treinos/')['Last-Modified']
+        
+        response = self.client.get('/api/v1/treinos/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_alteracao_do_aninhado_invalida(self):
+        """Testa se alterar um exercício do treino muda o ETag da listagem e do detalhe"""
+        etag_lista = self.client.get('/api/v1/treinos/')['ETag']
+        etag_detalhe = self.client.get(f'/api/v1/treinos/{self.treino.id}/')['ETag']
+        
+        self.client.patch(f'/api/v1/exercicios/{self.exercicio.id}/', {'nome': 'Supino inclinado'}, format='json')
+        lista = self.client.get('/api/v1/treinos/', HTTP_IF_NONE_MATCH=etag_lista)
+        detalhe = self.client.get(f'/api/v1/treinos/{self.treino.id}/', HTTP_IF_NONE_MATCH=etag_detalhe)
+        
+        self.assertEqual(lista.status_code, status.HTTP_200_OK)
+        self.assertEqual(lista.data['results'][0]['exercicios'][0]['nome'], 'Supino inclinado')
+        self.assertEqual(detalhe.status_code, status.HTTP_200_OK)
+    
+    def test_exclusao_invalida(self):
+        """Testa se a exclusão lógica de um treino muda o ETag da listagem"""
+        outro = Treino.objects.create(nome='Outro', descricao='Desc', duracao=30, cliente=self.cliente)
+        etag = self.client.get('/api/v1/treinos/')['ETag']
+        
+        self.client.delete(f'/api/v1/treinos/{outro.id}/')
+        response = self.client.get('/api/v1/treinos/', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+    
+    def test_etag_por_pagina(self):
+        """Testa se páginas diferentes têm ETags diferentes"""
+        for dias in range(2):
+            HistoricoTreino.objects.create(cliente=self.cliente, treino=self.treino,
+                                           data_inicio=date.today() - timedelta(days=dias))
+        
+        primeira = self.client.get('/api/v1/historico-treinos/?paginacao=cursor&page_size=1')
+        segunda = self.client.get(primeira.data['next'], HTTP_IF_NONE_MATCH=primeira['ETag'])
+        
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(segunda['ETag'], primeira['ETag'])
+    
+    def test_detalhe_fora_do_escopo(self):
+        """Testa se o cliente recebe 404, e não 304, para treino de outro cliente"""
+        outro_cliente = Cliente.objects.create(nome='Outro', email='outro@test.com')
+        treino = Treino.objects.create(nome='Outro', descricao='Desc', duracao=30, cliente=outro_cliente)
+        etag = self.client.get(f'/api/v1/treinos/{treino.id}/')['ETag']
+        
+        self.authenticate_user(self.cliente_user)
+        response = self.client.get(f'/api/v1/treinos/{treino.id}/', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_sem_validadores_para_relacao_sem_updated_at(self):
+        """Testa se trocas, que exibem dados do User, não recebem ETag"""
+        response = self.client.get('/api/v1/trocas-exercicios/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+
+class CacheRespostasAPITest(BaseTestCase):
+    """Testes para o cache versionado das listagens vistas por clientes"""
+    
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # O LocMemCache dos testes faz as vezes de um cache compartilhado
+        compartilhado = mock.patch('core.api.v1.mixins.cache_compartilhado', return_value=True)
+        compartilhado.start()
+        self.addCleanup(compartilhado.stop)
+        self.cliente = self.cliente_user.perfil.cliente
+        self.treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        self.exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=self.treino)
+    
+    def listar_como_cliente(self, url='/api/v1/treinos/', **extra):
+        self.authenticate_user(self.cliente_user)
+        return self.client.get(url, **extra)
+    
+    def consultas_de_dados(self, context):
+        return [query['sql'] for query in context.captured_queries
+                if 'core_treino' in query['sql'] or 'core_exercicio' in query['sql']]
+    
+    def test_leitura_em_cache_sem_consultas(self):
+        """Testa se a segunda listagem do cliente não consulta nem serializa"""
+        primeira = self.listar_como_cliente()
+        
+        with CaptureQueriesContext(connection) as context:
+            with mock.patch.object(TreinoSerializer, 'to_representation') as to_representation:
+                segunda = self.client.get('/api/v1/treinos/')
+        
+        self.assertEqual(segunda.status_code, status.HTTP_200_OK)
+        self.assertEqual(segunda.json(), primeira.json())
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+        self.assertEqual(self.consultas_de_dados(context), [])
+        to_representation.assert_not_called()
+    
+    def test_304_a_partir_do_cache(self):
+        """Testa se o ETag em cache responde 304 sem consultas aos dados"""
+        etag = self.listar_como_cliente()['ETag']
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/v1/treinos/', HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.consultas_de_dados(context), [])
+    
+    def test_parametros_na_chave(self):
+        """Testa se parâmetros diferentes não compartilham a resposta"""
+        self.listar_como_cliente('/api/v1/treinos/')
+        
+        response = self.client.get('/api/v1/treinos/', {'page': 2})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_edicao_do_profissional_invalida(self):
+        """Testa se a alteração de treino e exercício aparece para o cliente"""
+        self.listar_como_cliente()
+        self.listar_como_cliente('/api/v1/exercicios/')
+        
+        self.authenticate_user(self.personal_user)
+        self.client.patch(f'/api/v1/treinos/{self.treino.id}/', {'nome': 'Treino A'}, format='json')
+        self.client.patch(f'/api/v1/exercicios/{self.exercicio.id}/', {'nome': 'Supino reto'}, format='json')
+        
+        treinos = self.listar_como_cliente().data['results']
+        exercicios = self.client.get('/api/v1/exercicios/').data['results']
+        self.assertEqual(treinos[0]['nome'], 'Treino A')
+        self.assertEqual(treinos[0]['exercicios'][0]['nome'], 'Supino reto')
+        self.assertEqual(exercicios[0]['nome'], 'Supino reto')
+    
+    def test_exclusao_invalida(self):
+        """Testa se a exclusão lógica de um exercício aparece para o cliente"""
+        self.listar_como_cliente('/api/v1/exercicios/')
+        
+        self.exercicio.soft_delete()
+        
+        self.assertEqual(self.listar_como_cliente('/api/v1/exercicios/').data['count'], 0)
+    
+    def test_troca_de_cliente_invalida_os_dois(self):
+        """Testa se mover o treino para outro cliente invalida o cliente anterior"""
+        self.listar_como_cliente()
+        outro = Cliente.objects.create(nome='Outro', email='outro@test.com')
+        
+        self.treino.cliente = outro
+        self.treino.save()
+        
+        self.assertEqual(self.listar_como_cliente().data['count'], 0)
+    
+    def test_atribuicao_em_lote_invalida(self):
+        """Testa se a atribuição em lote, feita com bulk_create, invalida o cliente"""
+        self.listar_como_cliente()
+        modelo = Treino.objects.create(nome='Programa', descricao='Desc', duracao=45)
+        
+        self.authenticate_user(self.personal_user)
+        response = self.client.post(f'/api/v1/treinos/{modelo.id}/atribuir/', {
+            'clientes': [self.cliente.id]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        self.assertEqual(self.listar_como_cliente().data['count'], 2)
+    
+    def test_cache_por_processo_desligado(self):
+        """Testa se, com um cache local ao processo, as listagens do cliente não são guardadas"""
+        with mock.patch('core.api.v1.mixins.cache_compartilhado', return_value=False):
+            self.listar_como_cliente()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get('/api/v1/treinos/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(self.consultas_de_dados(context), [])
+    
+    def test_profissional_sem_cache(self):
+        """Testa se a listagem de profissionais não usa o cache"""
+        self.authenticate_user(self.personal_user)
+        self.client.get('/api/v1/treinos/')
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/v1/treinos/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(self.consultas_de_dados(context), [])
+
+
+class CatalogoPlanosAPITest(BaseTestCase):
+    """Testes para o catálogo de planos em memória"""
+    
+    url = '/api/v1/tipos-plano/'
+    
+    def setUp(self):
+        super().setUp()
+        self.plano = TipoPlano.objects.create(nome='Mensal', descricao='Desc', preco=100, duracao_dias=30)
+        self.authenticate_user(self.cliente_user)
+    
+    def consultas_de_planos(self, context):
+        return [query['sql'] for query in context.captured_queries if 'core_tipoplano' in query['sql']]
+    
+    def test_listagem_sem_consultas(self):
+        """Testa se a listagem e o detalhe, com o catálogo carregado, não consultam os planos"""
+        self.client.get(self.url)
+        
+        with CaptureQueriesContext(connection) as context:
+            lista = self.client.get(self.url)
+            detalhe = self.client.get(f'{self.url}{self.plano.id}/')
+        
+        self.assertEqual(lista.status_code, status.HTTP_200_OK)
+        self.assertEqual([plano['nome'] for plano in lista.data['results']], ['Mensal'])
+        self.assertEqual(detalhe.data['id'], self.plano.id)
+        self.assertEqual(self.consultas_de_planos(context), [])
+    
+    def test_alteracoes_invalidam_o_catalogo(self):
+        """Testa se criação, alteração e exclusão pela API aparecem na hora"""
+        self.client.get(self.url)
+        self.authenticate_user(self.admin_user)
+        
+        response = self.client.post(self.url, {
+            'nome': 'Anual', 'descricao': 'Desc', 'preco': '900.00', 'duracao_dias': 365,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.patch(f'{self.url}{self.plano.id}/', {'nome': 'Mensal Plus'}, format='json')
+        
+        nomes = [plano['nome'] for plano in self.client.get(self.url).data['results']]
+        self.assertEqual(nomes, ['Mensal Plus', 'Anual'])
+        
+        self.client.delete(f'{self.url}{self.plano.id}/')
+        self.assertEqual(self.client.get(self.url).data['count'], 1)
+        self.assertEqual(self.client.get(f'{self.url}{self.plano.id}/').status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_alteracao_vista_pelos_demais_processos(self):
+        """Testa se o catálogo de outro processo vê a alteração na verificação seguinte da versão"""
+        outro_processo = CatalogoPlanos()
+        self.assertEqual(outro_processo.get(self.plano.id).limite_trocas_exercicios, 1)
+        
+        # Dentro do intervalo de verificação, as leituras não fazem consultas
+        with CaptureQueriesContext(connection) as context:
+            outro_processo.get(self.plano.id)
+            outro_processo.all()
+        self.assertEqual(context.captured_queries, [])
+        
+        self.plano.limite_trocas_exercicios = 3
+        self.plano.save()
+        depois_da_verificacao = time.monotonic() + settings.PLANOS_CATALOGO_VERIFICACAO_SECONDS + 1
+        with mock.patch('core.planos.time.monotonic', return_value=depois_da_verificacao):
+            self.assertEqual(outro_processo.get(self.plano.id).limite_trocas_exercicios, 3)
+        
+        self.plano.soft_delete()
+        with mock.patch('core.planos.time.monotonic', return_value=depois_da_verificacao + 2):
+            self.assertIsNone(outro_processo.get(self.plano.id))
+    
+    def test_versao_incrementada_a_cada_alteracao(self):
+        """Testa se cada alteração incrementa a versão já criada pela migração"""
+        versao = versao_publicada()
+        
+        self.plano.save()
+        publicar_alteracao()
+        
+        self.assertEqual(versao_publicada(), versao + 2)
+    
+    def test_get_condicional(self):
+        """Testa se o catálogo responde 304 ao ETag da listagem"""
+        etag = self.client.get(self.url)['ETag']
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_detalhe_inexistente(self):
+        """Testa 404 para id inexistente ou inválido"""
+        self.assertEqual(self.client.get(f'{self.url}999999/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(f'{self.url}abc/').status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_recarga_apos_intervalo(self):
+        """Testa se alterações sem signals aparecem após o intervalo de recarga"""
+        self.client.get(self.url)
+        TipoPlano.objects.filter(pk=self.plano.pk).update(nome='Alterado')
+        self.assertEqual(self.client.get(self.url).data['results'][0]['nome'], 'Mensal')
+        
+        agora = time.monotonic()
+        with mock.patch('core.planos.time.monotonic', return_value=agora + settings.PLANOS_CATALOGO_REFRESH_SECONDS + 1):
+            response = self.client.get(self.url)
+        
+        self.assertEqual(response.data['results'][0]['nome'], 'Alterado')
+
+
+class ClienteAPITest(BaseTestCase):
+    """Testes para a criação de clientes"""
+    
+    def test_email_de_cliente_excluido(self):
+        """Testa se o email de um cliente excluído logicamente é recusado com 400, não com erro do banco"""
+        Cliente.objects.create(nome='Antigo', email='antigo@academia.com').soft_delete()
+        self.authenticate_user(self.admin_user)
+        
+        response = self.client.post('/api/v1/clientes/', {'nome': 'Novo', 'email': 'antigo@academia.com'},
+                                    format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+
+
+class ClienteLookupAPITest(BaseTestCase):
+    """Testes para o autocomplete de clientes (clientes/lookup/)"""
+    
+    def setUp(self):
+        super().setUp()
+        self.url = '/api/v1/clientes/lookup/'
+        Cliente.objects.bulk_create([
+            Cliente(nome='Ana Souza', email='ana@academia.com'),
+            Cliente(nome='André Lima', email='andre@academia.com'),
+            Cliente(nome='Bruno Costa', email='bruno@academia.com'),
+            Cliente(nome='Carla Dias', email='anacarla@academia.com'),
+        ])
+    
+    def test_busca_por_prefixo(self):
+        """Testa se a busca casa o início do nome ou do email, ordenada por nome"""
+        self.authenticate_user(self.personal_user)
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'q': 'an'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['nome'] for item in response.data], ['Ana Souza', 'André Lima', 'Carla Dias'])
+        self.assertEqual(set(response.data[0]), {'id', 'nome', 'email'})
+        self.assertEqual(sum('FROM "core_cliente"' in query['sql'] for query in context.captured_queries), 1)
+    
+    def test_limite(self):
+        """Testa o limite de resultados e sua validação"""
+        self.authenticate_user(self.admin_user)
+        
+        self.assertEqual(len(self.client.get(self.url, {'limit': 2}).data), 2)
+        self.assertEqual(self.client.get(self.url, {'limit': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'limit': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'limit': 101}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cliente_ve_apenas_a_si_mesmo(self):
+        """Testa se o escopo do cliente também vale para o autocomplete"""
+        self.authenticate_user(self.cliente_user)
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual([item['id'] for item in response.data], [self.cliente_user.perfil.cliente.id])
+    
+    def test_consulta_usa_indice(self):
+        """Testa se a busca por prefixo pode usar os índices de nome e email"""
+        Cliente.objects.bulk_create(Cliente(nome=f'Cliente {i}', email=f'c{i}@test.com') for i in range(500))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_cliente')
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                plano = (Cliente.objects.filter(Q(nome__istartswith='an') | Q(email__istartswith='an'))
+                         .order_by().explain())
+            finally:
+                cursor.execute('SET enable_seqscan = on')
+        
+        self.assertIn('cliente_nome_prefixo_idx', plano)
+        self.assertIn('cliente_email_prefixo_idx', plano)
+
+
+class ExportacaoAPITest(BaseTestCase):
+    """Testes para a exportação em streaming de histórico e trocas"""
+    
+    def setUp(self):
+        super().setUp()
+        self.url = '/api/v1/historico-treinos/exportar/'
+        self.cliente = self.cliente_user.perfil.cliente
+        outro = Cliente.objects.create(nome='Outro', email='outro@test.com')
+        self.treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60)
+        for i in range(5):
+            HistoricoTreino.objects.create(cliente=self.cliente, treino=self.treino,
+                                           data_inicio=date.today() - timedelta(days=i), observacoes=f'Obs {i}')
+        HistoricoTreino.objects.create(cliente=outro, treino=self.treino, data_inicio=date.today(),
+                                       observacoes='=HYPERLINK("http://exemplo")')
+    
+    def _conteudo(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+    
+    def test_ndjson(self):
+        """Testa se cada linha é um item da listagem, na mesma ordem e sem paginação"""
+        self.authenticate_user(self.personal_user)
+        
+        response = self.client.get(self.url)
+        linhas = self._conteudo(response).decode().splitlines()
+        
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('historicotreino.ndjson', response['Content-Disposition'])
+        itens = [json.loads(linha) for linha in linhas]
+        self.assertEqual(len(itens), 6)
+        self.assertEqual(itens[:2], self.client.get('/api/v1/historico-treinos/').data['results'][:2])
+    
+    def test_csv(self):
+        """Testa cabeçalho, linhas e o escape de fórmulas no CSV"""
+        self.authenticate_user(self.admin_user)
+        
+        response = self.client.get(self.url, {'formato': 'csv', 'fields': 'id,observacoes'})
+        linhas = list(csv.reader(io.StringIO(self._conteudo(response).decode())))
+        
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(linhas[0], ['id', 'observacoes'])
+        self.assertEqual(len(linhas), 7)
+        self.assertIn("'=HYPERLINK(\"http://exemplo\")", [linha[1] for linha in linhas])
+    
+    @override_settings(EXPORTACAO_CHUNK_SIZE=2)
+    def test_envio_em_lotes(self):
+        """Testa se as linhas são lidas e enviadas em lotes de EXPORTACAO_CHUNK_SIZE"""
+        self.authenticate_user(self.admin_user)
+        
+        # Sem linhas, o cabeçalho do CSV é o único bloco
+        blocos = list(self.client.get('/api/v1/trocas-exercicios/exportar/', {'formato': 'csv'}).streaming_content)
+        self.assertEqual(len(blocos), 1)
+        self.assertTrue(blocos[0].startswith(b'id,cliente_nome,'))
+        
+        blocos = list(self.client.get(self.url).streaming_content)
+        self.assertEqual([bloco.count(b'\n') for bloco in blocos], [2, 2, 2])
+    
+    def test_escopo_do_cliente(self):
+        """Testa se o cliente exporta apenas o próprio histórico"""
+        self.authenticate_user(self.cliente_user)
+        
+        linhas = self._conteudo(self.client.get(self.url)).splitlines()
+        
+        self.assertEqual(len(linhas), 5)
+        self.assertTrue(all(json.loads(linha)['cliente'] == self.cliente.id for linha in linhas))
+    
+    def test_formato_invalido(self):
+        """Testa se um formato desconhecido retorna 400"""
+        self.authenticate_user(self.admin_user)
+        
+        response = self.client.get(self.url, {'formato': 'xml'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,125 @@
+from datetime import date, timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
+from core.tests.test_base import BaseTestCase
+from core.models import Cliente, Treino, Exercicio, HistoricoTreino
+from core.api.v1.async_views import AsyncReadView
+from core.api.v1.revocation import revocation_cache
+from core.api.v1.viewsets import TreinoViewSet
+
+
+class AsyncReadViewTest(BaseTestCase):
+    """Testes para os endpoints assíncronos de leitura"""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = self.cliente_user.perfil.cliente
+        self.treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        Exercicio.objects.create(nome='Supino', descricao='Desc', treino=self.treino)
+        outro = Cliente.objects.create(nome='Outro', email='outro@test.com')
+        self.treino_outro = Treino.objects.create(nome='Outro', descricao='Desc', duracao=30, cliente=outro)
+        hoje = date.today()
+        for i in range(5):
+            HistoricoTreino.objects.create(cliente=self.cliente, treino=self.treino, data_inicio=hoje - timedelta(days=i))
+
+    def headers(self, user):
+        return {'authorization': f'Bearer {self.get_jwt_token(user)}'}
+
+    async def comparar(self, user, path, params=None):
+        """Compara a resposta assíncrona com a do viewset síncrono"""
+        token = await sync_to_async(self.authenticate_user)(user)
+        sincrona = await sync_to_async(self.client.get)(f'/api/v1/{path}', params)
+        assincrona = await self.async_client.get(f'/api/v1/async/{path}', params,
+                                                 headers={'authorization': f'Bearer {token}'})
+        self.assertEqual(assincrona.status_code, sincrona.status_code)
+        self.assertEqual(assincrona.json(), sincrona.json())
+        return assincrona
+
+    async def test_listagem_igual_a_sincrona(self):
+        """Testa se list e retrieve respondem o mesmo que os viewsets síncronos"""
+        response = await self.comparar(self.cliente_user, 'treinos/')
+        self.assertEqual(response.json()['count'], 1)
+
+        await self.comparar(self.personal_user, 'treinos/')
+        await self.comparar(self.cliente_user, f'treinos/{self.treino.id}/')
+        await self.comparar(self.admin_user, 'historico-treinos/', {'page_size': 2, 'page': 2})
+
+    async def test_listagem_sem_tamanho_de_pagina(self):
+        """Testa se, sem tamanho de página, a listagem vem inteira como na versão síncrona"""
+        with mock.patch.object(PageNumberPagination, 'page_size', None):
+            response = await self.comparar(self.admin_user, 'treinos/')
+
+        self.assertEqual(len(response.json()), 2)
+
+    async def test_head_sem_corpo(self):
+        """Testa se HEAD responde como o GET, mas sem corpo"""
+        # Pela view, sem o cliente de testes, que descarta sozinho o corpo do HEAD
+        view = AsyncReadView.as_view(TreinoViewSet, 'list')
+        headers = await sync_to_async(self.headers)(self.cliente_user)
+        response = await view(AsyncRequestFactory().head('/api/v1/async/treinos/', headers=headers))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, b'')
+
+    async def test_escopo_do_cliente(self):
+        """Testa se o cliente não acessa o treino de outro cliente"""
+        response = await self.async_client.get(f'/api/v1/async/treinos/{self.treino_outro.id}/',
+                                               headers=await sync_to_async(self.headers)(self.cliente_user))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_paginacao_cursor(self):
+        """Testa o modo cursor do histórico no endpoint assíncrono"""
+        headers = await sync_to_async(self.headers)(self.admin_user)
+        ids = []
+        url = '/api/v1/async/historico-treinos/?paginacao=cursor&page_size=2'
+        while url:
+            response = await self.async_client.get(url, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.json()['results'])
+            url = response.json()['next']
+
+        await sync_to_async(self.authenticate_user)(self.admin_user)
+        sincrona = await sync_to_async(self.client.get)('/api/v1/historico-treinos/?paginacao=cursor&page_size=5')
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids, [item['id'] for item in sincrona.json()['results']])
+
+    async def test_sem_autenticacao(self):
+        """Testa 401 com o cabeçalho WWW-Authenticate sem token"""
+        response = await self.async_client.get('/api/v1/async/treinos/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    async def test_token_invalido(self):
+        """Testa 401 para token inválido"""
+        response = await self.async_client.get('/api/v1/async/treinos/', headers={'authorization': 'Bearer x'})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_metodo_nao_permitido(self):
+        """Testa se os endpoints assíncronos são apenas de leitura"""
+        response = await self.async_client.post('/api/v1/async/treinos/', {},
+                                                headers=await sync_to_async(self.headers)(self.admin_user))
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @override_settings(STATELESS_JWT=True)
+    async def test_token_sem_estado(self):
+        """Testa a autenticação assíncrona com token sem estado"""
+        await sync_to_async(revocation_cache.clear)()
+        obtido = await sync_to_async(self.client.post)(reverse('token_obtain_pair'), {
+            'username': 'cliente_test',
+            'password': 'testpass123'
+        }, format='json')
+        access = obtido.data['access']
+
+        response = await self.async_client.get('/api/v1/async/treinos/', headers={'authorization': f'Bearer {access}'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 1)
@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from core.models import Perfil
+from core.planos import catalogo_planos
 
 
 class BaseTestCase(APITestCase):
@@ -11,6 +12,8 @@ class BaseTestCase(APITestCase):
     def setUp(self):
         """Configuração inicial para cada teste"""
         self.client = APIClient()
+        # O catálogo em memória sobrevive ao rollback de cada teste
+        catalogo_planos.clear()
         
         # Criar usuários de teste
         self.admin_user = User.objects.create_user(
@@ -0,0 +1,106 @@
+from unittest import mock
+from django.db import connection
+from rest_framework import status
+from core.tests.test_base import BaseTestCase
+from core.busca import buscar_aproximado, buscar_texto, consulta_textual
+from core.models import Cliente, Treino, Dieta, Exercicio, Refeicao
+
+
+class BuscaAPITest(BaseTestCase):
+    """Testes para a busca textual (?q= e busca/)"""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = self.cliente_user.perfil.cliente
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        outro_treino = Treino.objects.create(nome='Outro', descricao='Desc', duracao=60)
+        dieta = Dieta.objects.create(nome='Dieta', descricao='Desc', calorias=2000, cliente=self.cliente)
+        self.supino = Exercicio.objects.create(nome='Supino reto', descricao='Peito com barra', treino=treino)
+        self.agachamento = Exercicio.objects.create(nome='Agachamento livre', descricao='Pernas', treino=treino)
+        self.remada = Exercicio.objects.create(nome='Remada curvada', descricao='Costas, variação do supino',
+                                               treino=outro_treino)
+        self.omelete = Refeicao.objects.create(nome='Omelete de claras', descricao='Ovos e espinafre',
+                                               calorias=300, dieta=dieta)
+
+    def _ids(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_relevancia_e_prefixo(self):
+        """Testa se o nome pesa mais que a descrição e se palavras incompletas casam"""
+        self.authenticate_user(self.admin_user)
+
+        response = self.client.get('/api/v1/exercicios/', {'q': 'supi'})
+
+        self.assertEqual(self._ids(response), [self.supino.id, self.remada.id])
+        self.assertNotIn('busca', response.data['results'][0])
+
+    def test_stemming_em_portugues(self):
+        """Testa se flexões da mesma palavra casam"""
+        self.authenticate_user(self.admin_user)
+
+        self.assertEqual(self._ids(self.client.get('/api/v1/exercicios/', {'q': 'agachamentos livres'})),
+                         [self.agachamento.id])
+        self.assertEqual(self._ids(self.client.get('/api/v1/refeicoes/', {'q': 'ovo'})), [self.omelete.id])
+
+    def test_busca_respeita_escopo(self):
+        """Testa se o cliente só encontra exercícios dos próprios treinos"""
+        self.authenticate_user(self.cliente_user)
+
+        self.assertEqual(self._ids(self.client.get('/api/v1/exercicios/', {'q': 'supino'})), [self.supino.id])
+
+    def test_termo_sem_palavras(self):
+        """Testa se um termo só com pontuação não casa nada (nem quebra o tsquery)"""
+        self.authenticate_user(self.admin_user)
+
+        self.assertEqual(self._ids(self.client.get('/api/v1/exercicios/', {'q': '&|!:*'})), [])
+
+    def test_busca_de_clientes(self):
+        """Testa o ?q= de clientes (por prefixo, sem pg_trgm)"""
+        self.authenticate_user(self.admin_user)
+        Cliente.objects.create(nome='Mariana Alves', email='mari@academia.com')
+
+        response = self.client.get('/api/v1/clientes/', {'q': 'mari'})
+
+        self.assertEqual([item['nome'] for item in response.data['results']], ['Mariana Alves'])
+
+    def test_busca_de_clientes_por_trigramas(self):
+        """Testa se, com pg_trgm, a busca usa similaridade de trigramas ordenada por relevância"""
+        with mock.patch('core.busca.trigrama_disponivel', return_value=True):
+            queryset = buscar_aproximado(Cliente.objects.all(), ['nome', 'email'], 'mariana')
+
+        sql = str(queryset.query)
+        self.assertIn('%>', sql)
+        self.assertIn('WORD_SIMILARITY', sql.upper())
+        self.assertEqual(queryset.query.order_by, ('-relevancia', 'pk'))
+
+    def test_endpoint_de_busca(self):
+        """Testa a busca conjunta em exercícios, refeições e clientes"""
+        self.authenticate_user(self.admin_user)
+
+        response = self.client.get('/api/v1/busca/', {'q': 'omelete'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['exercicios'], [])
+        self.assertEqual(response.data['refeicoes'],
+                         [{'id': self.omelete.id, 'nome': 'Omelete de claras', 'dieta': self.omelete.dieta_id}])
+        self.assertEqual(response.data['clientes'], [])
+        self.assertEqual(self.client.get('/api/v1/busca/').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_consulta_usa_indice_gin(self):
+        """Testa se a busca textual pode usar o índice GIN do vetor"""
+        treino = self.supino.treino
+        Exercicio.objects.bulk_create(Exercicio(nome=f'Exercício {i}', descricao='Desc', treino=treino)
+                                      for i in range(5000))
+        with connection.cursor() as cursor:
+            # Como o VACUUM faria: incorpora ao índice as linhas pendentes do GIN
+            cursor.execute("SELECT gin_clean_pending_list('exercicio_busca_alive_idx')")
+            cursor.execute('ANALYZE core_exercicio')
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                plano = buscar_texto(Exercicio.objects.all(), 'busca', 'supino').explain()
+            finally:
+                cursor.execute('SET enable_seqscan = on')
+
+        self.assertIn('exercicio_busca_alive_idx', plano)
+        self.assertIsNone(consulta_textual('  !! '))
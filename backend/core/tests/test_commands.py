@@ -0,0 +1,286 @@
+from datetime import date, timedelta
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from core.models import Perfil, TipoPlano, Cliente, Personal, Nutricionista, Treino, Exercicio, TrocaExercicio
+from core.services import recalcular_saldos_trocas, registrar_treino_atribuido, varrer_planos
+
+
+class RecalcularSaldosTrocasTest(TestCase):
+    """Testes para o recálculo em lote dos saldos de trocas"""
+    
+    def setUp(self):
+        self.hoje = date.today()
+        self.plano = TipoPlano.objects.create(nome='Mensal', descricao='Desc', preco=100, duracao_dias=30,
+                                              limite_trocas_exercicios=2, limite_trocas_refeicoes=3,
+                                              periodo_trocas_dias=7)
+        self.no_periodo = Cliente.objects.create(nome='A', email='a@test.com', tipo_plano=self.plano,
+                                                 data_ultimo_treino=self.hoje, data_ultima_dieta=self.hoje)
+        self.encerrado = Cliente.objects.create(nome='B', email='b@test.com', tipo_plano=self.plano,
+                                                data_ultimo_treino=self.hoje - timedelta(days=8),
+                                                trocas_exercicios_restantes=2)
+        self.sem_plano = Cliente.objects.create(nome='C', email='c@test.com', data_ultimo_treino=self.hoje,
+                                                trocas_exercicios_restantes=5)
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.no_periodo)
+        exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino)
+        TrocaExercicio.objects.create(cliente=self.no_periodo, exercicio_antigo=exercicio, motivo='Motivo')
+    
+    def saldos(self, cliente):
+        cliente.refresh_from_db()
+        return cliente.trocas_exercicios_restantes, cliente.trocas_refeicoes_restantes
+    
+    def test_recalcula_a_partir_do_plano(self):
+        """Testa o saldo dentro e fora do período de trocas"""
+        recalcular_saldos_trocas()
+        
+        self.assertEqual(self.saldos(self.no_periodo), (1, 3))
+        self.assertEqual(self.saldos(self.encerrado), (0, 0))
+        self.assertEqual(self.saldos(self.sem_plano), (0, 0))
+    
+    def test_reexecucao_nao_altera_nada(self):
+        """Testa se uma segunda execução não escreve nenhuma linha"""
+        recalcular_saldos_trocas()
+        
+        resultado = recalcular_saldos_trocas()
+        
+        self.assertEqual(resultado['trocas_exercicios_restantes'], 0)
+        self.assertEqual(resultado['trocas_refeicoes_restantes'], 0)
+    
+    def test_lotes_pequenos_mesmo_resultado(self):
+        """Testa se o tamanho do lote não altera o resultado"""
+        resultado = recalcular_saldos_trocas(batch_size=1)
+        
+        self.assertEqual(resultado['lotes'], self.sem_plano.id - self.no_periodo.id + 1)
+        self.assertEqual(self.saldos(self.no_periodo), (1, 3))
+        self.assertEqual(self.saldos(self.sem_plano), (0, 0))
+    
+    def test_novo_treino_renova_saldo(self):
+        """Testa se atribuir um treino renova o saldo de trocas de exercícios"""
+        treino = Treino.objects.create(nome='Novo', descricao='Desc', duracao=60, cliente=self.encerrado)
+        
+        registrar_treino_atribuido(treino)
+        
+        self.assertEqual(self.saldos(self.encerrado)[0], 2)
+    
+    def test_comando(self):
+        """Testa a execução pelo management command"""
+        saida = StringIO()
+        
+        call_command('recalcular_saldos_trocas', '--batch-size', '2', stdout=saida)
+        
+        self.assertIn('lotes processados', saida.getvalue())
+        self.assertEqual(self.saldos(self.no_periodo), (1, 3))
+
+
+class VarrerPlanosTest(TestCase):
+    """Testes para a varredura de vencimento de planos"""
+    
+    def setUp(self):
+        self.hoje = date.today()
+        plano = TipoPlano.objects.create(nome='Mensal', descricao='Desc', preco=100, duracao_dias=30)
+        self.vencido = Cliente.objects.create(nome='A', email='a@test.com', tipo_plano=plano,
+                                              data_fim_plano=self.hoje - timedelta(days=1),
+                                              trocas_exercicios_restantes=1)
+        self.a_vencer = Cliente.objects.create(nome='B', email='b@test.com', tipo_plano=plano,
+                                               data_fim_plano=self.hoje + timedelta(days=3))
+        self.distante = Cliente.objects.create(nome='C', email='c@test.com', tipo_plano=plano,
+                                               data_fim_plano=self.hoje + timedelta(days=60))
+    
+    def test_rebaixa_vencidos_e_relata_a_vencer(self):
+        """Testa se apenas os vencidos perdem o plano e os próximos são relatados"""
+        relatorio = varrer_planos(dias=7)
+        
+        self.assertEqual(relatorio['rebaixados'], 1)
+        self.assertEqual(relatorio['a_vencer'], {self.hoje + timedelta(days=3): 1})
+        self.vencido.refresh_from_db()
+        self.assertIsNone(self.vencido.tipo_plano)
+        self.assertEqual(self.vencido.trocas_exercicios_restantes, 0)
+        self.a_vencer.refresh_from_db()
+        self.assertIsNotNone(self.a_vencer.tipo_plano)
+    
+    def test_reexecucao(self):
+        """Testa se a segunda execução não encontra vencidos"""
+        varrer_planos()
+        
+        self.assertEqual(varrer_planos()['vencidos'], 0)
+    
+    def test_comando_dry_run(self):
+        """Testa se o dry-run apenas relata"""
+        saida = StringIO()
+        
+        call_command('varrer_planos', '--dry-run', stdout=saida)
+        
+        self.assertIn('Planos vencidos: 1 (rebaixados: 0)', saida.getvalue())
+        self.vencido.refresh_from_db()
+        self.assertIsNotNone(self.vencido.tipo_plano)
+    
+    def test_consulta_usa_indice(self):
+        """Testa se a busca por vencidos pode usar o índice parcial em data_fim_plano"""
+        # Maioria sem plano, como em produção, com estatísticas atualizadas
+        Cliente.objects.bulk_create(Cliente(nome=f'Sem plano {i}', email=f'sem{i}@test.com') for i in range(500))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_cliente')
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                # Sem ordenação, como no COUNT/UPDATE da varredura
+                plano = (Cliente.objects.filter(tipo_plano__isnull=False, data_fim_plano__lt=self.hoje)
+                         .order_by().explain())
+            finally:
+                cursor.execute('SET enable_seqscan = on')
+        
+        self.assertIn('cliente_fim_plano_alive_idx', plano)
+
+
+class CreateClienteForPerfilTest(TestCase):
+    """Testes para o backfill em lote das entidades vinculadas ao perfil"""
+    
+    def setUp(self):
+        self.usuarios = [
+            User.objects.create_user(username=f'personal{i}', email=f'personal{i}@test.com', first_name=f'P{i}')
+            for i in range(3)
+        ]
+        # Perfis de personal sem o Personal (update não dispara os signals)
+        Cliente.all_objects.filter(perfil__usuario__in=self.usuarios).delete()
+        Perfil.objects.filter(usuario__in=self.usuarios).update(tipo=Perfil.PERSONAL)
+        self.perfis = list(Perfil.objects.filter(usuario__in=self.usuarios).order_by('id'))
+    
+    def executar(self, *args):
+        saida, erros = StringIO(), StringIO()
+        call_command('create_cliente_for_perfil', '--tipo', 'personal', *args, stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+    
+    def test_cria_em_lotes(self):
+        """Testa a criação em lotes com relato de progresso"""
+        saida, _ = self.executar('--batch-size', '2')
+        
+        self.assertEqual(Personal.objects.filter(perfil__in=self.perfis).count(), 3)
+        self.assertEqual(saida.count('last id'), 2)
+        self.assertIn('Created 3 Personal objects', saida)
+        personal = Personal.objects.get(perfil=self.perfis[0])
+        self.assertEqual((personal.nome, personal.especialidade), ('P0', 'Personal Trainer'))
+    
+    def test_dry_run_nao_grava(self):
+        """Testa se o dry-run apenas relata"""
+        saida, _ = self.executar('--dry-run')
+        
+        self.assertIn('Would create 3 Personal objects', saida)
+        self.assertFalse(Personal.objects.exists())
+    
+    def test_retoma_apos_id(self):
+        """Testa a retomada a partir do último id processado"""
+        self.executar('--start-after-id', str(self.perfis[0].id))
+        
+        self.assertFalse(Personal.objects.filter(perfil=self.perfis[0]).exists())
+        self.assertEqual(Personal.objects.count(), 2)
+    
+    def test_email_em_uso_e_ignorado(self):
+        """Testa se um email já usado é relatado sem interromper o lote"""
+        Personal.objects.create(nome='Existente', email='personal1@test.com')
+        
+        saida, erros = self.executar()
+        
+        self.assertIn(f'Skipped perfil {self.perfis[1].id}', erros)
+        self.assertIn('Created 2 Personal objects', saida)
+    
+    def test_nada_a_fazer(self):
+        """Testa a reexecução quando todos os perfis já têm a entidade"""
+        self.executar()
+        
+        saida, _ = self.executar()
+        
+        self.assertIn('All personal perfils already have Personal objects', saida)
+
+
+class ImportarUsuariosTest(TestCase):
+    """Testes para a importação em massa de usuários"""
+    
+    def importar(self, conteudo, sufixo, *args):
+        with tempfile.NamedTemporaryFile('w', suffix=sufixo, delete=False, encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+        self.addCleanup(os.remove, arquivo.name)
+        saida, erros = StringIO(), StringIO()
+        call_command('importar_usuarios', arquivo.name, *args, stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+    
+    def test_importa_csv_com_entidades(self):
+        """Testa a criação de User, Perfil e entidade do tipo para cada linha"""
+        saida, _ = self.importar(
+            'username,email,password,first_name,last_name,tipo\n'
+            'ana,ana@test.com,senha123,Ana,Silva,cliente\n'
+            'bruno,bruno@test.com,senha123,Bruno,,personal\n'
+            'carla,carla@test.com,,Carla,,nutricionista\n',
+            '.csv', '--workers', '2', '--batch-size', '2',
+        )
+        
+        self.assertIn('3 usuários importados, 0 linhas rejeitadas', saida)
+        ana = User.objects.get(username='ana')
+        self.assertTrue(ana.check_password('senha123'))
+        self.assertEqual(ana.perfil.tipo, 'cliente')
+        self.assertEqual(ana.perfil.cliente.nome, 'Ana Silva')
+        self.assertEqual(Personal.objects.get(perfil__usuario__username='bruno').especialidade, 'Personal Trainer')
+        self.assertTrue(Nutricionista.objects.filter(perfil__usuario__username='carla').exists())
+        self.assertFalse(User.objects.get(username='carla').has_usable_password())
+    
+    def test_linhas_rejeitadas_nao_interrompem(self):
+        """Testa se linhas inválidas são relatadas e as demais importadas"""
+        User.objects.create_user(username='existente', email='existente@test.com')
+        
+        saida, erros = self.importar(
+            '{"username": "ana", "email": "ana@test.com", "password": "senha123"}\n'
+            'não é json\n'
+            '{"username": "existente", "email": "outro@test.com"}\n'
+            '{"username": "sem_email"}\n'
+            '{"username": "ana", "email": "ana2@test.com"}\n'
+            '{"username": "davi", "email": "davi@test.com", "tipo": "gerente"}\n'
+            '{"username": "eva", "email": "eva@test.com", "tipo": "admin"}\n',
+            '.jsonl', '--workers', '1',
+        )
+        
+        self.assertIn('2 usuários importados, 5 linhas rejeitadas', saida)
+        for linha in (2, 3, 4, 5, 6):
+            self.assertIn(f'Linha {linha}:', erros)
+        self.assertTrue(User.objects.get(username='eva').is_staff)
+    
+    def test_sem_signals_por_linha(self):
+        """Testa se o número de consultas não cresce com o número de linhas"""
+        def linhas(inicio, quantidade):
+            return 'username,email\n' + ''.join(
+                f'u{i},u{i}@test.com\n' for i in range(inicio, inicio + quantidade))
+        
+        with CaptureQueriesContext(connection) as poucas:
+            self.importar(linhas(0, 2), '.csv', '--workers', '1')
+        with CaptureQueriesContext(connection) as muitas:
+            self.importar(linhas(10, 20), '.csv', '--workers', '1')
+        
+        self.assertEqual(len(poucas.captured_queries), len(muitas.captured_queries))
+        self.assertEqual(Cliente.objects.filter(email__startswith='u').count(), 22)
+
+
+class BenchmarkLeiturasTest(TransactionTestCase):
+    """Testes para o benchmark das leituras síncronas e assíncronas"""
+    
+    def test_compara_as_duas_variantes(self):
+        """Testa se o benchmark mede as duas variantes sem erros"""
+        User.objects.create_superuser('bench', 'bench@test.com', 'testpass123')
+        out = StringIO()
+        
+        call_command('benchmark_leituras', '--username', 'bench', '--endpoint', 'treinos',
+                     '--requests', '4', '--concurrency', '2', '--host', 'testserver', stdout=out)
+        
+        linhas = out.getvalue().splitlines()
+        self.assertEqual(len(linhas), 2)
+        self.assertIn('/api/v1/treinos/', linhas[0])
+        self.assertIn('/api/v1/async/treinos/', linhas[1])
+        for linha in linhas:
+            self.assertIn('erros 0', linha)
+    
+    def test_usuario_inexistente(self):
+        """Testa o erro para usuário inexistente"""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_leituras', '--username', 'ninguem', stdout=StringIO())
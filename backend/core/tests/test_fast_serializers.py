@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from core.tests.test_base import BaseTestCase
+from core.models import (Cliente, Treino, Dieta, Exercicio, Refeicao, HistoricoTreino, HistoricoDieta,
+                         TrocaExercicio, TrocaRefeicao)
+from core.api.v1.fast_serializers import get_values_serializer
+from core.api.v1.renderers import FastJSONRenderer
+from core.api.v1.serializers import (TreinoSerializer, ClienteSerializer, HistoricoTreinoSerializer,
+                                     HistoricoDietaSerializer, ExercicioSerializer, RefeicaoSerializer,
+                                     TrocaExercicioSerializer, TrocaRefeicaoSerializer)
+from core.api.v1.viewsets import TrocaExercicioViewSet, HistoricoTreinoViewSet
+
+
+class FastSerializerContractTest(BaseTestCase):
+    """Contrato: a listagem rápida gera os mesmos bytes que os serializers do DRF"""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = self.cliente_user.perfil.cliente
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        dieta = Dieta.objects.create(nome='Dieta', descricao='Desc', calorias=2000, cliente=self.cliente)
+        antigo = Exercicio.objects.create(nome='Supino "reto"', descricao='Linha\nnova ção 😀', treino=treino)
+        novo = Exercicio.objects.create(nome='Crucifixo', descricao='', treino=treino)
+        almoco = Refeicao.objects.create(nome='Almoço', descricao='Arroz', calorias=650, dieta=dieta)
+        HistoricoTreino.objects.create(cliente=self.cliente, treino=treino, data_inicio=date.today())
+        HistoricoTreino.objects.create(cliente=self.cliente, treino=treino, data_inicio=date.today() - timedelta(days=3),
+                                       data_fim=date.today(), observacoes='Concluído')
+        HistoricoDieta.objects.create(cliente=self.cliente, dieta=dieta, data_inicio=date.today())
+        TrocaExercicio.objects.create(cliente=self.cliente, exercicio_antigo=antigo, motivo='Dor')
+        TrocaExercicio.objects.create(cliente=self.cliente, exercicio_antigo=antigo, exercicio_novo=novo,
+                                      motivo='Aparelho ocupado', status='APROVADA', aprovado_por=self.personal_user,
+                                      data_resposta=timezone.now(), observacoes_resposta='Ok')
+        TrocaRefeicao.objects.create(cliente=self.cliente, refeicao_antiga=almoco, motivo='Alergia',
+                                     status='REJEITADA', data_resposta=timezone.now())
+
+    def assert_mesmos_bytes(self, serializer_class, queryset):
+        values_serializer = get_values_serializer(serializer_class, queryset.model)
+        self.assertIsNotNone(values_serializer)
+
+        esperado = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        rapido = values_serializer.to_representation(queryset.values(*values_serializer.columns))
+
+        self.assertEqual(FastJSONRenderer().render(rapido), esperado)
+
+    def test_serializers_equivalentes(self):
+        """Testa os serializers '__all__' e os com source= relacionais e get_FOO_display"""
+        casos = [
+            (HistoricoTreinoSerializer, HistoricoTreino),
+            (HistoricoDietaSerializer, HistoricoDieta),
+            (ExercicioSerializer, Exercicio),
+            (RefeicaoSerializer, Refeicao),
+            (TrocaExercicioSerializer, TrocaExercicio),
+            (TrocaRefeicaoSerializer, TrocaRefeicao),
+        ]
+        for serializer_class, model in casos:
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assert_mesmos_bytes(serializer_class, model.objects.order_by('id'))
+
+    def test_serializers_nao_suportados(self):
+        """Testa se serializers aninhados ficam no caminho normal"""
+        self.assertIsNone(get_values_serializer(TreinoSerializer, Treino))
+        self.assertIsNone(get_values_serializer(ClienteSerializer, Cliente))
+
+    def test_endpoints_equivalentes(self):
+        """Testa se as listagens respondem os mesmos bytes com e sem a listagem rápida"""
+        self.authenticate_user(self.admin_user)
+        urls = [
+            ('/api/v1/trocas-exercicios/', TrocaExercicioViewSet),
+            ('/api/v1/trocas-exercicios/?paginacao=cursor&page_size=1', TrocaExercicioViewSet),
+            ('/api/v1/historico-treinos/?page=1', HistoricoTreinoViewSet),
+        ]
+        for url, viewset in urls:
+            with self.subTest(url=url):
+                rapida = self.client.get(url)
+                with mock.patch.object(viewset, 'fast_list', False):
+                    normal = self.client.get(url)
+
+                self.assertEqual(rapida.status_code, status.HTTP_200_OK)
+                self.assertEqual(rapida.content, normal.content)
+
+    def test_renderer_equivalente(self):
+        """Testa se o FastJSONRenderer gera os mesmos bytes que o JSONRenderer"""
+        dados = {
+            'texto': 'aspas " barra \\ controle \x01   ção 😀',
+            'numeros': [1, -2, 2.5, 0.1 + 0.2, 1e20, 1e-05, 10 ** 30],
+            'datas': [timezone.now(), date.today()],
+            'decimal': Decimal('10.50'),
+            'lazy': gettext_lazy('Pendente'),
+            'aninhado': {'lista': (1, 2), 1: None, 'bool': True},
+        }
+        for chave, valor in dados.items():
+            with self.subTest(chave=chave):
+                self.assertEqual(FastJSONRenderer().render({chave: valor}), JSONRenderer().render({chave: valor}))
+
+        self.assertEqual(FastJSONRenderer().render(dados, 'application/json; indent=2'),
+                         JSONRenderer().render(dados, 'application/json; indent=2'))
+
+    def test_renderer_sem_json_em_strings_comuns(self):
+        """Testa se strings com dígito seguido de "e" não desviam para o json"""
+        dados = {'hash': '9e107d9d372bb6826bd81d3542a419d6', 'nome': '3exercicios', 'n': [1, 2.5e-3, None]}
+        with mock.patch.object(JSONRenderer, 'render') as render:
+            resultado = FastJSONRenderer().render(dados)
+        render.assert_not_called()
+        self.assertEqual(resultado, JSONRenderer().render(dados))
+
+    def test_renderer_recusa_floats_nao_finitos(self):
+        """Testa se NaN e infinito são recusados como no JSONRenderer estrito"""
+        for valor in (float('nan'), float('inf'), -float('inf')):
+            with self.subTest(valor=valor):
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({'itens': [{'peso': valor}]})
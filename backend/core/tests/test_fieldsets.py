@@ -0,0 +1,114 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from core.tests.test_base import BaseTestCase
+from core.models import Treino, Exercicio
+
+
+class SparseFieldsetsAPITest(BaseTestCase):
+    """Testes para os parâmetros ?fields= e ?expand= das leituras"""
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        sqls = [query['sql'] for query in context.captured_queries]
+        return response.data, sqls
+
+    def test_sem_parametros_resposta_completa(self):
+        """Testa se a resposta sem fields/expand mantém os aninhados"""
+        self.authenticate_user(self.admin_user)
+        data, _ = self._get('/api/v1/clientes/')
+
+        perfil = data['results'][0]['perfil']
+        self.assertIn('usuario_details', perfil)
+        self.assertIn('perfil', perfil['usuario_details'])
+
+    def test_fields_restringe_campos_e_joins(self):
+        """Testa se campos não pedidos não são serializados nem lidos com join"""
+        self.authenticate_user(self.admin_user)
+        data, sqls = self._get('/api/v1/clientes/?fields=id,nome,email')
+
+        self.assertEqual(set(data['results'][0]), {'id', 'nome', 'email'})
+        listagem = [sql for sql in sqls if 'FROM "core_cliente"' in sql and 'COUNT' not in sql]
+        self.assertTrue(listagem)
+        for sql in listagem:
+            self.assertNotIn('core_perfil', sql)
+            self.assertNotIn('core_tipoplano', sql)
+            self.assertNotIn('auth_user', sql)
+
+    def test_aninhado_nao_expandido_vira_chave_primaria(self):
+        """Testa se um serializer aninhado pedido sem expand retorna apenas o id"""
+        self.authenticate_user(self.admin_user)
+        cliente = self.cliente_user.perfil.cliente
+        data, sqls = self._get(f'/api/v1/clientes/{cliente.pk}/?fields=id,perfil')
+
+        self.assertEqual(data, {'id': cliente.pk, 'perfil': self.cliente_user.perfil.pk})
+        self.assertFalse(any('core_perfil' in sql for sql in sqls if 'FROM "core_cliente"' in sql))
+
+    def test_expand_e_subcampos(self):
+        """Testa expand de um nível e subcampos pontuados"""
+        self.authenticate_user(self.admin_user)
+        cliente = self.cliente_user.perfil.cliente
+
+        data, _ = self._get(f'/api/v1/clientes/{cliente.pk}/?fields=id,perfil&expand=perfil')
+        self.assertEqual(data['perfil']['usuario_details'], self.cliente_user.pk)
+        self.assertEqual(data['perfil']['tipo'], 'cliente')
+
+        data, _ = self._get(f'/api/v1/clientes/{cliente.pk}/?fields=perfil.tipo,perfil.usuario_details.username')
+        self.assertEqual(data, {'perfil': {'tipo': 'cliente', 'usuario_details': {'username': self.cliente_user.username}}})
+
+    def test_expand_sem_fields_recolhe_os_demais_aninhados(self):
+        """Testa se ?expand= vazio mantém os campos e recolhe todos os aninhados"""
+        self.authenticate_user(self.admin_user)
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60,
+                                       cliente=self.cliente_user.perfil.cliente)
+        exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino)
+
+        data, _ = self._get(f'/api/v1/treinos/{treino.pk}/?expand=')
+        self.assertEqual(data['exercicios'], [exercicio.pk])
+        self.assertEqual(data['cliente_nome'], treino.cliente.nome)
+
+    def test_campos_invalidos(self):
+        """Testa se campos e expansões desconhecidos retornam 400"""
+        self.authenticate_user(self.admin_user)
+
+        response = self.client.get('/api/v1/clientes/?fields=id,inexistente')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('inexistente', str(response.data['fields']))
+
+        response = self.client.get('/api/v1/clientes/?expand=nome')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', response.data)
+
+    def test_campo_de_metodo_sem_join(self):
+        """Testa se o join de um campo de método só é feito quando o campo é pedido"""
+        self.authenticate_user(self.admin_user)
+
+        data, sqls = self._get('/api/v1/usuarios/?fields=id,username')
+        self.assertEqual(set(data['results'][0]), {'id', 'username'})
+        listagem = [sql for sql in sqls if '"auth_user"."date_joined" DESC' in sql]
+        self.assertTrue(listagem)
+        self.assertFalse(any('core_perfil' in sql for sql in listagem))
+
+        data, _ = self._get('/api/v1/usuarios/?fields=id,perfil')
+        self.assertIn('tipo', data['results'][0]['perfil'])
+
+    def test_escrita_ignora_selecao(self):
+        """Testa se fields não afeta a validação de escritas"""
+        self.authenticate_user(self.admin_user)
+        response = self.client.post('/api/v1/treinos/?fields=id', {
+            'nome': 'Novo', 'descricao': 'Desc', 'duracao': 30
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['nome'], 'Novo')
+
+    def test_listagem_rapida_com_fields(self):
+        """Testa se a listagem rápida respeita fields"""
+        self.authenticate_user(self.admin_user)
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60)
+        Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino)
+
+        data, _ = self._get('/api/v1/exercicios/?fields=id,nome')
+        self.assertEqual(data['results'], [{'id': treino.exercicios.get().pk, 'nome': 'Supino'}])
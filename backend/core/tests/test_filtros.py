@@ -0,0 +1,183 @@
+import datetime
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import ForeignKey
+from django.utils import timezone
+from rest_framework import status
+from core.tests.test_base import BaseTestCase
+from core.api.v1.filters import Filtro, campo_indexado, campos_sem_indice, resolver_campo
+from core.api.v1.routers import router
+from core.checks import filtros_indexados
+from core.models import (Cliente, TipoPlano, Treino, Dieta, HistoricoTreino, HistoricoDieta, Exercicio,
+                         Refeicao, TrocaExercicio, TrocaRefeicao, Perfil)
+
+LINHAS = 2000
+
+
+def valor_de_exemplo(field, lookup):
+    """Valor seletivo para o filtro: os de intervalo ficam fora dos dados gerados."""
+    if field.choices:
+        return field.choices[0][0]
+    if isinstance(field, ForeignKey):
+        return field.related_model._base_manager.order_by('pk').values_list('pk', flat=True).first()
+    hoje = timezone.now() if field.get_internal_type() == 'DateTimeField' else datetime.date.today()
+    return hoje + datetime.timedelta(days=1) if lookup == 'gte' else hoje - datetime.timedelta(days=3650)
+
+
+def popular():
+    """Algumas linhas por tabela, para que o planejador escolha entre os índices pelo custo."""
+    planos = TipoPlano.objects.bulk_create(
+        TipoPlano(nome=f'Plano {i}', descricao='Desc', preco=100, duracao_dias=30) for i in range(4))
+    clientes = Cliente.objects.bulk_create(
+        Cliente(nome=f'Cliente {i}', email=f'cliente{i}@academia.com', tipo_plano=planos[i % 4] if i % 2 else None)
+        for i in range(LINHAS))
+    treinos = Treino.objects.bulk_create(
+        Treino(nome=f'Treino {i}', descricao='Desc', duracao=60, cliente=clientes[i]) for i in range(LINHAS))
+    dietas = Dieta.objects.bulk_create(
+        Dieta(nome=f'Dieta {i}', descricao='Desc', calorias=2000, cliente=clientes[i]) for i in range(LINHAS))
+    inicio = datetime.date.today() - datetime.timedelta(days=LINHAS)
+    HistoricoTreino.objects.bulk_create(
+        HistoricoTreino(cliente=clientes[i], treino=treinos[i], data_inicio=inicio + datetime.timedelta(days=i))
+        for i in range(LINHAS))
+    HistoricoDieta.objects.bulk_create(
+        HistoricoDieta(cliente=clientes[i], dieta=dietas[i], data_inicio=inicio + datetime.timedelta(days=i))
+        for i in range(LINHAS))
+    exercicios = Exercicio.objects.bulk_create(
+        Exercicio(nome=f'Exercício {i}', descricao='Desc', treino=treinos[i]) for i in range(LINHAS))
+    refeicoes = Refeicao.objects.bulk_create(
+        Refeicao(nome=f'Refeição {i}', descricao='Desc', calorias=300, dieta=dietas[i]) for i in range(LINHAS))
+    status_troca = [valor for valor, _ in TrocaExercicio.STATUS_CHOICES]
+    TrocaExercicio.objects.bulk_create(
+        TrocaExercicio(cliente=clientes[i], exercicio_antigo=exercicios[i], motivo='Motivo',
+                       status=status_troca[i % 3]) for i in range(LINHAS))
+    TrocaRefeicao.objects.bulk_create(
+        TrocaRefeicao(cliente=clientes[i], refeicao_antiga=refeicoes[i], motivo='Motivo',
+                      status=status_troca[i % 3]) for i in range(LINHAS))
+    usuarios = User.objects.bulk_create(User(username=f'usuario{i}') for i in range(LINHAS))
+    tipos = [valor for valor, _ in Perfil.TIPO_CHOICES]
+    Perfil.objects.bulk_create(Perfil(usuario=usuarios[i], tipo=tipos[i % 4]) for i in range(LINHAS))
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+class FiltrosIndexadosTest(BaseTestCase):
+    """Testes para os filtros e ordenações declarados das listagens"""
+
+    def setUp(self):
+        super().setUp()
+        self.cliente = self.cliente_user.perfil.cliente
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=self.cliente)
+        self.exercicio = Exercicio.objects.create(nome='Supino', descricao='Desc', treino=treino)
+
+    def _explicar(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                return queryset.explain()
+            finally:
+                cursor.execute('SET enable_seqscan = on')
+
+    def test_todo_filtro_declarado_tem_indice(self):
+        """Testa se a verificação de sistema aceita todos os filtros declarados"""
+        self.assertEqual(filtros_indexados(None), [])
+        for _, viewset, _ in router.registry:
+            self.assertEqual(campos_sem_indice(viewset), [], viewset.__name__)
+
+    def test_campo_sem_indice_e_recusado(self):
+        """Testa se campos sem índice (ou só com índice parcial de outra condição) são recusados"""
+        self.assertFalse(campo_indexado(Cliente, 'created_at'))
+        self.assertFalse(campo_indexado(Cliente, 'data_fim_plano'))
+        self.assertTrue(campo_indexado(Cliente, 'nome'))
+
+        class ViewSemIndice:
+            queryset = Cliente.objects.all()
+            filtros = [Filtro('criado', 'created_at')]
+            ordering_fields = ['nome']
+
+        self.assertEqual(campos_sem_indice(ViewSemIndice), ['created_at'])
+
+    def test_planos_usam_indice(self):
+        """Testa, via EXPLAIN, se cada filtro e ordenação declarados são atendidos por um índice"""
+        popular()
+
+        for _, viewset, _ in router.registry:
+            queryset = getattr(viewset, 'queryset', None)
+            if queryset is None:
+                continue
+            for filtro in getattr(viewset, 'filtros', ()):
+                _, field, _ = resolver_campo(queryset.model, filtro.campo)
+                for _, lookup in filtro.parametros():
+                    condicao = {f'{filtro.campo}__{lookup}': valor_de_exemplo(field, lookup)}
+                    plano = self._explicar(queryset.filter(**condicao))
+                    with self.subTest(viewset=viewset.__name__, filtro=filtro.nome, lookup=lookup):
+                        self.assertRegex(plano, rf'Index Cond: .*\b{field.column}\b')
+            for campo in getattr(viewset, 'ordering_fields', ()):
+                for ordenacao in (campo, f'-{campo}'):
+                    plano = self._explicar(queryset.order_by(ordenacao, 'pk')[:10])
+                    with self.subTest(viewset=viewset.__name__, ordering=ordenacao):
+                        self.assertIn('Index Scan', plano)
+                        # Quando muito, um desempate pelo id sobre a ordem lida do índice
+                        self.assertNotRegex(plano, r'(?<!Incremental )Sort  \(')
+
+    def test_filtro_de_status_das_trocas(self):
+        """Testa se ?status= filtra as trocas no banco e valida o valor"""
+        TrocaExercicio.objects.create(cliente=self.cliente, exercicio_antigo=self.exercicio, motivo='Motivo')
+        aprovada = TrocaExercicio.objects.create(cliente=self.cliente, exercicio_antigo=self.exercicio,
+                                                 motivo='Motivo', status='APROVADO')
+        self.authenticate_user(self.personal_user)
+
+        response = self.client.get('/api/v1/trocas-exercicios/', {'status': 'APROVADO'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [aprovada.id])
+
+        response = self.client.get('/api/v1/trocas-exercicios/', {'status': 'approved'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+
+    def test_filtro_por_intervalo_de_datas(self):
+        """Testa os limites __gte/__lt das datas e a validação do formato"""
+        antiga = TrocaExercicio.objects.create(cliente=self.cliente, exercicio_antigo=self.exercicio, motivo='Motivo')
+        TrocaExercicio.objects.filter(pk=antiga.pk).update(data_solicitacao=timezone.now() - datetime.timedelta(days=30))
+        recente = TrocaExercicio.objects.create(cliente=self.cliente, exercicio_antigo=self.exercicio, motivo='Motivo')
+        self.authenticate_user(self.admin_user)
+        desde = (timezone.localdate() - datetime.timedelta(days=1)).isoformat()
+
+        response = self.client.get('/api/v1/trocas-exercicios/', {'data_solicitacao__gte': desde})
+        self.assertEqual([item['id'] for item in response.data['results']], [recente.id])
+        response = self.client.get('/api/v1/trocas-exercicios/', {'data_solicitacao__lt': desde})
+        self.assertEqual([item['id'] for item in response.data['results']], [antiga.id])
+
+        response = self.client.get('/api/v1/trocas-exercicios/', {'data_solicitacao__gte': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filtro_respeita_escopo(self):
+        """Testa se o filtro por cliente não amplia o escopo do cliente"""
+        outro = Cliente.objects.create(nome='Outro', email='outro@academia.com')
+        TrocaExercicio.objects.create(cliente=outro, exercicio_antigo=self.exercicio, motivo='Motivo')
+        self.authenticate_user(self.cliente_user)
+
+        response = self.client.get('/api/v1/trocas-exercicios/', {'cliente': outro.pk})
+        self.assertEqual(response.data['results'], [])
+
+    def test_filtro_de_usuarios_por_papel(self):
+        """Testa se ?tipo= filtra os usuários pelo papel do perfil"""
+        self.authenticate_user(self.admin_user)
+
+        response = self.client.get('/api/v1/usuarios/', {'tipo': Perfil.PERSONAL})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.personal_user.id])
+
+    def test_ordenacao(self):
+        """Testa a ordenação por campo declarado e a recusa de campos não declarados"""
+        Cliente.objects.create(nome='Zélia', email='zelia@academia.com')
+        Cliente.objects.create(nome='Ana', email='ana@academia.com')
+        self.authenticate_user(self.admin_user)
+
+        response = self.client.get('/api/v1/clientes/', {'ordering': '-nome'})
+        esperados = list(Cliente.objects.order_by('-nome', '-pk').values_list('nome', flat=True)[:10])
+        self.assertEqual([item['nome'] for item in response.data['results']], esperados)
+        self.assertEqual(esperados[-1], 'Ana')
+
+        response = self.client.get('/api/v1/clientes/', {'ordering': 'created_at'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
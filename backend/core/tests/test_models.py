@@ -2,7 +2,7 @@ from django.test import TestCase
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
-from core.models import Perfil
+from core.models import Perfil, Cliente, Treino
 
 
 class PerfilModelTest(TestCase):
@@ -116,3 +116,30 @@ class PerfilModelTest(TestCase):
         
         perfil = Perfil.objects.get(usuario=staff_user)
         self.assertEqual(perfil.tipo, 'admin')
+
+
+class SoftDeleteManagerTest(TestCase):
+    """Testes para o manager padrão com exclusão lógica"""
+    
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nome='Cliente Teste', email='cliente@example.com')
+        self.treino_ativo = Treino.objects.create(nome='Ativo', descricao='A', duracao=30, cliente=self.cliente)
+        self.treino_excluido = Treino.objects.create(nome='Excluído', descricao='B', duracao=30, cliente=self.cliente)
+        self.treino_excluido.soft_delete()
+    
+    def test_objects_ignora_excluidos(self):
+        """Testa se o manager padrão retorna apenas registros ativos"""
+        self.assertEqual(list(Treino.objects.all()), [self.treino_ativo])
+        self.assertEqual(list(self.cliente.treinos.all()), [self.treino_ativo])
+    
+    def test_all_objects_inclui_excluidos(self):
+        """Testa se all_objects retorna também os registros excluídos"""
+        self.assertEqual(Treino.all_objects.count(), 2)
+        self.assertEqual(list(Treino.all_objects.dead()), [self.treino_excluido])
+    
+    def test_soft_delete_em_lote(self):
+        """Testa a exclusão lógica a partir de um queryset"""
+        Treino.objects.filter(cliente=self.cliente).soft_delete()
+        
+        self.assertFalse(Treino.objects.exists())
+        self.assertEqual(Treino.all_objects.count(), 2)
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+from rest_framework import status
+from core.tests.test_base import BaseTestCase
+from core.models import Treino, HistoricoTreino
+
+
+class KeysetPaginationTest(BaseTestCase):
+    """Testes para o modo cursor (keyset) da paginação do histórico"""
+
+    url = '/api/v1/historico-treinos/'
+
+    def setUp(self):
+        super().setUp()
+        cliente = self.cliente_user.perfil.cliente
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=cliente)
+        hoje = date.today()
+        # Várias linhas com a mesma data para exercitar o desempate por id
+        for i in range(15):
+            HistoricoTreino.objects.create(cliente=cliente, treino=treino, data_inicio=hoje - timedelta(days=i // 4))
+        self.authenticate_user(self.admin_user)
+
+    def test_paginacao_padrao_mantem_contagem(self):
+        """Testa se sem opt-in a resposta continua paginada por número"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 15)
+
+    def test_modo_cursor_percorre_todos_os_registros(self):
+        """Testa se as páginas do cursor cobrem tudo, em ordem e sem repetição"""
+        esperado = list(HistoricoTreino.objects.order_by('-data_inicio', '-id').values_list('id', flat=True))
+
+        ids = []
+        response = self.client.get(self.url, {'paginacao': 'cursor'})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(ids, esperado)
+
+    def test_modo_cursor_tamanho_de_pagina(self):
+        """Testa o parâmetro page_size no modo cursor"""
+        response = self.client.get(self.url, {'paginacao': 'cursor', 'page_size': 4})
+
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_cursor_invalido(self):
+        """Testa se um cursor malformado retorna 404"""
+        response = self.client.get(self.url, {'cursor': 'invalido'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
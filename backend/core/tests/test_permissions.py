@@ -1,5 +1,9 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from core.tests.test_base import BaseTestCase
+from core.models import Treino
+from core.api.v1.authentication import get_principal
 
 
 class PermissionsTest(BaseTestCase):
@@ -100,3 +104,29 @@ class PermissionsTest(BaseTestCase):
                     status.HTTP_403_FORBIDDEN,
                     f"Personal foi negado acesso a {endpoint}"
                 )
+
+
+class PrincipalTest(BaseTestCase):
+    """Testes para o principal resolvido na autenticação"""
+    
+    def test_principal_resolve_papel_e_cliente(self):
+        """Testa se a autenticação carrega papel e cliente vinculado"""
+        principal = get_principal(self.cliente_user)
+        
+        self.assertEqual(principal.role, 'cliente')
+        self.assertEqual(principal.cliente_id, self.cliente_user.perfil.cliente.id)
+        self.assertIsNone(principal.personal_id)
+    
+    def test_listagem_cliente_sem_consultas_extras(self):
+        """Testa se usuário, perfil e cliente são carregados em uma única consulta"""
+        cliente = self.cliente_user.perfil.cliente
+        Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=cliente)
+        self.authenticate_user(self.cliente_user)
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/v1/treinos/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        # autenticação + validadores do GET condicional + COUNT da paginação + página de resultados + exercícios
+        self.assertEqual(len(context.captured_queries), 5)
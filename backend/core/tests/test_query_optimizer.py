@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from core.tests.test_base import BaseTestCase
+from core.models import Cliente, Treino, Exercicio, TrocaExercicio
+from core.api.v1.mixins import build_query_plan
+from core.api.v1.serializers import TrocaExercicioSerializer, ClienteSerializer
+
+
+class QueryPlanTest(BaseTestCase):
+    """Testes para o planejamento automático de select_related/prefetch_related"""
+
+    def test_plano_troca_exercicio(self):
+        """Testa se os `source=` do serializer geram os joins esperados"""
+        select, prefetch = build_query_plan(TrocaExercicioSerializer(), TrocaExercicio)
+
+        self.assertEqual(select, ['aprovado_por', 'cliente', 'exercicio_antigo', 'exercicio_novo'])
+        self.assertEqual(prefetch, [])
+
+    def test_plano_cliente_com_serializers_aninhados(self):
+        """Testa se serializers aninhados são percorridos"""
+        select, prefetch = build_query_plan(ClienteSerializer(), Cliente)
+
+        self.assertIn('tipo_plano', select)
+        self.assertIn('perfil__usuario', select)
+
+    def _criar_trocas(self, quantidade):
+        cliente = self.cliente_user.perfil.cliente
+        treino = Treino.objects.create(nome='Treino', descricao='Desc', duracao=60, cliente=cliente)
+        for i in range(quantidade):
+            antigo = Exercicio.objects.create(nome=f'Antigo {i}', descricao='Desc', treino=treino)
+            novo = Exercicio.objects.create(nome=f'Novo {i}', descricao='Desc', treino=treino)
+            TrocaExercicio.objects.create(
+                cliente=cliente, exercicio_antigo=antigo, exercicio_novo=novo,
+                motivo='Motivo', aprovado_por=self.admin_user
+            )
+
+    def _contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_listagem_trocas_numero_fixo_de_consultas(self):
+        """Testa se a listagem de trocas não faz consultas por item"""
+        self.authenticate_user(self.admin_user)
+
+        self._criar_trocas(1)
+        consultas_um_item = self._contar_consultas('/api/v1/trocas-exercicios/')
+
+        self._criar_trocas(5)
+        consultas_varios_itens = self._contar_consultas('/api/v1/trocas-exercicios/')
+
+        self.assertEqual(consultas_um_item, consultas_varios_itens)
+
+    def test_listagem_clientes_numero_fixo_de_consultas(self):
+        """Testa se a listagem de clientes com perfil aninhado não faz consultas por item"""
+        self.authenticate_user(self.admin_user)
+        consultas_antes = self._contar_consultas('/api/v1/clientes/')
+
+        for i in range(3):
+            User.objects.create_user(username=f'extra_{i}', email=f'extra_{i}@test.com', password='testpass123')
+
+        self.assertEqual(consultas_antes, self._contar_consultas('/api/v1/clientes/'))
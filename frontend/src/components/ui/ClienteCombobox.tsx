@@ -0,0 +1,110 @@
+import { useEffect, useState } from "react";
+import { Check, ChevronsUpDown } from "lucide-react";
+import { Button } from "@/components/ui/button";
+import {
+  Command,
+  CommandEmpty,
+  CommandGroup,
+  CommandInput,
+  CommandItem,
+  CommandList,
+} from "@/components/ui/command";
+import { Popover, PopoverContent, PopoverTrigger } from "@/components/ui/popover";
+import { cn } from "@/lib/utils";
+import api from "@/lib/api";
+
+interface ClienteOpcao {
+  id: number;
+  nome: string;
+  email: string;
+}
+
+interface ClienteComboboxProps {
+  id?: string;
+  value: number | null;
+  // Nome do cliente já vinculado, para exibir antes de qualquer busca
+  label?: string;
+  onChange: (value: number | null) => void;
+}
+
+// Quantos clientes o lookup devolve por busca
+const LIMITE = 20;
+// Espera entre a digitação e a requisição
+const ATRASO_MS = 300;
+
+const ClienteCombobox = ({ id, value, label, onChange }: ClienteComboboxProps) => {
+  const [open, setOpen] = useState(false);
+  const [termo, setTermo] = useState("");
+  const [clientes, setClientes] = useState<ClienteOpcao[]>([]);
+  const [selecionado, setSelecionado] = useState<ClienteOpcao | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+
+  const nome = selecionado?.id === value ? selecionado.nome : label;
+
+  useEffect(() => {
+    if (!open) return;
+    let cancelado = false;
+    const timer = setTimeout(async () => {
+      setIsLoading(true);
+      try {
+        const params = termo.trim() ? { q: termo.trim(), limit: LIMITE } : { limit: LIMITE };
+        const response = await api.get<ClienteOpcao[]>("clientes/lookup/", { params });
+        if (!cancelado) setClientes(response.data);
+      } catch (error) {
+        console.error("Erro ao buscar clientes:", error);
+      } finally {
+        if (!cancelado) setIsLoading(false);
+      }
+    }, ATRASO_MS);
+    return () => {
+      cancelado = true;
+      clearTimeout(timer);
+    };
+  }, [termo, open]);
+
+  return (
+    <Popover open={open} onOpenChange={setOpen}>
+      <PopoverTrigger asChild>
+        <Button
+          id={id}
+          variant="outline"
+          role="combobox"
+          aria-expanded={open}
+          className="w-full justify-between font-normal"
+        >
+          <span className={cn("truncate", !value && "text-muted-foreground")}>
+            {value ? nome ?? `Cliente #${value}` : "Selecione um cliente"}
+          </span>
+          <ChevronsUpDown className="ml-2 h-4 w-4 shrink-0 opacity-50" />
+        </Button>
+      </PopoverTrigger>
+      <PopoverContent className="w-[--radix-popover-trigger-width] p-0" align="start">
+        {/* A filtragem é feita pelo servidor; o cmdk só exibe o que o lookup devolve */}
+        <Command shouldFilter={false}>
+          <CommandInput placeholder="Buscar por nome..." value={termo} onValueChange={setTermo} />
+          <CommandList>
+            <CommandEmpty>{isLoading ? "Buscando..." : "Nenhum cliente encontrado"}</CommandEmpty>
+            <CommandGroup>
+              {clientes.map((cliente) => (
+                <CommandItem
+                  key={cliente.id}
+                  value={cliente.id.toString()}
+                  onSelect={() => {
+                    setSelecionado(cliente);
+                    onChange(cliente.id === value ? null : cliente.id);
+                    setOpen(false);
+                  }}
+                >
+                  <Check className={cn("mr-2 h-4 w-4", cliente.id === value ? "opacity-100" : "opacity-0")} />
+                  {cliente.nome} - {cliente.email}
+                </CommandItem>
+              ))}
+            </CommandGroup>
+          </CommandList>
+        </Command>
+      </PopoverContent>
+    </Popover>
+  );
+};
+
+export default ClienteCombobox;
@@ -45,6 +45,31 @@ interface ChangeRequest {
   refeicao_nova?: any;
 }
 
+// Status da API para o status exibido; as abas filtram no servidor
+const STATUS_DA_API = {
+  PENDENTE: 'pending',
+  APROVADO: 'approved',
+  REJEITADO: 'rejected',
+} as const;
+
+const STATUS_DA_ABA: Record<string, string> = {
+  pending: 'PENDENTE',
+  approved: 'APROVADO',
+  rejected: 'REJEITADO',
+};
+
+// Percorre as páginas da listagem (cursor, 100 por página) seguindo `next`
+const buscarTodas = async <T,>(url: string, params: Record<string, string>): Promise<T[]> => {
+  const itens: T[] = [];
+  let response = await api.get(url, { params: { ...params, paginacao: "cursor", page_size: 100 } });
+  itens.push(...response.data.results);
+  while (response.data.next) {
+    response = await api.get(response.data.next);
+    itens.push(...response.data.results);
+  }
+  return itens;
+};
+
 const Changes = () => {
   const { user, hasRole } = useAuth();
   const { toast } = useToast();
@@ -63,21 +88,25 @@ const Changes = () => {
   const isProfessional = hasRole(["admin", "trainer", "nutritionist"]);
 
   useEffect(() => {
-    fetchChanges();
     if (!isProfessional) {
       fetchUserItems();
     }
   }, []);
 
+  useEffect(() => {
+    fetchChanges();
+  }, [activeTab]);
+
   const fetchChanges = async () => {
     try {
       setLoading(true);
-      const [exerciseRes, mealRes] = await Promise.all([
-        api.get("trocas-exercicios/"),
-        api.get("trocas-refeicoes/")
+      const params = activeTab === "all" ? {} : { status: STATUS_DA_ABA[activeTab] };
+      const [exercicios, refeicoes] = await Promise.all([
+        buscarTodas<TrocaExercicio>("trocas-exercicios/", params),
+        buscarTodas<TrocaRefeicao>("trocas-refeicoes/", params)
       ]);
-      setExerciseChanges(Array.isArray(exerciseRes.data) ? exerciseRes.data : []);
-      setMealChanges(Array.isArray(mealRes.data) ? mealRes.data : []);
+      setExerciseChanges(exercicios);
+      setMealChanges(refeicoes);
     } catch (error) {
       console.error("Error fetching changes:", error);
       toast({
@@ -110,19 +139,15 @@ const Changes = () => {
     ...exerciseChanges.map(change => ({
       ...change,
       type: 'workout' as const,
-      status: 'approved' as const // API doesn't have status field
+      status: change.status && STATUS_DA_API[change.status]
     })),
     ...mealChanges.map(change => ({
       ...change,
       type: 'diet' as const,
-      status: 'approved' as const // API doesn't have status field
+      status: change.status && STATUS_DA_API[change.status]
     }))
   ];
 
-  const filteredRequests = activeTab === "all" 
-    ? allChanges 
-    : allChanges.filter(req => req.status === activeTab);
-
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
     return new Intl.DateTimeFormat("pt-BR", {
@@ -285,8 +310,8 @@ const Changes = () => {
         </TabsList>
         
         <TabsContent value={activeTab} className="space-y-4">
-          {filteredRequests.length > 0 ? (
-            filteredRequests.map(request => (
+          {allChanges.length > 0 ? (
+            allChanges.map(request => (
               <Card key={`${request.type}-${request.id}`} className="overflow-hidden">
                 <CardHeader className="flex flex-row items-center justify-between pb-2 gap-2">
                   <div className="flex items-center gap-2">
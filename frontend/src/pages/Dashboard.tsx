@@ -25,54 +25,22 @@ const Dashboard = () => {
       try {
         setLoading(true);
         
-        // Fetch all data in parallel
-        const [
-          workoutsResponse,
-          dietsResponse,
-          exerciseChangesResponse,
-          mealChangesResponse,
-          workoutHistoryResponse
-        ] = await Promise.all([
-          api.get("treinos/"),
-          api.get("dietas/"),
-          api.get("trocas-exercicios/"),
-          api.get("trocas-refeicoes/"),
-          api.get("historico-treinos/")
-        ]);
+        // Fetch aggregated counts, pending changes and recent items in one call
+        const { data } = await api.get("dashboard/");
         
-        // Set workouts count
-        const workouts = Array.isArray(workoutsResponse.data) ? workoutsResponse.data : [];
-        setWorkoutsCount(workouts.length);
+        setWorkoutsCount(data.treinos?.total || 0);
+        setDietsCount(data.dietas?.total || 0);
+        setPendingChanges(data.trocas?.pendentes || 0);
         
-        // Set diets count
-        const diets = Array.isArray(dietsResponse.data) ? dietsResponse.data : [];
-        setDietsCount(diets.length);
-        
-        // Calculate pending changes (filter by status if needed)
-        const exerciseChanges = Array.isArray(exerciseChangesResponse.data) ? exerciseChangesResponse.data : [];
-        const mealChanges = Array.isArray(mealChangesResponse.data) ? mealChangesResponse.data : [];
-        
-        const pendingExerciseChanges = exerciseChanges.filter(
-          (change: any) => change.status === "PENDENTE"
-        ).length;
-        const pendingMealChanges = mealChanges.filter(
-          (change: any) => change.status === "PENDENTE"
-        ).length;
-        setPendingChanges(pendingExerciseChanges + pendingMealChanges);
-        
-        // Get latest workout from history
-        const workoutHistory = Array.isArray(workoutHistoryResponse.data) ? workoutHistoryResponse.data : [];
-        if (workoutHistory.length > 0) {
-          const latestHistory = workoutHistory[0];
-          // If the API returns the full workout object
-          if (latestHistory.treino) {
-            setLatestWorkout(latestHistory.treino);
-          }
+        // Most recent workout and current diet
+        const recentWorkouts = data.treinos?.recentes || [];
+        if (recentWorkouts.length > 0) {
+          setLatestWorkout(recentWorkouts[0]);
         }
         
-        // Get current diet (assuming the first one is the current)
-        if (diets.length > 0) {
-          setCurrentDiet(diets[0]);
+        const recentDiets = data.dietas?.recentes || [];
+        if (recentDiets.length > 0) {
+          setCurrentDiet(recentDiets[0]);
         }
         
       } catch (error) {
@@ -35,13 +35,7 @@ import {
 } from "@/components/ui/dialog";
 import { Label } from "@/components/ui/label";
 import { Textarea } from "@/components/ui/textarea";
-import {
-  Select,
-  SelectContent,
-  SelectItem,
-  SelectTrigger,
-  SelectValue,
-} from "@/components/ui/select";
+import ClienteCombobox from "@/components/ui/ClienteCombobox";
 
 const Diets = () => {
   const [diets, setDiets] = useState<Dieta[]>([]);
@@ -54,7 +48,6 @@ const Diets = () => {
   const [isViewDialogOpen, setIsViewDialogOpen] = useState(false);
   const [deleteDietId, setDeleteDietId] = useState<number | null>(null);
   const [editingDiet, setEditingDiet] = useState<Dieta | null>(null);
-  const [clientes, setClientes] = useState<any[]>([]);
   
   const { hasRole } = useAuth();
   const { toast } = useToast();
@@ -70,7 +63,6 @@ const Diets = () => {
 
   useEffect(() => {
     fetchDiets();
-    fetchClientes();
   }, []);
 
   useEffect(() => {
@@ -100,17 +92,6 @@ const Diets = () => {
     }
   };
 
-  const fetchClientes = async () => {
-    try {
-      const response = await api.get("clientes/");
-      const data = response.data.results || response.data;
-      console.log("Clientes carregados (Dietas):", data);
-      setClientes(data);
-    } catch (error) {
-      console.error("Erro ao carregar clientes:", error);
-    }
-  };
-
   const handleCreate = async () => {
     try {
       await api.post("dietas/", formData);
@@ -339,21 +320,11 @@ const Diets = () => {
             </div>
             <div>
               <Label htmlFor="cliente">Cliente</Label>
-              <Select
-                value={formData.cliente?.toString() || ""}
-                onValueChange={(value) => setFormData({ ...formData, cliente: parseInt(value) })}
-              >
-                <SelectTrigger>
-                  <SelectValue placeholder="Selecione um cliente" />
-                </SelectTrigger>
-                <SelectContent>
-                  {clientes.map((cliente) => (
-                    <SelectItem key={cliente.id} value={cliente.id.toString()}>
-                      {cliente.nome} - {cliente.email}
-                    </SelectItem>
-                  ))}
-                </SelectContent>
-              </Select>
+              <ClienteCombobox
+                id="cliente"
+                value={formData.cliente}
+                onChange={(cliente) => setFormData({ ...formData, cliente })}
+              />
             </div>
           </div>
           <DialogFooter>
@@ -404,21 +375,12 @@ const Diets = () => {
             </div>
             <div>
               <Label htmlFor="edit-cliente">Cliente</Label>
-              <Select
-                value={formData.cliente?.toString() || ""}
-                onValueChange={(value) => setFormData({ ...formData, cliente: parseInt(value) })}
-              >
-                <SelectTrigger>
-                  <SelectValue placeholder="Selecione um cliente" />
-                </SelectTrigger>
-                <SelectContent>
-                  {clientes.map((cliente) => (
-                    <SelectItem key={cliente.id} value={cliente.id.toString()}>
-                      {cliente.nome} - {cliente.email}
-                    </SelectItem>
-                  ))}
-                </SelectContent>
-              </Select>
+              <ClienteCombobox
+                id="edit-cliente"
+                value={formData.cliente}
+                label={editingDiet?.cliente_nome}
+                onChange={(cliente) => setFormData({ ...formData, cliente })}
+              />
             </div>
           </div>
           <DialogFooter>
@@ -35,13 +35,7 @@ import {
 } from "@/components/ui/dialog";
 import { Label } from "@/components/ui/label";
 import { Textarea } from "@/components/ui/textarea";
-import {
-  Select,
-  SelectContent,
-  SelectItem,
-  SelectTrigger,
-  SelectValue,
-} from "@/components/ui/select";
+import ClienteCombobox from "@/components/ui/ClienteCombobox";
 
 const Workouts = () => {
   const [workouts, setWorkouts] = useState<Treino[]>([]);
@@ -54,7 +48,6 @@ const Workouts = () => {
   const [isViewDialogOpen, setIsViewDialogOpen] = useState(false);
   const [deleteWorkoutId, setDeleteWorkoutId] = useState<number | null>(null);
   const [editingWorkout, setEditingWorkout] = useState<Treino | null>(null);
-  const [clientes, setClientes] = useState<any[]>([]);
   
   const { hasRole } = useAuth();
   const { toast } = useToast();
@@ -70,13 +63,8 @@ const Workouts = () => {
 
   useEffect(() => {
     fetchWorkouts();
-    fetchClientes();
   }, []);
   
-  useEffect(() => {
-    console.log("Estado dos clientes:", clientes);
-  }, [clientes]);
-
   useEffect(() => {
     const filtered = workouts.filter((workout) => 
       workout.nome.toLowerCase().includes(searchQuery.toLowerCase()) ||
@@ -104,17 +92,6 @@ const Workouts = () => {
     }
   };
 
-  const fetchClientes = async () => {
-    try {
-      const response = await api.get("clientes/");
-      const data = response.data.results || response.data;
-      console.log("Clientes carregados:", data);
-      setClientes(data);
-    } catch (error) {
-      console.error("Erro ao carregar clientes:", error);
-    }
-  };
-
   const handleCreate = async () => {
     try {
       console.log("FormData antes de enviar:", formData);
@@ -346,26 +323,12 @@ const Workouts = () => {
               />
             </div>
             <div>
-              <Label htmlFor="cliente">Cliente ({clientes.length} disponíveis)</Label>
-              <Select
-                value={formData.cliente ? formData.cliente.toString() : undefined}
-                onValueChange={(value) => {
-                  console.log("Cliente selecionado (criar):", value);
-                  setFormData({ ...formData, cliente: value ? parseInt(value) : null });
-                }}
-              >
-                <SelectTrigger>
-                  <SelectValue placeholder="Selecione um cliente" />
-                </SelectTrigger>
-                <SelectContent>
-                  <SelectItem value="test">Teste</SelectItem>
-                  {clientes.map((cliente) => (
-                    <SelectItem key={cliente.id} value={cliente.id.toString()}>
-                      {cliente.nome} - {cliente.email}
-                    </SelectItem>
-                  ))}
-                </SelectContent>
-              </Select>
+              <Label htmlFor="cliente">Cliente</Label>
+              <ClienteCombobox
+                id="cliente"
+                value={formData.cliente}
+                onChange={(cliente) => setFormData({ ...formData, cliente })}
+              />
             </div>
           </div>
           <DialogFooter>
@@ -416,24 +379,12 @@ const Workouts = () => {
             </div>
             <div>
               <Label htmlFor="edit-cliente">Cliente</Label>
-              <Select
-                value={formData.cliente ? formData.cliente.toString() : undefined}
-                onValueChange={(value) => {
-                  console.log("Cliente selecionado (editar):", value);
-                  setFormData({ ...formData, cliente: value ? parseInt(value) : null });
-                }}
-              >
-                <SelectTrigger>
-                  <SelectValue placeholder="Selecione um cliente" />
-                </SelectTrigger>
-                <SelectContent>
-                  {clientes.map((cliente) => (
-                    <SelectItem key={cliente.id} value={cliente.id.toString()}>
-                      {cliente.nome} - {cliente.email}
-                    </SelectItem>
-                  ))}
-                </SelectContent>
-              </Select>
+              <ClienteCombobox
+                id="edit-cliente"
+                value={formData.cliente}
+                label={editingWorkout?.cliente_nome}
+                onChange={(cliente) => setFormData({ ...formData, cliente })}
+              />
             </div>
           </div>
           <DialogFooter>
@@ -62,6 +62,7 @@ export interface Treino {
   descricao: string;
   duracao: number;
   cliente: number;
+  cliente_nome?: string;
   exercicios?: Exercicio[];
 }
 
@@ -71,6 +72,7 @@ export interface Dieta {
   descricao: string;
   calorias: number;
   cliente: number;
+  cliente_nome?: string;
   refeicoes?: Refeicao[];
 }
 
@@ -114,6 +116,7 @@ export interface TrocaExercicio {
   exercicio_novo: Exercicio;
   data_troca: string;
   motivo: string;
+  status?: 'PENDENTE' | 'APROVADO' | 'REJEITADO';
 }
 
 export interface TrocaRefeicao {
@@ -123,6 +126,7 @@ export interface TrocaRefeicao {
   refeicao_nova: Refeicao;
   data_troca: string;
   motivo: string;
+  status?: 'PENDENTE' | 'APROVADO' | 'REJEITADO';
 }
 
 export interface AuthTokens {